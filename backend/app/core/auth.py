@@ -1,15 +1,200 @@
 """
 Auth dependency — extracts and verifies the Supabase JWT from the
 Authorization header, then returns the authenticated user_id.
+
+Tokens are verified locally: HS256 tokens against the project's JWT
+secret, asymmetric ones (RS256/ES256) against the project's JWKS, which
+is fetched once and refreshed when an unknown key id shows up. Verified
+tokens are cached until their ``exp``, so a repeat request costs a dict
+lookup instead of a network round trip.
+
+``auth_mode = "remote"`` keeps the old behaviour of asking Supabase
+(``auth.get_user``) for every new token. ``auth_remote_fallback`` uses
+the remote check only when a token can't be verified locally because
+no key is configured for its algorithm.
 """
 
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
 from fastapi import Depends, HTTPException, Request, status
-from app.core.supabase import get_supabase
+
+from app.core.config import get_settings
+from app.core.supabase import get_async_supabase, get_http_client
+
+logger = logging.getLogger(__name__)
+
+_SYMMETRIC_ALGORITHMS = {"HS256"}
+_ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+
+# Don't hit the JWKS endpoint more often than this for unknown key ids
+_JWKS_MIN_REFRESH_INTERVAL = 60.0
+
+
+class _NoVerificationKey(Exception):
+    """No local key is configured for the token's algorithm."""
+    pass
+
+
+# ── Verified-token cache ─────────────────────────────────────────────────────
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified tokens → user id, each entry valid until the
+    token's ``exp``. Keys are token digests, not the tokens themselves.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> str | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user_id, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user_id
+
+    def put(self, token: str, user_id: str, expires_at: float) -> None:
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (user_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# ── Local verification ───────────────────────────────────────────────────────
+
+
+class _JWKSKeys:
+    """Public keys of the project's JWKS, by key id."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._fetched_at = 0.0
+
+    async def get(self, kid: str | None) -> jwt.PyJWK | None:
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._fetched_at > _JWKS_MIN_REFRESH_INTERVAL:
+            await self._refresh()
+            key = self._keys.get(kid)
+        return key
+
+    async def _refresh(self) -> None:
+        self._fetched_at = time.monotonic()
+        try:
+            resp = await get_http_client().get(self.url, timeout=10.0)
+            resp.raise_for_status()
+            keys = {}
+            for data in resp.json().get("keys", []):
+                try:
+                    keys[data.get("kid")] = jwt.PyJWK(data)
+                except jwt.PyJWKError:
+                    continue  # key type we don't support
+            self._keys = keys
+        except Exception as exc:
+            logger.warning("Failed to fetch JWKS from %s: %s", self.url, exc)
+
+
+_token_cache: VerifiedTokenCache | None = None
+_jwks: _JWKSKeys | None = None
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = VerifiedTokenCache(get_settings().auth_token_cache_size)
+    return _token_cache
+
+
+def _get_jwks() -> _JWKSKeys:
+    global _jwks
+    if _jwks is None:
+        settings = get_settings()
+        url = settings.supabase_jwks_url or (
+            f"{settings.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        )
+        _jwks = _JWKSKeys(url)
+    return _jwks
+
+
+async def verify_token_locally(token: str) -> tuple[str, float]:
+    """
+    Verify a Supabase access token's signature and claims.
+
+    Returns:
+        ``(user_id, exp)``
+
+    Raises:
+        jwt.InvalidTokenError: If the token is malformed, forged or expired
+        _NoVerificationKey: If no local key is configured for its algorithm
+    """
+    settings = get_settings()
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+
+    if algorithm in _SYMMETRIC_ALGORITHMS:
+        if not settings.supabase_jwt_secret:
+            raise _NoVerificationKey(algorithm)
+        key = settings.supabase_jwt_secret
+    elif algorithm in _ASYMMETRIC_ALGORITHMS:
+        key = await _get_jwks().get(header.get("kid"))
+        if key is None:
+            raise _NoVerificationKey(algorithm)
+    else:
+        raise jwt.InvalidAlgorithmError(f"Unsupported algorithm: {algorithm}")
+
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=settings.supabase_jwt_audience,
+        options={"require": ["exp", "sub"]},
+    )
+    return claims["sub"], float(claims["exp"])
+
+
+async def _verify_remotely(token: str) -> tuple[str, float]:
+    """Ask Supabase Auth; the ``exp`` claim is trusted once it accepts the token."""
+    supabase = await get_async_supabase()
+    user_response = await supabase.auth.get_user(token)
+    claims = jwt.decode(token, options={"verify_signature": False})
+    return user_response.user.id, float(claims.get("exp", time.time()))
+
+
+# ── Dependency ───────────────────────────────────────────────────────────────
 
 
 async def get_current_user_id(request: Request) -> str:
     """
-    Validate the Bearer token by calling Supabase's auth.get_user().
+    Validate the Bearer token (locally, or via Supabase in remote mode).
     Returns the user's UUID string.
     """
     auth_header = request.headers.get("Authorization")
@@ -21,12 +206,34 @@ async def get_current_user_id(request: Request) -> str:
 
     token = auth_header.removeprefix("Bearer ")
 
+    cache = get_token_cache()
+    user_id = cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    settings = get_settings()
+
     try:
-        supabase = get_supabase()
-        user_response = supabase.auth.get_user(token)
-        return user_response.user.id
+        if settings.auth_mode == "remote":
+            user_id, expires_at = await _verify_remotely(token)
+        else:
+            try:
+                user_id, expires_at = await verify_token_locally(token)
+            except _NoVerificationKey:
+                if not settings.auth_remote_fallback:
+                    raise
+                user_id, expires_at = await _verify_remotely(token)
+    except _NoVerificationKey as exc:
+        logger.error(f"No JWT verification key configured for {exc}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+        )
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
+
+    cache.put(token, user_id, expires_at)
+    return user_id
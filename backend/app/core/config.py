@@ -11,18 +11,123 @@ class Settings(BaseSettings):
     supabase_service_role_key: str
     supabase_storage_bucket: str = "pdfs"
 
+    # Pooled HTTP/2 connections shared by the async Supabase client
+    supabase_max_connections: int = 100
+    supabase_max_keepalive: int = 20
+    supabase_timeout: float = 30.0
+
+    # Auth: verify access tokens locally ("local") or via Supabase ("remote").
+    # HS256 tokens need the JWT secret; RS256/ES256 use the project's JWKS
+    # (derived from supabase_url unless set). With remote fallback, tokens
+    # that can't be verified locally for lack of a key are checked remotely.
+    auth_mode: str = "local"
+    auth_remote_fallback: bool = True
+    auth_token_cache_size: int = 10_000
+    supabase_jwt_secret: str = ""
+    supabase_jwks_url: str = ""
+    supabase_jwt_audience: str = "authenticated"
+
     # Signed URL validity in seconds (default: 5 minutes)
     upload_url_expiry: int = 300
+    # Signed upload URLs minted concurrently per initiate-upload request
+    signed_url_concurrency: int = 16
+    # Files fetched at once while streaming a bulk-download ZIP
+    bulk_download_concurrency: int = 8
+
+    # Bulk deletes: storage paths per remove call (and calls in flight),
+    # file ids per database ``in_`` filter (keeps request URLs short)
+    storage_remove_batch_size: int = 1000
+    storage_remove_concurrency: int = 4
+    db_in_filter_batch_size: int = 100
+
+    # Processing queue: "cloud_tasks" or "local" (in-process, no GCP needed)
+    queue_backend: str = "cloud_tasks"
+    enqueue_concurrency: int = 32
+    # Local scheduler: documents in flight, of which this many may be in
+    # CPU-bound extraction at once; queued jobs per user before enqueue waits;
+    # attempts per document and the first retry's backoff (seconds)
+    local_queue_workers: int = 4
+    local_queue_cpu_workers: int = 2
+    local_queue_max_pending: int = 10_000
+    local_queue_max_attempts: int = 3
+    local_queue_retry_delay: float = 5.0
+
+    # Google Cloud Tasks / worker settings (required for "cloud_tasks")
+    gcp_project_id: str = ""
+    gcp_location: str = ""
+    gcp_queue: str = ""
+    worker_base_url: str = ""
+
+    # Ingestion pipeline batch sizes (bounds peak worker memory)
+    ingest_page_batch_size: int = 16
+    ingest_chunk_batch_size: int = 64
+    # Chunk size and overlap between neighbouring chunks, in tokens
+    chunk_target_tokens: int = 400
+    chunk_overlap_tokens: int = 40
+
+    # PDF downloads: files up to this many bytes are kept in memory, larger
+    # ones are streamed to a temp file (in this directory; "" = system temp)
+    pdf_download_memory_threshold: int = 16 * 1024 * 1024
+    pdf_download_dir: str = ""
+
+    # Parallel page extraction (process pool). 0 workers = one per CPU core
+    extraction_workers: int = 0
+    extraction_range_pages: int = 32
+    parallel_extraction_min_pages: int = 200
+
+    # Local directory for ingest caches (content-hash chunk registry, ...)
+    ingest_cache_dir: str = ".cache/ingest"
+
+    # Highlight lookup: text indexes kept loaded (LRU)
+    highlight_cache_documents: int = 64
+
+    # Local search indexes (BM25 shards, ...), one file set per tenant
+    search_index_dir: str = ".cache/indexes"
+    dense_index_dtype: str = "float32"          # or "float16" to halve size
+    dense_compaction_interval: float = 60.0     # seconds
+
+    # Per-tenant search result cache (entries per tier, TTLs in seconds)
+    query_cache_max_entries: int = 4096
+    query_cache_ttl: float = 600.0
+    query_cache_reranked_ttl: float = 300.0
+
+    # Embeddings ("openai" = any OpenAI-compatible endpoint, "fake" = local)
+    embedding_provider: str = "openai"
+    embedding_model: str = "text-embedding-3-small"
+    embedding_dimensions: int = 1536
+    embedding_api_key: str = ""
+    embedding_api_base: str = "https://api.openai.com/v1"
+    embedding_batch_size: int = 256
+    embedding_batch_wait_ms: int = 20
+
+    # Reranking ("cohere", "fake" = local, "none" = fused order only)
+    rerank_provider: str = "cohere"
+    rerank_model: str = "rerank-v3.5"
+    rerank_api_key: str = ""
+    rerank_api_base: str = "https://api.cohere.com"
+    rerank_max_candidates: int = 50
+    rerank_min_candidates: int = 10
+    rerank_score_gap: float = 0.3               # relative RRF drop; 0 = off
+    rerank_memo_ttl: float = 120.0              # seconds
+    rerank_batch_wait_ms: int = 5
+    rerank_fake_latency_ms: int = 0
 
-    # Google Cloud Tasks / worker settings
-    gcp_project_id: str
-    gcp_location: str
-    gcp_queue: str
-    worker_base_url: str
+    # External vector store the chunks are mirrored to ("qdrant",
+    # "memory" = in-process, "none"): points per upsert, estimated request
+    # bytes per upsert (Qdrant's default limit is 32 MiB), upserts in
+    # flight at once, attempts per request and first retry backoff (seconds)
+    vector_store_provider: str = "none"
+    vector_store_batch_points: int = 256
+    vector_store_batch_bytes: int = 8 * 1024 * 1024
+    vector_store_max_in_flight: int = 4
+    vector_store_max_attempts: int = 5
+    vector_store_retry_delay: float = 0.5
+    vector_store_fake_latency_ms: int = 0
 
     # Qdrant settings
     qdrant_url: str
     qdrant_api_key: str
+    qdrant_collection: str = "chunks"
 
     model_config = {"env_file": ".env"}
 
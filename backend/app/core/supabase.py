@@ -1,18 +1,39 @@
 """
-Supabase client singleton.
+Supabase client singletons.
 
 Uses the SERVICE ROLE key so the backend can:
   - Insert rows into the files table on behalf of any authenticated user.
   - Generate signed upload URLs for the storage bucket.
+
+Routes and the worker use the async client (``get_async_supabase``) so
+database and storage round trips never block the event loop. All of its
+sub-clients (PostgREST, Storage, Auth) share one pooled HTTP/2
+connection pool, which is also available for other Supabase-hosted
+fetches (e.g. signed URLs) via ``get_http_client``. The sync client is
+kept for code that already runs in a worker thread.
 """
 
-from supabase import create_client, Client
+import asyncio
+
+import httpx
+from supabase import (
+    AsyncClient,
+    AsyncClientOptions,
+    Client,
+    acreate_client,
+    create_client,
+)
+
 from app.core.config import get_settings
 
 _client: Client | None = None
+_async_client: AsyncClient | None = None
+_http_client: httpx.AsyncClient | None = None
+_async_client_lock = asyncio.Lock()
 
 
 def get_supabase() -> Client:
+    """Blocking client — only for code running off the event loop."""
     global _client
     if _client is None:
         settings = get_settings()
@@ -21,3 +42,43 @@ def get_supabase() -> Client:
             settings.supabase_service_role_key,
         )
     return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared pooled HTTP/2 client the async Supabase client runs on."""
+    global _http_client
+    if _http_client is None:
+        settings = get_settings()
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=settings.supabase_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.supabase_max_connections,
+                max_keepalive_connections=settings.supabase_max_keepalive,
+            ),
+        )
+    return _http_client
+
+
+async def get_async_supabase() -> AsyncClient:
+    global _async_client
+    if _async_client is None:
+        async with _async_client_lock:
+            if _async_client is None:
+                settings = get_settings()
+                _async_client = await acreate_client(
+                    settings.supabase_url,
+                    settings.supabase_service_role_key,
+                    options=AsyncClientOptions(httpx_client=get_http_client()),
+                )
+    return _async_client
+
+
+async def close_async_supabase() -> None:
+    """Close the shared connection pool (app shutdown)."""
+    global _async_client, _http_client
+    _async_client = None
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -2,18 +2,14 @@
 File download endpoints — signed URLs and bulk downloads.
 """
 
-import io
-import zipfile
-from pathlib import PurePosixPath
-
-import httpx
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 
 from app.core.config import get_settings
-from app.core.supabase import get_supabase
+from app.core.supabase import get_async_supabase, get_http_client
 from app.core.auth import get_current_user_id
+from app.services.archive import EmptyArchiveError, RemoteFile, stream_zip, unique_names
 
 router = APIRouter()
 
@@ -26,7 +22,7 @@ class SignedUrlResponse(BaseModel):
 
 
 class BulkDownloadRequest(BaseModel):
-    file_ids: list[str]
+    file_ids: list[str] = Field(max_length=1000)
 
 
 # ── Routes ───────────────────────────────────────────────────────────────────
@@ -42,10 +38,10 @@ async def get_signed_url(
     Uses the service-role client so RLS on storage doesn't block reads.
     """
     settings = get_settings()
-    supabase = get_supabase()
+    supabase = await get_async_supabase()
 
     # Look up the file, ensuring it belongs to the requesting user
-    result = (
+    result = await (
         supabase.table("files")
         .select("storage_path")
         .eq("id", file_id)
@@ -54,7 +50,7 @@ async def get_signed_url(
         .execute()
     )
 
-    if not result.data:
+    if not result or not result.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found",
@@ -63,7 +59,7 @@ async def get_signed_url(
     storage_path = result.data["storage_path"]
 
     try:
-        signed = supabase.storage.from_(
+        signed = await supabase.storage.from_(
             settings.supabase_storage_bucket
         ).create_signed_url(storage_path, 3600)  # 1 hour
     except Exception as exc:
@@ -89,8 +85,9 @@ async def bulk_download(
 ):
     """
     Download multiple files as a single ZIP archive.
-    Fetches each file from Supabase Storage via signed URLs,
-    bundles them into an in-memory ZIP, and streams it back.
+    Signs all storage paths in one call, then streams the archive while
+    the files are still being fetched (a few at a time), so memory stays
+    flat however large the archive gets.
     """
     if not body.file_ids:
         raise HTTPException(
@@ -99,10 +96,10 @@ async def bulk_download(
         )
 
     settings = get_settings()
-    supabase = get_supabase()
+    supabase = await get_async_supabase()
 
     # Look up all requested files (only those belonging to this user)
-    result = (
+    result = await (
         supabase.table("files")
         .select("id, original_name, storage_path")
         .in_("id", body.file_ids)
@@ -116,26 +113,32 @@ async def bulk_download(
             detail="No matching files found",
         )
 
-    # Generate signed download URLs for each file
-    files_to_download: list[dict] = []
-    for row in result.data:
-        storage_path = row["storage_path"]
-        if not storage_path or storage_path == "__pending__":
-            continue
+    rows = [
+        row for row in result.data
+        if row["storage_path"] and row["storage_path"] != "__pending__"
+    ]
 
+    # Generate signed download URLs for all files in one request
+    signed_urls: dict[str, str] = {}
+    if rows:
         try:
-            signed = supabase.storage.from_(
+            signed = await supabase.storage.from_(
                 settings.supabase_storage_bucket
-            ).create_signed_url(storage_path, 300)  # 5 min
-
-            signed_url = signed.get("signedURL") or signed.get("signedUrl")
-            if signed_url:
-                files_to_download.append({
-                    "name": row["original_name"],
-                    "url": signed_url,
-                })
+            ).create_signed_urls([row["storage_path"] for row in rows], 300)  # 5 min
+            for item in signed:
+                url = item.get("signedURL") or item.get("signedUrl")
+                if url and not item.get("error"):
+                    signed_urls[item["path"]] = url
         except Exception as exc:
-            print(f"Warning: failed to get signed URL for {row['id']}: {exc}")
+            print(f"Warning: failed to get signed URLs: {exc}")
+
+    files_to_download: list[tuple[str, str]] = []
+    for row in rows:
+        url = signed_urls.get(row["storage_path"])
+        if url:
+            files_to_download.append((row["original_name"], url))
+        else:
+            print(f"Warning: failed to get signed URL for {row['id']}")
 
     if not files_to_download:
         raise HTTPException(
@@ -143,44 +146,36 @@ async def bulk_download(
             detail="Could not generate download URLs for any of the requested files",
         )
 
-    # Download each file and add to ZIP archive
-    zip_buffer = io.BytesIO()
-
-    # Track names to avoid duplicates in the ZIP
-    used_names: dict[str, int] = {}
-
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        for file_info in files_to_download:
-            try:
-                resp = await client.get(file_info["url"])
-                resp.raise_for_status()
-
-                # Deduplicate file names inside the ZIP
-                name = file_info["name"]
-                if name in used_names:
-                    used_names[name] += 1
-                    stem = PurePosixPath(name).stem
-                    suffix = PurePosixPath(name).suffix
-                    name = f"{stem} ({used_names[name]}){suffix}"
-                else:
-                    used_names[name] = 0
-
-                with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED) as zf:
-                    zf.writestr(name, resp.content)
-
-            except Exception as exc:
-                print(f"Warning: failed to download '{file_info['name']}': {exc}")
-
-    zip_buffer.seek(0)
+    # Deduplicate file names inside the ZIP
+    names = unique_names([name for name, _ in files_to_download])
+    files = [
+        RemoteFile(name=name, url=url)
+        for name, (_, url) in zip(names, files_to_download)
+    ]
+
+    # Signed URLs point at Supabase Storage — reuse the pooled connections
+    archive = stream_zip(
+        get_http_client(),
+        files,
+        concurrency=settings.bulk_download_concurrency,
+    )
 
-    if zip_buffer.getbuffer().nbytes == 0:
+    # Wait for the first bytes so a total failure is still a proper error
+    try:
+        first = await anext(archive)
+    except EmptyArchiveError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to download any files",
         )
 
+    async def body_stream():
+        yield first
+        async for data in archive:
+            yield data
+
     return StreamingResponse(
-        zip_buffer,
+        body_stream(),
         media_type="application/zip",
         headers={
             "Content-Disposition": "attachment; filename=documents.zip",
@@ -0,0 +1,158 @@
+"""
+Highlight endpoints — locate cited snippets on the PDF page.
+"""
+
+import asyncio
+from dataclasses import asdict
+from typing import Literal
+
+from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.core.supabase import get_async_supabase
+from app.core.auth import get_current_user_id
+from app.services.pdf.highlight import TextIndex, get_highlight_service
+from app.services.pdf.processor import download_pdf_from_storage
+from app.services.search import get_dense_index
+from app.services.search.types import make_chunk_id
+
+router = APIRouter()
+
+
+# ── Request / Response schemas ───────────────────────────────────────────────
+
+
+class Citation(BaseModel):
+    text: str = Field(min_length=1)
+    page_num: int | None = None       # page to look on first
+    chunk_index: int | None = None    # chunk the snippet came from (fallback)
+
+
+class HighlightRequest(BaseModel):
+    citations: list[Citation] = Field(max_length=200)
+
+
+class HighlightRectModel(BaseModel):
+    page_num: int
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+class CitationHighlight(BaseModel):
+    text: str
+    match: Literal["exact", "chunk", "none"]
+    rects: list[HighlightRectModel]
+
+
+class HighlightResponse(BaseModel):
+    highlights: list[CitationHighlight]
+
+
+# ── Helpers ──────────────────────────────────────────────────────────────────
+
+
+async def _load_text_index(storage_path: str, digest: str | None) -> TextIndex:
+    """The file's text index, built from the PDF if missing."""
+    service = get_highlight_service()
+
+    if digest is not None:
+        index = await asyncio.to_thread(service.get_index, digest)
+        if index is not None:
+            return index
+
+    # Not indexed yet (ingested before highlight indexes, or before
+    # content hashes were recorded) — build it from the PDF once
+    with await download_pdf_from_storage(storage_path, digest) as pdf:
+        return await asyncio.to_thread(
+            service.get_index, digest or pdf.digest, lambda: pdf.source
+        )
+
+
+# ── Routes ───────────────────────────────────────────────────────────────────
+
+
+@router.post("/{file_id}/highlights", response_model=HighlightResponse)
+async def get_highlights(
+    file_id: str,
+    body: HighlightRequest,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Map cited snippets to rectangles on the page:
+      1. Look up the file row (ensuring ownership)
+      2. Search each snippet in the document's text index
+      3. Fall back to the bounding box of the cited chunk when there is
+         no exact match
+    """
+    supabase = await get_async_supabase()
+
+    # ── 1. Verify ownership ──────────────────────────────────────────────
+    result = await (
+        supabase.table("files")
+        .select("storage_path, content_hash, status")
+        .eq("id", file_id)
+        .eq("user_id", user_id)
+        .maybe_single()
+        .execute()
+    )
+
+    if not result or not result.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found",
+        )
+
+    if result.data["status"] != "processed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="File has not been processed yet",
+        )
+
+    # ── 2. Exact matches ─────────────────────────────────────────────────
+    try:
+        index = await _load_text_index(
+            result.data["storage_path"], result.data.get("content_hash")
+        )
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to load text index: {exc}",
+        )
+
+    matches = [index.find(c.text, page_num=c.page_num) for c in body.citations]
+
+    # ── 3. Chunk bounding-box fallback ───────────────────────────────────
+    fallback_ids = {
+        i: make_chunk_id(file_id, c.chunk_index)
+        for i, (c, rects) in enumerate(zip(body.citations, matches))
+        if rects is None and c.chunk_index is not None
+    }
+    chunks = {}
+    if fallback_ids:
+        chunks = await asyncio.to_thread(
+            get_dense_index().get_metadata, user_id, list(fallback_ids.values())
+        )
+
+    highlights = []
+    for i, (citation, rects) in enumerate(zip(body.citations, matches)):
+        if rects is not None:
+            highlights.append(CitationHighlight(
+                text=citation.text,
+                match="exact",
+                rects=[HighlightRectModel(**asdict(r)) for r in rects],
+            ))
+            continue
+
+        chunk = chunks.get(fallback_ids.get(i))
+        if chunk is not None:
+            highlights.append(CitationHighlight(
+                text=citation.text,
+                match="chunk",
+                rects=[HighlightRectModel(page_num=chunk["page_num"], **chunk["bounding_box"])],
+            ))
+        else:
+            highlights.append(CitationHighlight(text=citation.text, match="none", rects=[]))
+
+    return HighlightResponse(highlights=highlights)
@@ -2,12 +2,21 @@
 File management endpoints — delete files and metadata.
 """
 
-from pydantic import BaseModel
+import asyncio
+
+from pydantic import BaseModel, Field
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.core.config import get_settings
-from app.core.supabase import get_supabase
+from app.core.supabase import get_async_supabase
 from app.core.auth import get_current_user_id
+from app.services.search import (
+    delete_file_from_indexes,
+    delete_files_from_indexes,
+    delete_files_from_vector_store,
+)
+from app.services.pdf.pipeline import batched
+from app.services.storage import remove_objects
 
 router = APIRouter()
 
@@ -19,6 +28,21 @@ class DeleteFileResponse(BaseModel):
     deleted: bool
 
 
+class BulkDeleteRequest(BaseModel):
+    file_ids: list[str] = Field(min_length=1, max_length=1000)
+
+
+class BulkDeleteResult(BaseModel):
+    file_id: str
+    deleted: bool
+    error: str | None = None
+
+
+class BulkDeleteResponse(BaseModel):
+    deleted: int
+    results: list[BulkDeleteResult]
+
+
 # ── Routes ───────────────────────────────────────────────────────────────────
 
 
@@ -33,12 +57,13 @@ async def delete_file(
       2. Remove the object from Supabase Storage
       3. Delete junction rows (project_documents, file_tags)
       4. Delete the file record itself
+      5. Drop its chunks from the search indexes (and cached results)
     """
     settings = get_settings()
-    supabase = get_supabase()
+    supabase = await get_async_supabase()
 
     # ── 1. Verify ownership and get storage path ─────────────────────────
-    result = (
+    result = await (
         supabase.table("files")
         .select("storage_path")
         .eq("id", file_id)
@@ -47,7 +72,7 @@ async def delete_file(
         .execute()
     )
 
-    if not result.data:
+    if not result or not result.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found",
@@ -58,7 +83,7 @@ async def delete_file(
     # ── 2. Remove from Supabase Storage ──────────────────────────────────
     if storage_path and storage_path != "__pending__":
         try:
-            supabase.storage.from_(
+            await supabase.storage.from_(
                 settings.supabase_storage_bucket
             ).remove([storage_path])
         except Exception as exc:
@@ -66,11 +91,11 @@ async def delete_file(
             print(f"Warning: failed to remove storage object '{storage_path}': {exc}")
 
     # ── 3. Delete junction rows ──────────────────────────────────────────
-    supabase.table("project_documents").delete().eq("file_id", file_id).execute()
-    supabase.table("file_tags").delete().eq("file_id", file_id).execute()
+    await supabase.table("project_documents").delete().eq("file_id", file_id).execute()
+    await supabase.table("file_tags").delete().eq("file_id", file_id).execute()
 
     # ── 4. Delete the file record ────────────────────────────────────────
-    delete_result = (
+    delete_result = await (
         supabase.table("files")
         .delete()
         .eq("id", file_id)
@@ -84,4 +109,118 @@ async def delete_file(
             detail="Failed to delete file record",
         )
 
+    # ── 5. Remove from search indexes ────────────────────────────────────
+    await asyncio.to_thread(delete_file_from_indexes, user_id, file_id)
+    try:
+        await delete_files_from_vector_store(user_id, [file_id])
+    except Exception as exc:
+        print(f"Warning: failed to delete vectors of {file_id}: {exc}")
+
     return DeleteFileResponse(deleted=True)
+
+
+@router.post("/bulk-delete", response_model=BulkDeleteResponse)
+async def bulk_delete_files(
+    body: BulkDeleteRequest,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Permanently delete many files with a handful of round trips:
+      1. Look up all rows at once (ensuring ownership)
+      2. Remove the storage objects in batched calls
+      3. Delete junction rows and file records with ``in_()`` filters
+      4. Drop their chunks from the search indexes in one pass
+
+    Returns a result per requested id; ids that don't exist or belong to
+    another user are reported as not found.
+    """
+    settings = get_settings()
+    supabase = await get_async_supabase()
+    file_ids = list(dict.fromkeys(body.file_ids))
+    batches = list(batched(file_ids, settings.db_in_filter_batch_size))
+
+    # ── 1. Verify ownership and get storage paths ────────────────────────
+    lookups = await asyncio.gather(*(
+        supabase.table("files")
+        .select("id, storage_path")
+        .in_("id", batch)
+        .eq("user_id", user_id)
+        .execute()
+        for batch in batches
+    ))
+    storage_paths = {
+        row["id"]: row["storage_path"]
+        for lookup in lookups
+        for row in (lookup.data or [])
+    }
+    owned = [file_id for file_id in file_ids if file_id in storage_paths]
+
+    # ── 2. Remove from Supabase Storage ──────────────────────────────────
+    # Failures are logged but don't block deletion, as for a single file
+    paths = [
+        path for path in storage_paths.values()
+        if path and path != "__pending__"
+    ]
+    if paths:
+        await remove_objects(
+            supabase.storage,
+            settings.supabase_storage_bucket,
+            paths,
+            batch_size=settings.storage_remove_batch_size,
+            concurrency=settings.storage_remove_concurrency,
+        )
+
+    # ── 3. Delete junction rows, then the file records ───────────────────
+    owned_batches = list(batched(owned, settings.db_in_filter_batch_size))
+    await asyncio.gather(*(
+        supabase.table(table).delete().in_("file_id", batch).execute()
+        for table in ("project_documents", "file_tags")
+        for batch in owned_batches
+    ))
+
+    async def delete_records(batch: list[str]) -> list[str]:
+        result = await (
+            supabase.table("files")
+            .delete()
+            .in_("id", batch)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return [row["id"] for row in (result.data or [])]
+
+    outcomes = await asyncio.gather(
+        *(delete_records(batch) for batch in owned_batches),
+        return_exceptions=True,
+    )
+
+    deleted: set[str] = set()
+    errors: dict[str, str] = {}
+    for batch, outcome in zip(owned_batches, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Warning: failed to delete {len(batch)} file records: {outcome}")
+            errors.update(dict.fromkeys(batch, "Failed to delete file record"))
+        else:
+            deleted.update(outcome)
+
+    # ── 4. Remove from search indexes ────────────────────────────────────
+    if deleted:
+        await asyncio.to_thread(delete_files_from_indexes, user_id, list(deleted))
+        try:
+            await delete_files_from_vector_store(user_id, list(deleted))
+        except Exception as exc:
+            print(f"Warning: failed to delete vectors of {len(deleted)} files: {exc}")
+
+    results = []
+    for file_id in file_ids:
+        if file_id in deleted:
+            results.append(BulkDeleteResult(file_id=file_id, deleted=True))
+        elif file_id not in storage_paths:
+            results.append(BulkDeleteResult(file_id=file_id, deleted=False, error="File not found"))
+        else:
+            results.append(BulkDeleteResult(
+                file_id=file_id,
+                deleted=False,
+                error=errors.get(file_id, "Failed to delete file record"),
+            ))
+
+    return BulkDeleteResponse(deleted=len(deleted), results=results)
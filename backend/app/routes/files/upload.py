@@ -1,15 +1,20 @@
 """
-File upload endpoints — initiate and confirm uploads.
+File upload endpoints — initiate and confirm uploads, replace a file
+with a revised version.
 """
 
+import asyncio
+import uuid
 from pathlib import PurePosixPath
-from pydantic import BaseModel
+
+from pydantic import BaseModel, Field
 from fastapi import APIRouter, Depends, HTTPException, status
+from storage3.types import CreateSignedUploadUrlOptions
 
 from app.core.config import get_settings
-from app.core.supabase import get_supabase
+from app.core.supabase import get_async_supabase
 from app.core.auth import get_current_user_id
-from app.services.tasks import enqueue_pdf_job
+from app.services.tasks import enqueue_pdf_jobs
 
 router = APIRouter()
 
@@ -25,7 +30,7 @@ class FileEntry(BaseModel):
 
 
 class InitiateUploadRequest(BaseModel):
-    files: list[FileEntry]
+    files: list[FileEntry] = Field(max_length=1000)
     is_global: bool = False
 
 
@@ -40,6 +45,14 @@ class InitiateUploadResponse(BaseModel):
     uploads: list[SignedUploadTarget]
 
 
+class ReplaceUploadRequest(BaseModel):
+    size: int           # bytes of the revised version
+
+
+class ReplaceUploadResponse(SignedUploadTarget):
+    version: int
+
+
 class ConfirmUploadRequest(BaseModel):
     file_ids: list[str]
 
@@ -58,9 +71,12 @@ async def initiate_upload(
 ):
     """
     Step 1 — For every file the client wants to upload:
-      • Insert a row into `files` with status = 'pending_upload'
       • Generate a signed upload URL pointing at Supabase Storage
+        (concurrently, at most `signed_url_concurrency` at a time)
+      • Insert a row into `files` with status = 'pending_upload'
+        (all rows in one insert, ids and storage paths generated here)
       • Return the list so the frontend can upload directly.
+    URLs are signed first, so a signing failure leaves no rows behind.
     """
     if not body.files:
         raise HTTPException(
@@ -69,25 +85,49 @@ async def initiate_upload(
         )
 
     settings = get_settings()
-    supabase = get_supabase()
-    uploads: list[SignedUploadTarget] = []
-
-    # Insert with a placeholder storage_path — we'll update it with the
-    # real UUID-based path once we know each row's generated id.
-    rows = [
-        {
+    supabase = await get_async_supabase()
+
+    # Ids and storage paths are generated here, so every row is created
+    # complete in a single insert — no placeholder path to patch later.
+    rows = []
+    for f in body.files:
+        file_id = str(uuid.uuid4())
+        suffix = PurePosixPath(f.name).suffix or ".pdf"
+        rows.append({
+            "id": file_id,
             "user_id": user_id,
             "original_name": f.name,
-            "storage_path": "__pending__",
+            "storage_path": f"{user_id}/{file_id}{suffix}",
             "file_size": f.size,
             "mime_type": f.mime_type,
             "status": "pending_upload",
             "is_global": body.is_global,
-        }
-        for f in body.files
-    ]
+        })
+
+    # Mint the signed upload URLs concurrently, bounded so a large folder
+    # drop doesn't open hundreds of requests to Storage at once. Signing
+    # needs only the paths; an unused URL just expires.
+    bucket = supabase.storage.from_(settings.supabase_storage_bucket)
+    slots = asyncio.Semaphore(settings.signed_url_concurrency)
+
+    async def sign(row: dict) -> SignedUploadTarget:
+        async with slots:
+            signed = await bucket.create_signed_upload_url(row["storage_path"])
+        return SignedUploadTarget(
+            file_id=row["id"],
+            storage_path=row["storage_path"],
+            token=signed["token"],
+        )
 
-    result = supabase.table("files").insert(rows).execute()
+    try:
+        uploads = await asyncio.gather(*(sign(row) for row in rows))
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create signed upload URLs: {exc}",
+        )
+
+    result = await supabase.table("files").insert(rows).execute()
 
     if not result.data:
         raise HTTPException(
@@ -95,30 +135,92 @@ async def initiate_upload(
             detail="Failed to create file records",
         )
 
-    # Build safe storage paths and generate signed upload URLs
-    for row, file_entry in zip(result.data, body.files):
-        file_id = row["id"]
-        suffix = PurePosixPath(file_entry.name).suffix or ".pdf"
-        storage_path = f"{user_id}/{file_id}{suffix}"
+    return InitiateUploadResponse(uploads=uploads)
+
+
+@router.post("/{file_id}/replace", response_model=ReplaceUploadResponse)
+async def replace_upload(
+    file_id: str,
+    body: ReplaceUploadRequest,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Step 1 for a revised version of an existing file:
+      • Sign an upload URL that overwrites the stored PDF in place
+      • Flip the row back to 'pending_upload' and bump its `version`
+      • Return the URL
+    The client then uploads and calls `/confirm-upload` as usual. The
+    file keeps its id, and re-ingestion only embeds and indexes the
+    chunks that changed.
+    """
+    settings = get_settings()
+    supabase = await get_async_supabase()
+
+    result = await (
+        supabase.table("files")
+        .select("storage_path, status, version")
+        .eq("id", file_id)
+        .eq("user_id", user_id)
+        .maybe_single()
+        .execute()
+    )
+
+    # maybe_single() yields no response at all when nothing matched
+    if result is None or not result.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found",
+        )
+
+    # Overwriting the bytes under a running job would mix two versions
+    if result.data["status"] in ("uploaded", "queued", "processing"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="File is still being processed",
+        )
 
-        # Persist the real storage path
-        supabase.table("files").update(
-            {"storage_path": storage_path}
-        ).eq("id", file_id).execute()
+    storage_path = result.data["storage_path"]
+    version = (result.data.get("version") or 1) + 1
 
-        signed = supabase.storage.from_(
+    # Signed before the row changes, so a failure leaves the file as it was
+    try:
+        signed = await supabase.storage.from_(
             settings.supabase_storage_bucket
-        ).create_signed_upload_url(storage_path)
-
-        uploads.append(
-            SignedUploadTarget(
-                file_id=file_id,
-                storage_path=storage_path,
-                token=signed["token"],
-            )
+        ).create_signed_upload_url(
+            storage_path, CreateSignedUploadUrlOptions(upsert="true")
+        )
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create signed upload URL: {exc}",
         )
 
-    return InitiateUploadResponse(uploads=uploads)
+    update = await (
+        supabase.table("files")
+        .update({
+            "status": "pending_upload",
+            "file_size": body.size,
+            "version": version,
+            "error_message": None,
+        })
+        .eq("id", file_id)
+        .eq("user_id", user_id)
+        .eq("status", result.data["status"])
+        .execute()
+    )
+
+    if not update.data:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="File changed while preparing the replacement",
+        )
+
+    return ReplaceUploadResponse(
+        file_id=file_id,
+        storage_path=storage_path,
+        token=signed["token"],
+        version=version,
+    )
 
 
 @router.post("/confirm-upload", response_model=ConfirmUploadResponse)
@@ -137,10 +239,10 @@ async def confirm_upload(
             detail="No file IDs provided",
         )
 
-    supabase = get_supabase()
+    supabase = await get_async_supabase()
 
     # Only update rows that belong to this user and are still pending
-    result = (
+    result = await (
         supabase.table("files")
         .update({"status": "uploaded"})
         .in_("id", body.file_ids)
@@ -151,13 +253,14 @@ async def confirm_upload(
 
     confirmed_ids = [row["id"] for row in (result.data or [])]
 
-    # Enqueue each confirmed file for PDF processing
-    for file_id in confirmed_ids:
-        try:
-            enqueue_pdf_job(file_id)
-        except Exception as exc:
-            # Log but don't block the response — the file is uploaded,
-            # it can be retried or picked up by a sweep later.
-            print(f"Warning: failed to enqueue task for {file_id}: {exc}")
+    # Enqueue all confirmed files for PDF processing in one batch.
+    # Log but don't block the response — the files are uploaded,
+    # they can be retried or picked up by a sweep later.
+    try:
+        accepted = await enqueue_pdf_jobs(confirmed_ids, user_id)
+        for file_id in set(confirmed_ids) - set(accepted):
+            print(f"Warning: failed to enqueue task for {file_id}")
+    except Exception as exc:
+        print(f"Warning: failed to enqueue tasks for {confirmed_ids}: {exc}")
 
     return ConfirmUploadResponse(confirmed=confirmed_ids)
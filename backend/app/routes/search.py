@@ -0,0 +1,147 @@
+"""
+Search endpoints — hybrid retrieval over the user's own documents.
+
+POST /search               — dense + BM25 + RRF + rerank, with optional
+                             per-stage debug
+GET  /search/cache-stats   — hit/miss/eviction counters of the result cache
+GET  /search/rerank-stats  — call/coalescing/memo counters of the reranker
+"""
+
+import asyncio
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+
+from app.core.auth import get_current_user_id
+from app.services.search import (
+    get_dense_index,
+    get_query_cache,
+    get_reranker_client,
+    search_documents,
+)
+from app.services.search.types import SearchHits
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+# ── Request / Response schemas ───────────────────────────────────────────────
+
+
+class SearchRequest(BaseModel):
+    query: str = Field(min_length=1, max_length=2000)
+    file_ids: list[str] | None = None  # None = all of the user's files
+    top_k: int = Field(default=10, ge=1, le=100)
+    rerank: bool = True
+    debug: bool = False
+
+
+class BoundingBox(BaseModel):
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+class SearchResultItem(BaseModel):
+    chunk_id: str
+    score: float
+    text: str
+    title: str
+    file_id: str
+    page_num: int
+    chunk_index: int
+    bounding_box: BoundingBox
+
+
+class StageHit(BaseModel):
+    chunk_id: str
+    score: float
+
+
+class SearchDebug(BaseModel):
+    """Per-stage results for the "Show Reasoning" view."""
+    dense: list[StageHit]
+    sparse: list[StageHit]
+    fusion: list[dict]
+    reranked: list[StageHit] | None = None
+
+
+class SearchResponse(BaseModel):
+    results: list[SearchResultItem]
+    cached: bool
+    debug: SearchDebug | None = None
+
+
+# ── Helpers ──────────────────────────────────────────────────────────────────
+
+
+def _stage_hits(hits: SearchHits) -> list[StageHit]:
+    return [
+        StageHit(chunk_id=chunk_id, score=float(score))
+        for chunk_id, score in zip(hits.ids.tolist(), hits.scores.tolist())
+    ]
+
+
+# ── Routes ───────────────────────────────────────────────────────────────────
+
+
+@router.post("", response_model=SearchResponse)
+async def search(
+    body: SearchRequest,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Search the user's documents:
+      1. Embed the query and run dense + BM25 retrieval
+      2. Fuse both rankings with Reciprocal Rank Fusion
+      3. Rerank the fused candidates (unless disabled)
+      4. Attach chunk metadata (text, page, bounding box) to the top hits
+    """
+    result = await search_documents(
+        user_id,
+        body.query,
+        file_ids=body.file_ids,
+        top_k=body.top_k,
+        rerank=body.rerank,
+    )
+
+    final = result.final
+    chunk_ids = final.ids.tolist()
+    metadata = await asyncio.to_thread(
+        get_dense_index().get_metadata, user_id, chunk_ids
+    )
+
+    results = [
+        SearchResultItem(chunk_id=chunk_id, score=float(score), **metadata[chunk_id])
+        for chunk_id, score in zip(chunk_ids, final.scores.tolist())
+        # A chunk can vanish between search and lookup if its file was deleted
+        if chunk_id in metadata
+    ]
+
+    debug = None
+    if body.debug:
+        debug = SearchDebug(
+            dense=_stage_hits(result.dense),
+            sparse=_stage_hits(result.sparse),
+            fusion=[result.fused.explain(i) for i in range(len(result.fused))],
+            reranked=_stage_hits(result.reranked) if result.reranked is not None else None,
+        )
+
+    return SearchResponse(results=results, cached=result.cached, debug=debug)
+
+
+@router.get("/cache-stats")
+async def cache_stats(
+    user_id: str = Depends(get_current_user_id),
+):
+    """Hit/miss/eviction counters per cache tier."""
+    return get_query_cache().stats()
+
+
+@router.get("/rerank-stats")
+async def rerank_stats(
+    user_id: str = Depends(get_current_user_id),
+):
+    """Call, coalescing and memo counters of the reranker client."""
+    reranker = get_reranker_client()
+    return reranker.metrics.snapshot() if reranker is not None else {}
@@ -1,125 +1,73 @@
 """
 User account management routes.
 
-DELETE /users/me  — Permanently delete the authenticated user and ALL
-                    associated data (storage objects, files, tags, projects,
-                    chat sessions, messages, then the auth.users row).
+DELETE /users/me           — Start permanently deleting the authenticated
+                             user and ALL associated data (storage objects,
+                             files, tags, projects, chat sessions, messages,
+                             search indexes, then the auth.users row).
+GET    /users/me/deletion  — Progress of that deletion job.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 
-from app.core.config import get_settings
-from app.core.supabase import get_supabase
 from app.core.auth import get_current_user_id
+from app.services.account_deletion import AccountDeletionJob, get_account_deletion_jobs
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 class DeleteAccountResponse(BaseModel):
     detail: str
-
-
-@router.delete("/me", response_model=DeleteAccountResponse)
+    job_id: str
+    status: str
+    stage: str | None
+    storage_objects_found: int
+    storage_objects_removed: int
+    files_deleted: int
+    error: str | None
+
+
+def _job_response(job: AccountDeletionJob, detail: str) -> DeleteAccountResponse:
+    return DeleteAccountResponse(
+        detail=detail,
+        job_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        storage_objects_found=job.storage_objects_found,
+        storage_objects_removed=job.storage_objects_removed,
+        files_deleted=job.files_deleted,
+        error=job.error,
+    )
+
+
+@router.delete(
+    "/me",
+    response_model=DeleteAccountResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def delete_account(
     user_id: str = Depends(get_current_user_id),
 ):
     """
-    Permanently delete the current user and **all** associated data:
-
-    1. Remove every file from Supabase Storage (`pdfs` bucket)
-    2. Delete DB rows in dependency order:
-       file_tags → tags → messages → chat_sessions →
-       project_documents → projects → files
-    3. Delete the auth.users row via the Admin API
+    Start deleting the current user and **all** associated data in the
+    background (see ``app.services.account_deletion``). Returns right away;
+    poll ``GET /users/me/deletion`` for progress. Calling this again while
+    a job runs returns that job; after a failure it starts a new one.
     """
-    settings = get_settings()
-    supabase = get_supabase()
-
-    try:
-        # ── 1. Delete storage objects ────────────────────────────────────
-        # List all objects under the user's folder in the storage bucket
-        try:
-            objects = supabase.storage.from_(
-                settings.supabase_storage_bucket
-            ).list(path=user_id)
-
-            if objects:
-                paths = [f"{user_id}/{obj['name']}" for obj in objects]
-                supabase.storage.from_(
-                    settings.supabase_storage_bucket
-                ).remove(paths)
-        except Exception:
-            # Storage might already be empty — continue
-            pass
-
-        # ── 2. Delete database rows (order matters for FK constraints) ───
-
-        # file_tags (depends on files + tags)
-        file_ids_result = (
-            supabase.table("files")
-            .select("id")
-            .eq("user_id", user_id)
-            .execute()
-        )
-        file_ids = [r["id"] for r in (file_ids_result.data or [])]
-
-        if file_ids:
-            supabase.table("file_tags").delete().in_(
-                "file_id", file_ids
-            ).execute()
-
-        # tags
-        supabase.table("tags").delete().eq("user_id", user_id).execute()
-
-        # messages (via chat_sessions)
-        chat_ids_result = (
-            supabase.table("chat_sessions")
-            .select("id")
-            .eq("user_id", user_id)
-            .execute()
-        )
-        chat_ids = [r["id"] for r in (chat_ids_result.data or [])]
-
-        if chat_ids:
-            supabase.table("messages").delete().in_(
-                "chat_id", chat_ids
-            ).execute()
-
-        # chat_sessions
-        supabase.table("chat_sessions").delete().eq(
-            "user_id", user_id
-        ).execute()
-
-        # project_documents (via projects)
-        project_ids_result = (
-            supabase.table("projects")
-            .select("id")
-            .eq("user_id", user_id)
-            .execute()
-        )
-        project_ids = [r["id"] for r in (project_ids_result.data or [])]
-
-        if project_ids:
-            supabase.table("project_documents").delete().in_(
-                "project_id", project_ids
-            ).execute()
+    job = get_account_deletion_jobs().start(user_id)
+    return _job_response(job, "Account deletion started")
 
-        # projects
-        supabase.table("projects").delete().eq(
-            "user_id", user_id
-        ).execute()
 
-        # files
-        supabase.table("files").delete().eq("user_id", user_id).execute()
-
-        # ── 3. Delete the auth user ──────────────────────────────────────
-        supabase.auth.admin.delete_user(user_id)
-
-    except Exception as exc:
+@router.get("/me/deletion", response_model=DeleteAccountResponse)
+async def get_account_deletion(
+    user_id: str = Depends(get_current_user_id),
+):
+    """Status and progress of the current user's account deletion."""
+    job = get_account_deletion_jobs().get(user_id)
+    if job is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to delete account: {exc}",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No account deletion in progress",
         )
-
-    return DeleteAccountResponse(detail="Account deleted successfully")
+    return _job_response(job, f"Account deletion {job.status}")
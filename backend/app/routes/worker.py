@@ -9,7 +9,7 @@ import logging
 from pydantic import BaseModel
 from fastapi import APIRouter, HTTPException, status
 
-from app.services.pdf.processor import process_pdf_document
+from app.services.pdf.processor import DocumentProcessingError, process_pdf_document
 
 router = APIRouter(prefix="/worker", tags=["worker"])
 logger = logging.getLogger(__name__)
@@ -38,8 +38,16 @@ async def process_pdf(body: ProcessPdfRequest):
       5. Store in vector database
       6. Update file status to 'processed' or 'failed'
     
-    This endpoint is designed to be idempotent — if called multiple times
-    with the same file_id, it should handle gracefully.
+    This endpoint is idempotent — calling it again with the same file_id
+    resumes from the last checkpointed batch of a failed attempt (or
+    diffs against what's already indexed), and chunk ids are
+    deterministic, so re-stored chunks overwrite themselves.
+    
+    Transient failures answer 500 so Cloud Tasks retries them under the
+    queue's retry policy. Permanent ones (the file row or object is gone,
+    the PDF can't be parsed) answer 200 with ``success`` false, since a
+    retry would fail the same way. The file row is marked 'failed' either
+    way.
     """
     file_id = body.file_id
     
@@ -57,13 +65,27 @@ async def process_pdf(body: ProcessPdfRequest):
             message="Document processed successfully"
         )
         
-    except Exception as exc:
-        logger.error(f"Failed to process file_id={file_id}: {exc}", exc_info=True)
+    except DocumentProcessingError as exc:
+        if exc.retryable:
+            logger.error(f"Failed to process file_id={file_id}: {exc}", exc_info=True)
+            # Cloud Tasks retries on 5xx; a retry picks up from the checkpoint
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Processing failed: {str(exc)}"
+            )
         
-        # Don't raise HTTP exception — Cloud Tasks will retry on 5xx
-        # Instead, return 200 with success=False to acknowledge receipt
+        logger.warning(f"Not retrying file_id={file_id}: {exc}")
         return ProcessPdfResponse(
             success=False,
             file_id=file_id,
-            message=f"Processing failed: {str(exc)}"
+            message=str(exc)
+        )
+        
+    except Exception as exc:
+        logger.error(f"Failed to process file_id={file_id}: {exc}", exc_info=True)
+        
+        # Cloud Tasks retries on 5xx; a retry picks up from the checkpoint
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Processing failed: {str(exc)}"
         )
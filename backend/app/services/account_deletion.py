@@ -0,0 +1,197 @@
+"""
+Account deletion jobs.
+
+Deleting an account with tens of thousands of documents takes far longer
+than an HTTP request should, so ``DELETE /users/me`` starts a background
+job and returns; progress is polled via ``GET /users/me/deletion``.
+
+A job runs these stages, each safe to repeat:
+
+  1. storage  — list every object under the user's folder (all pages) and
+                remove them in concurrent batches
+  2. database — delete the user's files in chunks (junction rows cascade),
+                then tags, projects and chat sessions (messages cascade)
+  3. indexes  — drop the user's search indexes, cached results and vectors
+  4. auth     — delete the auth.users row via the Admin API
+
+Jobs live in the process that started them. If a job fails (or the
+process restarts), deleting the account again starts a fresh job that
+picks up whatever is left.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from app.core.config import get_settings
+from app.core.supabase import get_async_supabase
+from app.services.search import delete_user_from_indexes, delete_user_from_vector_store
+from app.services.pdf.pipeline import batched
+from app.services.storage import list_object_paths, remove_objects
+
+logger = logging.getLogger(__name__)
+
+# File ids fetched per page while deleting rows
+_FILE_PAGE_SIZE = 1000
+
+
+@dataclass
+class AccountDeletionJob:
+    user_id: str
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "pending"          # pending | running | completed | failed
+    stage: str | None = None         # storage | database | indexes | auth
+    storage_objects_found: int = 0
+    storage_objects_removed: int = 0
+    files_deleted: int = 0
+    error: str | None = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("pending", "running")
+
+
+async def _delete_storage(job: AccountDeletionJob) -> None:
+    settings = get_settings()
+    supabase = await get_async_supabase()
+
+    paths = await list_object_paths(
+        supabase.storage, settings.supabase_storage_bucket, job.user_id
+    )
+    job.storage_objects_found = len(paths)
+
+    def on_removed(count: int) -> None:
+        job.storage_objects_removed += count
+
+    failed = await remove_objects(
+        supabase.storage,
+        settings.supabase_storage_bucket,
+        paths,
+        batch_size=settings.storage_remove_batch_size,
+        concurrency=settings.storage_remove_concurrency,
+        on_removed=on_removed,
+    )
+    if failed:
+        raise RuntimeError(f"Failed to remove {len(failed)} storage objects")
+
+
+async def _delete_rows(job: AccountDeletionJob) -> None:
+    settings = get_settings()
+    supabase = await get_async_supabase()
+
+    async def delete_files(file_ids: list[str]) -> None:
+        await (
+            supabase.table("files")
+            .delete()
+            .eq("user_id", job.user_id)
+            .in_("id", file_ids)
+            .execute()
+        )
+        job.files_deleted += len(file_ids)
+
+    # Deleted rows drop out of the next page, so always read the first one
+    while True:
+        page = await (
+            supabase.table("files")
+            .select("id")
+            .eq("user_id", job.user_id)
+            .limit(_FILE_PAGE_SIZE)
+            .execute()
+        )
+        file_ids = [r["id"] for r in (page.data or [])]
+        if not file_ids:
+            break
+        await asyncio.gather(*(
+            delete_files(chunk)
+            for chunk in batched(file_ids, settings.db_in_filter_batch_size)
+        ))
+
+    # file_tags, project_documents and messages cascade from their parents
+    await asyncio.gather(*(
+        supabase.table(table).delete().eq("user_id", job.user_id).execute()
+        for table in ("tags", "chat_sessions", "projects")
+    ))
+
+
+async def run_account_deletion(job: AccountDeletionJob) -> None:
+    """Run (or resume) a deletion job, recording progress on ``job``."""
+    job.status = "running"
+    try:
+        job.stage = "storage"
+        await _delete_storage(job)
+
+        job.stage = "database"
+        await _delete_rows(job)
+
+        job.stage = "indexes"
+        await asyncio.to_thread(delete_user_from_indexes, job.user_id)
+        await delete_user_from_vector_store(job.user_id)
+
+        job.stage = "auth"
+        supabase = await get_async_supabase()
+        await supabase.auth.admin.delete_user(job.user_id)
+
+        job.status = "completed"
+        logger.info(
+            f"[{job.user_id}] Account deleted: {job.storage_objects_removed} "
+            f"objects, {job.files_deleted} files"
+        )
+    except asyncio.CancelledError:
+        job.status = "failed"
+        job.error = "Interrupted by shutdown"
+        raise
+    except Exception as exc:
+        job.status = "failed"
+        job.error = str(exc)
+        logger.error(f"[{job.user_id}] Account deletion failed at {job.stage}: {exc}")
+    finally:
+        job.finished_at = time.time()
+
+
+class AccountDeletionJobs:
+    """The latest deletion job per user, and the tasks running them."""
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, AccountDeletionJob] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def start(self, user_id: str) -> AccountDeletionJob:
+        """Start a job for ``user_id``, or return the one already running."""
+        job = self._jobs.get(user_id)
+        if job is not None and job.active:
+            return job
+
+        job = AccountDeletionJob(user_id=user_id)
+        self._jobs[user_id] = job
+        task = asyncio.create_task(run_account_deletion(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, user_id: str) -> AccountDeletionJob | None:
+        return self._jobs.get(user_id)
+
+    async def aclose(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_jobs: AccountDeletionJobs | None = None
+
+
+def get_account_deletion_jobs() -> AccountDeletionJobs:
+    global _jobs
+    if _jobs is None:
+        _jobs = AccountDeletionJobs()
+    return _jobs
+
+
+async def close_account_deletion_jobs() -> None:
+    if _jobs is not None:
+        await _jobs.aclose()
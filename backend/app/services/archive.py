@@ -0,0 +1,163 @@
+"""
+Streaming ZIP archives of files fetched over HTTP.
+
+The archive is written to a non-seekable sink, so ``zipfile`` emits each
+entry's local header up front and its CRC/sizes in a trailing data
+descriptor. Bytes are handed to the response as soon as they are written;
+nothing is buffered beyond a few chunks per in-flight file:
+
+  - up to ``concurrency`` files are fetched at once, each into a bounded
+    chunk queue, in archive order
+  - the writer drains the files one after another, copying chunks into
+    the current entry and yielding whatever the archive produced
+
+Entries are stored, not deflated — PDFs are already compressed, and
+store-only keeps the writer at memcpy + CRC speed.
+"""
+
+import asyncio
+import logging
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import AsyncIterator
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+
+_END = object()
+
+
+class EmptyArchiveError(Exception):
+    """None of the files could be fetched."""
+    pass
+
+
+@dataclass(slots=True)
+class RemoteFile:
+    name: str   # name inside the archive
+    url: str
+
+
+class _Sink:
+    """Write-only buffer that ``zipfile`` treats as an unseekable stream."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def unique_names(names: list[str]) -> list[str]:
+    """Suffix repeated names — ``a.pdf``, ``a (1).pdf``, ``a (2).pdf``."""
+    used: dict[str, int] = {}
+    result = []
+    for name in names:
+        if name in used:
+            used[name] += 1
+            path = PurePosixPath(name)
+            result.append(f"{path.stem} ({used[name]}){path.suffix}")
+        else:
+            used[name] = 0
+            result.append(name)
+    return result
+
+
+async def _fetch(
+    client: httpx.AsyncClient,
+    url: str,
+    chunks: asyncio.Queue,
+    timeout: float,
+) -> None:
+    """Stream ``url`` into ``chunks``: the size (or None), the body, then _END.
+    An exception is queued in place of whatever could not be produced."""
+    try:
+        async with client.stream("GET", url, timeout=timeout) as resp:
+            resp.raise_for_status()
+            length = resp.headers.get("Content-Length")
+            await chunks.put(int(length) if length else None)
+            async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                await chunks.put(chunk)
+        await chunks.put(_END)
+    except Exception as exc:
+        await chunks.put(exc)
+
+
+async def stream_zip(
+    client: httpx.AsyncClient,
+    files: list[RemoteFile],
+    concurrency: int = 8,
+    prefetch_chunks: int = 4,
+    timeout: float = 60.0,
+) -> AsyncIterator[bytes]:
+    """
+    Yield a ZIP archive of ``files`` as it is built.
+
+    Files that fail before their first byte are skipped with a warning. A
+    failure mid-file aborts the stream — the entry's header is already out.
+
+    Raises:
+        EmptyArchiveError: Before anything is yielded, if every file failed
+    """
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED)
+    queues: list[asyncio.Queue | None] = []
+    tasks: list[asyncio.Task] = []
+    written = 0
+    date_time = time.localtime()[:6]
+
+    def start(i: int) -> None:
+        queue = asyncio.Queue(maxsize=prefetch_chunks)
+        queues.append(queue)
+        tasks.append(asyncio.create_task(_fetch(client, files[i].url, queue, timeout)))
+
+    try:
+        for i in range(min(concurrency, len(files))):
+            start(i)
+
+        for i, file in enumerate(files):
+            size = await queues[i].get()
+            if isinstance(size, Exception):
+                logger.warning(f"Failed to download '{file.name}': {size}")
+            else:
+                info = zipfile.ZipInfo(file.name, date_time)
+                info.compress_type = zipfile.ZIP_STORED
+                if size is not None:
+                    info.file_size = size
+                with archive.open(info, "w", force_zip64=size is None) as entry:
+                    while (chunk := await queues[i].get()) is not _END:
+                        if isinstance(chunk, Exception):
+                            raise RuntimeError(
+                                f"Download of '{file.name}' failed mid-stream: {chunk}"
+                            ) from chunk
+                        entry.write(chunk)
+                        yield sink.drain()
+                written += 1
+
+            # Slide the window: this file is done, start the next fetch
+            queues[i] = None
+            if i + concurrency < len(files):
+                start(i + concurrency)
+
+        if not written:
+            raise EmptyArchiveError("Failed to download any files")
+
+        archive.close()
+        yield sink.drain()
+    finally:
+        for task in tasks:
+            task.cancel()
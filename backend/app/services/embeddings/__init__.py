@@ -0,0 +1,61 @@
+"""
+Embedding service — batched, cached access to the embedding model.
+"""
+
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.services.embeddings.cache import EmbeddingCache
+from app.services.embeddings.providers import (
+    EmbeddingProvider,
+    EmbeddingProviderError,
+    FakeEmbeddingProvider,
+    OpenAIEmbeddingProvider,
+)
+from app.services.embeddings.service import EmbeddingMetrics, EmbeddingService
+
+_service: EmbeddingService | None = None
+
+
+def create_embedding_provider() -> EmbeddingProvider:
+    """Build the provider selected by ``embedding_provider``."""
+    settings = get_settings()
+
+    if settings.embedding_provider == "fake":
+        return FakeEmbeddingProvider(dimensions=settings.embedding_dimensions)
+
+    if settings.embedding_provider == "openai":
+        return OpenAIEmbeddingProvider(
+            api_key=settings.embedding_api_key,
+            model=settings.embedding_model,
+            dimensions=settings.embedding_dimensions,
+            api_base=settings.embedding_api_base,
+        )
+
+    raise ValueError(f"Unknown embedding provider: {settings.embedding_provider}")
+
+
+def get_embedding_service() -> EmbeddingService:
+    global _service
+    if _service is None:
+        settings = get_settings()
+        _service = EmbeddingService(
+            provider=create_embedding_provider(),
+            cache=EmbeddingCache(Path(settings.ingest_cache_dir) / "embeddings.sqlite3"),
+            max_batch_size=settings.embedding_batch_size,
+            max_wait=settings.embedding_batch_wait_ms / 1000,
+        )
+    return _service
+
+
+__all__ = [
+    "EmbeddingCache",
+    "EmbeddingMetrics",
+    "EmbeddingProvider",
+    "EmbeddingProviderError",
+    "EmbeddingService",
+    "FakeEmbeddingProvider",
+    "OpenAIEmbeddingProvider",
+    "create_embedding_provider",
+    "get_embedding_service",
+]
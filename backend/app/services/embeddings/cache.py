@@ -0,0 +1,85 @@
+"""
+Persistent embedding cache keyed by (model, normalized-text hash).
+
+The model component is ``EmbeddingProvider.cache_key`` — provider, model
+name and dimensions — so vectors of a differently configured model are
+never served, even when the model name is the same.
+
+Boilerplate that repeats across documents — running headers, legal
+footers, disclaimers — is embedded once and then served from disk.
+Vectors are stored as packed float32 in a single SQLite file.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFKC, collapsed whitespace."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(normalize_text(text).encode(), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Thread-safe on-disk vector cache. Blocking — call from a thread."""
+
+    def __init__(self, path: str | Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model     TEXT NOT NULL,
+                text_hash BLOB NOT NULL,
+                vector    BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: list[bytes]) -> dict[bytes, list[float]]:
+        found: dict[bytes, list[float]] = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(hashes), 500):
+            part = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *part],
+                ).fetchall()
+            for key, blob in rows:
+                found[key] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model: str, items: dict[bytes, list[float]]) -> None:
+        rows = [
+            (model, key, array("f", vector).tobytes())
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
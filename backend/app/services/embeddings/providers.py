@@ -0,0 +1,120 @@
+"""
+Embedding providers — the remote (or fake) models the embedding service
+sends batches to.
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+from abc import ABC, abstractmethod
+
+import httpx
+
+
+class EmbeddingProviderError(Exception):
+    """Raised when a provider call fails."""
+    pass
+
+
+class EmbeddingProvider(ABC):
+    """One embedding model behind a batch API."""
+
+    name: str
+    model: str
+    dimensions: int
+    max_batch_size: int
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the vectors this provider returns; those of another
+        provider, model or size aren't interchangeable."""
+        return f"{self.name}:{self.model}:{self.dimensions}"
+
+    @abstractmethod
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed ``texts`` (at most ``max_batch_size``), preserving order."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Any OpenAI-compatible ``/embeddings`` endpoint."""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        dimensions: int,
+        api_base: str = "https://api.openai.com/v1",
+        max_batch_size: int = 256,
+        timeout: float = 60.0,
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.max_batch_size = max_batch_size
+        self._client = httpx.AsyncClient(
+            base_url=api_base.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+        )
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        try:
+            resp = await self._client.post(
+                "/embeddings",
+                json={
+                    "model": self.model,
+                    "input": texts,
+                    "dimensions": self.dimensions,
+                },
+            )
+            resp.raise_for_status()
+        except httpx.HTTPError as exc:
+            raise EmbeddingProviderError(f"Embedding request failed: {exc}") from exc
+
+        data = sorted(resp.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic local stand-in for tests and benchmarks.
+
+    The same text always maps to the same unit vector, with no network.
+    ``latency`` simulates the per-call round trip.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        dimensions: int = 384,
+        max_batch_size: int = 256,
+        latency: float = 0.0,
+        model: str = "fake",
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.max_batch_size = max_batch_size
+        self.latency = latency
+        self.calls = 0
+
+    def _vector(self, text: str) -> list[float]:
+        seed = hashlib.blake2b(text.encode(), digest_size=8).digest()
+        rng = random.Random(int.from_bytes(seed, "little"))
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.dimensions)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._vector(text) for text in texts]
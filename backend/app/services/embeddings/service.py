@@ -0,0 +1,209 @@
+"""
+Embedding service — micro-batches embedding requests from every document
+being processed, in front of a persistent text-hash cache.
+
+Callers ask for vectors for a list of texts. Cached texts are answered
+from disk. The rest go into a shared queue, and one batcher task drains
+it into provider-sized batches. A batch is sent when it reaches
+``max_batch_size`` or when ``max_wait`` has passed since its first text,
+whichever comes first. Identical texts already in flight share one slot.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+from app.services.embeddings.cache import EmbeddingCache, text_hash
+from app.services.embeddings.providers import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmbeddingMetrics:
+    """Running counters; read with ``snapshot()``."""
+    max_batch_size: int
+    texts_requested: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    batches: int = 0
+    batched_texts: int = 0
+    provider_errors: int = 0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    @property
+    def batch_fill(self) -> float:
+        """Average batch size as a fraction of ``max_batch_size``."""
+        if not self.batches:
+            return 0.0
+        return self.batched_texts / (self.batches * self.max_batch_size)
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "texts_requested": self.texts_requested,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": round(self.cache_hit_rate, 4),
+            "batches": self.batches,
+            "batch_fill": round(self.batch_fill, 4),
+            "provider_errors": self.provider_errors,
+        }
+
+
+@dataclass
+class _Pending:
+    key: bytes
+    text: str
+    future: asyncio.Future = field(repr=False)
+
+
+class EmbeddingService:
+    """
+    Shared, batching front-end for an ``EmbeddingProvider``.
+
+    Args:
+        provider: Model to call for cache misses
+        cache: Persistent cache; caching is skipped if None
+        max_batch_size: Texts per provider call (capped at the provider's limit)
+        max_wait: Seconds a partial batch may wait for more texts
+        max_concurrent_batches: Provider calls allowed in flight at once
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        cache: EmbeddingCache | None = None,
+        max_batch_size: int | None = None,
+        max_wait: float = 0.02,
+        max_concurrent_batches: int = 4,
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.max_batch_size = min(
+            max_batch_size or provider.max_batch_size, provider.max_batch_size
+        )
+        self.max_wait = max_wait
+        self.metrics = EmbeddingMetrics(max_batch_size=self.max_batch_size)
+
+        self._queue: asyncio.Queue[_Pending] | None = None
+        self._in_flight: dict[bytes, asyncio.Future] = {}
+        self._batch_slots = asyncio.Semaphore(max_concurrent_batches)
+        self._batcher: asyncio.Task | None = None
+        self._sends: set[asyncio.Task] = set()
+
+    @property
+    def model(self) -> str:
+        return self.provider.model
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """Return one vector per text, in order."""
+        if not texts:
+            return []
+
+        keys = [text_hash(text) for text in texts]
+        unique = dict(zip(keys, texts))
+        self.metrics.texts_requested += len(texts)
+
+        vectors: dict[bytes, list[float]] = {}
+        if self.cache is not None:
+            vectors = await asyncio.to_thread(
+                self.cache.get_many, self.provider.cache_key, list(unique)
+            )
+        self.metrics.cache_hits += len(vectors)
+        self.metrics.cache_misses += len(unique) - len(vectors)
+
+        missing = [key for key in unique if key not in vectors]
+        if missing:
+            # shield: a cancelled caller must not cancel a slot that other
+            # documents are also waiting on
+            results = await asyncio.gather(
+                *(asyncio.shield(self._submit(key, unique[key])) for key in missing)
+            )
+            vectors.update(zip(missing, results))
+
+        return [vectors[key] for key in keys]
+
+    def embed_blocking(
+        self,
+        texts: list[str],
+        loop: asyncio.AbstractEventLoop,
+    ) -> list[list[float]]:
+        """``embed()`` for pipeline worker threads, run on the service's loop."""
+        return asyncio.run_coroutine_threadsafe(self.embed(texts), loop).result()
+
+    async def aclose(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        await self.provider.aclose()
+
+    # ── Batching ─────────────────────────────────────────────────────────
+
+    def _submit(self, key: bytes, text: str) -> asyncio.Future:
+        # Same text already queued/in flight for another document
+        if key in self._in_flight:
+            return self._in_flight[key]
+
+        if self._batcher is None or self._batcher.done():
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.create_task(self._run_batcher())
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._queue.put_nowait(_Pending(key, text, future))
+        return future
+
+    async def _run_batcher(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._batch_slots.acquire()
+            task = asyncio.create_task(self._send(batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _send(self, batch: list[_Pending]) -> None:
+        try:
+            self.metrics.batches += 1
+            self.metrics.batched_texts += len(batch)
+
+            vectors = await self.provider.embed([item.text for item in batch])
+
+            for item, vector in zip(batch, vectors, strict=True):
+                if not item.future.done():
+                    item.future.set_result(vector)
+
+            if self.cache is not None:
+                await asyncio.to_thread(
+                    self.cache.put_many,
+                    self.provider.cache_key,
+                    {item.key: vector for item, vector in zip(batch, vectors)},
+                )
+        except Exception as exc:
+            self.metrics.provider_errors += 1
+            logger.error("Embedding batch of %d failed: %s", len(batch), exc)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+        finally:
+            for item in batch:
+                self._in_flight.pop(item.key, None)
+            self._batch_slots.release()
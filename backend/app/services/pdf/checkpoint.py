@@ -0,0 +1,190 @@
+"""
+Ingestion checkpoints — lets a retried job resume where the last attempt
+stopped instead of starting over.
+
+While a document is ingested, two append-only JSONL files are written
+under ``<file_id>/<content hash>`` (per pipeline version and embedding
+provider, model and dimensions, since saved vectors only fit those):
+
+  pages.jsonl   every extracted page, packed (see ``parallel.pack_page``)
+  chunks.jsonl  every chunk once it has been embedded, with its vector
+
+Each batch is flushed as soon as it's complete. A retry of the same
+bytes replays the saved pages instead of extracting them again, and
+chunking — which is deterministic — reproduces the same chunks, so the
+saved vectors are attached and only chunks past the checkpoint are
+embedded. Chunk ids are deterministic and the indexes upsert, so
+storing the replayed chunks again is a no-op.
+
+A line cut short by a crash is dropped when the checkpoint is opened.
+The checkpoint is removed once the document is processed; one for other
+bytes of the same file (a replaced version) is removed on open.
+"""
+
+import json
+import logging
+import os
+import shutil
+from itertools import islice
+from pathlib import Path
+from typing import IO, Iterator
+
+from app.core.config import get_settings
+from app.services.pdf.chunker import Chunk
+from app.services.pdf.extractor import ExtractedPage
+from app.services.pdf.parallel import pack_page, unpack_page
+from app.services.pdf.pipeline import PIPELINE_VERSION, batched
+
+logger = logging.getLogger(__name__)
+
+_store: "CheckpointStore | None" = None
+
+
+def _complete_lines(path: Path) -> int:
+    """Count newline-terminated lines, cutting off a trailing partial one."""
+    if not path.exists():
+        return 0
+    lines = 0
+    end = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            lines += 1
+            end += len(line)
+    if end != path.stat().st_size:
+        os.truncate(path, end)
+    return lines
+
+
+class IngestCheckpoint:
+    """
+    Saved progress of one document (``file_id`` at one content hash).
+
+    ``pages``/``chunks`` are what a previous attempt completed when the
+    checkpoint was opened; both files keep growing as this attempt runs.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        directory.mkdir(parents=True, exist_ok=True)
+        self._pages_path = directory / "pages.jsonl"
+        self._chunks_path = directory / "chunks.jsonl"
+        self.pages = _complete_lines(self._pages_path)
+        self.chunks = _complete_lines(self._chunks_path)
+
+        self._pages_out: IO[str] | None = None
+        self._chunks_out: IO[str] | None = None
+        self._saved_chunks: Iterator[dict] | None = None
+        self._next_saved: dict | None = None
+        self.restored = 0
+
+    @property
+    def resumable(self) -> bool:
+        return bool(self.pages or self.chunks)
+
+    # ── Resume ───────────────────────────────────────────────────────────
+
+    def iter_pages(self, batch_size: int) -> Iterator[list[ExtractedPage]]:
+        """The pages saved by earlier attempts, in bounded batches."""
+        if not self.pages:
+            return
+        with open(self._pages_path, encoding="utf-8") as f:
+            pages = (unpack_page(json.loads(line)) for line in islice(f, self.pages))
+            yield from batched(pages, batch_size)
+
+    def restore(self, batch: list[Chunk]) -> None:
+        """
+        Attach saved vectors to a batch of chunks. Batches must arrive in
+        chunk order, as the pipeline produces them.
+        """
+        if self._saved_chunks is None:
+            if not self.chunks:
+                return
+            f = open(self._chunks_path, encoding="utf-8")
+            self._saved_chunks = self._read_saved(f)
+            self._next_saved = next(self._saved_chunks, None)
+
+        for chunk in batch:
+            saved = self._next_saved
+            while saved is not None and saved["chunk_index"] < chunk.chunk_index:
+                saved = next(self._saved_chunks, None)
+            self._next_saved = saved
+            if saved is None:
+                return
+            if (
+                saved["chunk_index"] == chunk.chunk_index
+                and saved["text"] == chunk.text
+                and chunk.embedding is None
+            ):
+                chunk.embedding = saved["embedding"]
+                self.restored += 1
+
+    def _read_saved(self, f: IO[str]) -> Iterator[dict]:
+        with f:
+            for line in islice(f, self.chunks):
+                yield json.loads(line)
+
+    # ── Progress ─────────────────────────────────────────────────────────
+
+    def append_pages(self, pages: list[ExtractedPage]) -> None:
+        """Save newly extracted pages."""
+        if self._pages_out is None:
+            self._pages_out = open(self._pages_path, "a", encoding="utf-8")
+        self._pages_out.write("".join(
+            json.dumps(pack_page(page), separators=(",", ":")) + "\n" for page in pages
+        ))
+        self._pages_out.flush()
+
+    def append_chunks(self, batch: list[Chunk]) -> None:
+        """Save embedded chunks the checkpoint doesn't have yet."""
+        new = [chunk for chunk in batch if chunk.chunk_index >= self.chunks]
+        if not new:
+            return
+        if self._chunks_out is None:
+            self._chunks_out = open(self._chunks_path, "a", encoding="utf-8")
+        self._chunks_out.write("".join(
+            json.dumps(chunk.to_dict(), separators=(",", ":")) + "\n" for chunk in new
+        ))
+        self._chunks_out.flush()
+
+    def close(self) -> None:
+        for f in (self._pages_out, self._chunks_out):
+            if f is not None:
+                f.close()
+        if self._saved_chunks is not None:
+            self._saved_chunks.close()
+        self._pages_out = self._chunks_out = self._saved_chunks = None
+
+
+class CheckpointStore:
+    """Checkpoints of in-progress documents, one directory per file."""
+
+    def __init__(self, root: str | Path, model: str):
+        self._root = Path(root) / f"v{PIPELINE_VERSION}" / model.replace("/", "_")
+
+    def open(self, file_id: str, digest: str) -> IngestCheckpoint:
+        """The file's checkpoint for these bytes; others of the file are dropped."""
+        file_dir = self._root / file_id
+        if file_dir.exists():
+            for stale in file_dir.iterdir():
+                if stale.name != digest:
+                    shutil.rmtree(stale, ignore_errors=True)
+        return IngestCheckpoint(file_dir / digest)
+
+    def discard(self, file_id: str) -> None:
+        shutil.rmtree(self._root / file_id, ignore_errors=True)
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _store
+    if _store is None:
+        settings = get_settings()
+        _store = CheckpointStore(
+            Path(settings.ingest_cache_dir) / "checkpoints",
+            model=(
+                f"{settings.embedding_provider}-{settings.embedding_model}"
+                f"-{settings.embedding_dimensions}"
+            ),
+        )
+    return _store
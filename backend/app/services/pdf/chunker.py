@@ -0,0 +1,228 @@
+"""
+Chunking — packs the lines of each page into chunks of about
+``target_tokens`` tokens, in one pass over the extracted pages.
+
+  - lines are packed in reading order; a full chunk is closed at the
+    last block (paragraph) boundary that keeps it at least half full,
+    otherwise at the line that would overflow it
+  - consecutive chunks of a page share up to ``overlap_tokens`` worth of
+    lines, so text cut at a boundary is whole in one of them
+  - running headers and footers — blocks in the top/bottom margin whose
+    text, digits aside, repeats on several pages — are dropped first;
+    the first few pages are read ahead so they're stripped as well
+  - bounding boxes are the min/max over each chunk's line boxes, taken
+    for all chunks of a page in one vectorized step
+
+Chunks never span pages so each one has a single ``page_num`` and
+bounding box. Tokens are estimated from length (about four characters
+per token for English text under BPE vocabularies); no tokenizer runs.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from collections import deque
+from dataclasses import dataclass
+from itertools import accumulate, islice
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from app.services.pdf.extractor import ExtractedPage, TextBlock
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TARGET_TOKENS = 400
+DEFAULT_OVERLAP_TOKENS = 40
+
+# Running headers/footers: blocks lying entirely within this fraction of
+# the page height from the top or bottom edge, seen on this many pages
+_MARGIN_BAND = 0.08
+_MIN_REPEATS = 3
+# Pages read ahead to learn a document's running headers before the first
+# chunk is emitted
+_LOOKAHEAD_PAGES = 8
+
+_DIGITS = re.compile(r"\d+")
+
+
+@dataclass(slots=True)
+class Chunk:
+    """A chunk of text plus the location it came from."""
+    text: str
+    page_num: int
+    chunk_index: int
+    bbox: tuple[float, float, float, float]   # x0, y0, x1, y1
+    embedding: list[float] | None = None
+
+    def bounding_box(self) -> dict[str, float]:
+        """Bounding box in the README metadata format."""
+        x0, y0, x1, y1 = self.bbox
+        return {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0}
+
+    def to_dict(self) -> dict:
+        return {
+            "text": self.text,
+            "page_num": self.page_num,
+            "chunk_index": self.chunk_index,
+            "bbox": list(self.bbox),
+            "embedding": self.embedding,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Chunk":
+        return cls(
+            text=data["text"],
+            page_num=data["page_num"],
+            chunk_index=data["chunk_index"],
+            bbox=tuple(data["bbox"]),
+            embedding=data.get("embedding"),
+        )
+
+    def to_metadata(self, *, file_id: str, user_id: str, title: str) -> dict:
+        """Metadata payload stored next to the vector."""
+        return {
+            "user_id": user_id,
+            "text": self.text,
+            "bounding_box": self.bounding_box(),
+            "title": title,
+            "page_num": self.page_num,
+            "file_id": file_id,
+            "chunk_index": self.chunk_index,
+        }
+
+
+# ── Running headers and footers ──────────────────────────────────────────────
+
+
+class _RunningText:
+    """Margin blocks seen so far, keyed by band and digit-free text."""
+
+    def __init__(self) -> None:
+        # key → (pages seen on, last page seen on)
+        self._seen: dict[tuple[str, str], tuple[int, int]] = {}
+
+    def observe(self, page: ExtractedPage) -> list[tuple[str, str] | None]:
+        """Record the page's margin blocks; returns each block's key."""
+        top = page.height * _MARGIN_BAND
+        bottom = page.height - top
+        keys: list[tuple[str, str] | None] = []
+        for block in page.blocks:
+            if block.y1 <= top:
+                band = "top"
+            elif block.y0 >= bottom:
+                band = "bottom"
+            else:
+                keys.append(None)
+                continue
+            key = (band, _DIGITS.sub("#", " ".join(block.text.lower().split())))
+            count, last = self._seen.get(key, (0, 0))
+            if last != page.page_num:
+                self._seen[key] = (count + 1, page.page_num)
+            keys.append(key)
+        return keys
+
+    def body(
+        self,
+        page: ExtractedPage,
+        keys: list[tuple[str, str] | None],
+    ) -> list[TextBlock]:
+        """The page's blocks without those repeated on enough pages."""
+        return [
+            block
+            for block, key in zip(page.blocks, keys)
+            if key is None or self._seen[key][0] < _MIN_REPEATS
+        ]
+
+
+# ── Packing ──────────────────────────────────────────────────────────────────
+
+
+def _pack_page(
+    blocks: list[TextBlock],
+    page_num: int,
+    first_index: int,
+    target_chars: int,
+    overlap_chars: int,
+) -> list[Chunk]:
+    texts: list[str] = []
+    boxes: list[tuple[float, float, float, float]] = []
+    breaks: list[int] = []      # line indexes a block ends before
+    for block in blocks:
+        texts.extend(block.text.split("\n"))
+        boxes.extend(block.lines)
+        breaks.append(len(texts))
+    if not texts:
+        return []
+
+    # offsets[i]: characters before line i, one separator per line
+    offsets = [0, *accumulate(len(text) + 1 for text in texts)]
+    count = len(texts)
+    spans: list[int] = []
+    start = 0
+    while True:
+        end = bisect_right(offsets, offsets[start] + target_chars + 1) - 1
+        end = min(max(end, start + 1), count)
+        if end < count:
+            last = bisect_right(breaks, end) - 1
+            boundary = breaks[last] if last >= 0 else 0
+            if boundary > start and offsets[boundary] - offsets[start] >= target_chars // 2:
+                end = boundary
+        spans += (start, end)
+        if end == count:
+            break
+        start = max(bisect_left(offsets, offsets[end] - overlap_chars), start + 1)
+
+    # All boxes in one go; reduceat over (start, end) pairs, keeping the
+    # even results. The extra row makes ``end == count`` a valid index.
+    lines = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    lines = np.vstack((lines, lines[-1:]))
+    lows = np.minimum.reduceat(lines[:, :2], spans)[::2].tolist()
+    highs = np.maximum.reduceat(lines[:, 2:], spans)[::2].tolist()
+
+    return [
+        Chunk(
+            text="\n".join(texts[spans[i]:spans[i + 1]]),
+            page_num=page_num,
+            chunk_index=first_index + n,
+            bbox=(*lows[n], *highs[n]),
+        )
+        for n, i in enumerate(range(0, len(spans), 2))
+    ]
+
+
+def chunk_pages(
+    pages: Iterable[ExtractedPage],
+    target_tokens: int = DEFAULT_TARGET_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+) -> Iterator[Chunk]:
+    """
+    Lazily turn pages into chunks of about ``target_tokens`` tokens.
+
+    A single line longer than the budget becomes a chunk of its own.
+    Only ``_LOOKAHEAD_PAGES`` pages are held at any time.
+    """
+    if not 0 <= overlap_tokens < target_tokens:
+        raise ValueError("overlap must be at least 0 and less than the target")
+    target_chars = target_tokens * CHARS_PER_TOKEN
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+
+    pages = iter(pages)
+    running = _RunningText()
+    ahead = deque((page, running.observe(page)) for page in islice(pages, _LOOKAHEAD_PAGES))
+
+    def observed() -> Iterator[tuple[ExtractedPage, list]]:
+        while ahead:
+            yield ahead.popleft()
+        for page in pages:
+            yield page, running.observe(page)
+
+    chunk_index = 0
+    for page, keys in observed():
+        chunks = _pack_page(
+            running.body(page, keys),
+            page.page_num,
+            chunk_index,
+            target_chars,
+            overlap_chars,
+        )
+        chunk_index += len(chunks)
+        yield from chunks
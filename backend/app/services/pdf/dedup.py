@@ -0,0 +1,120 @@
+"""
+Content-hash deduplication.
+
+The first time a given PDF (by SHA-256 of its bytes) is ingested, every
+chunk it produces — text, location and embedding — is recorded in an
+on-disk registry. Later uploads of the same bytes, from any account or
+via a global file, replay those chunks into the store stage instead of
+running extract/embed again. The chunks carry no owner, so the store
+stage tags them with the new file's ``file_id``/``user_id``.
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Iterator
+
+from app.core.config import get_settings
+from app.services.pdf.chunker import Chunk
+from app.services.pdf.pipeline import PIPELINE_VERSION, batched
+
+_registry: "ChunkRegistry | None" = None
+
+
+class RegistryWriter:
+    """
+    Streams chunk batches into a temp file and publishes it atomically on
+    ``commit()``. Nothing becomes visible to readers unless the whole
+    document was processed successfully.
+    """
+
+    def __init__(self, path: Path, meta_path: Path):
+        self._path = path
+        self._meta_path = meta_path
+        self._tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self.chunks = 0
+
+    def append(self, batch: list[Chunk]) -> None:
+        for chunk in batch:
+            self._file.write(json.dumps(chunk.to_dict(), separators=(",", ":")))
+            self._file.write("\n")
+        self.chunks += len(batch)
+
+    def commit(self, pages: int) -> None:
+        self._file.close()
+        self._meta_path.write_text(
+            json.dumps({"pages": pages, "chunks": self.chunks})
+        )
+        os.replace(self._tmp_path, self._path)
+
+    def abort(self) -> None:
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class ChunkRegistry:
+    """
+    content hash → chunks registry, one JSONL file per document.
+
+    Entries live under the pipeline version, the embedding provider,
+    model and dimensions and the chunk size and overlap, so a change to
+    chunking or the embeddings never replays stale chunks.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        model: str,
+        chunk_tokens: int,
+        chunk_overlap: int,
+    ):
+        self._root = (
+            Path(root)
+            / f"v{PIPELINE_VERSION}"
+            / model.replace("/", "_")
+            / f"chunks-{chunk_tokens}-{chunk_overlap}"
+        )
+
+    def _paths(self, digest: str) -> tuple[Path, Path]:
+        directory = self._root / digest[:2]
+        return directory / f"{digest}.jsonl", directory / f"{digest}.meta.json"
+
+    def contains(self, digest: str) -> bool:
+        return self._paths(digest)[0].exists()
+
+    def page_count(self, digest: str) -> int:
+        _, meta_path = self._paths(digest)
+        try:
+            return json.loads(meta_path.read_text())["pages"]
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def iter_batches(self, digest: str, batch_size: int) -> Iterator[list[Chunk]]:
+        """Stream the stored chunks back in bounded batches."""
+        path, _ = self._paths(digest)
+        with open(path, encoding="utf-8") as f:
+            chunks = (Chunk.from_dict(json.loads(line)) for line in f)
+            yield from batched(chunks, batch_size)
+
+    def writer(self, digest: str) -> RegistryWriter:
+        path, meta_path = self._paths(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return RegistryWriter(path, meta_path)
+
+
+def get_chunk_registry() -> ChunkRegistry:
+    global _registry
+    if _registry is None:
+        settings = get_settings()
+        _registry = ChunkRegistry(
+            Path(settings.ingest_cache_dir) / "registry",
+            model=(
+                f"{settings.embedding_provider}-{settings.embedding_model}"
+                f"-{settings.embedding_dimensions}"
+            ),
+            chunk_tokens=settings.chunk_target_tokens,
+            chunk_overlap=settings.chunk_overlap_tokens,
+        )
+    return _registry
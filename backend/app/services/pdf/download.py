@@ -0,0 +1,159 @@
+"""
+Streaming PDF download from Supabase Storage.
+
+The object is read in fixed-size chunks over the shared HTTP client and
+hashed on the way (SHA-256, the digest the chunk registry is keyed by):
+
+  - files up to ``pdf_download_memory_threshold`` bytes stay in memory
+  - larger ones spill to a temp file as they arrive, and PyMuPDF opens
+    that file by path — it reads pages from disk on demand, so the
+    document never exists as one Python ``bytes`` object and a worker's
+    memory doesn't grow with the size of the file
+
+The received size is checked against ``Content-Length`` (and, with
+``expected_digest``, the hash against a known one), so a truncated or
+swapped body fails the download instead of producing a partial index.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import IO
+from urllib.parse import quote
+
+from app.core.config import get_settings
+from app.core.supabase import get_http_client
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class DownloadError(Exception):
+    """
+    The object could not be fetched, or arrived incomplete or altered.
+    ``retryable`` errors are transient (throttling, server errors, a body
+    cut short); a missing or empty object is not.
+    """
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass(slots=True)
+class DownloadedPdf:
+    """
+    A downloaded PDF, in memory (``data``) or in a temp file (``path``).
+    ``close()`` removes the temp file.
+    """
+    size: int
+    digest: str
+    data: bytes | None = None
+    path: str | None = None
+
+    @property
+    def source(self) -> bytes | str:
+        """What ``open_pdf`` takes: the bytes, or the path of the spilled file."""
+        return self.data if self.data is not None else self.path
+
+    def close(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self.data = None
+
+    def __enter__(self) -> "DownloadedPdf":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+async def download_pdf(
+    storage_path: str,
+    expected_digest: str | None = None,
+) -> DownloadedPdf:
+    """
+    Stream ``storage_path`` out of the storage bucket.
+
+    Args:
+        storage_path: Path to the file in the bucket
+        expected_digest: Hex SHA-256 the content must have, if known
+
+    Raises:
+        DownloadError: On an HTTP error, an empty or short body, or a
+            digest mismatch
+    """
+    settings = get_settings()
+    key = settings.supabase_service_role_key
+    url = (
+        f"{settings.supabase_url}/storage/v1/object/"
+        f"{settings.supabase_storage_bucket}/{quote(storage_path)}"
+    )
+    threshold = settings.pdf_download_memory_threshold
+
+    hasher = hashlib.sha256()
+    buffer = bytearray()
+    spill: IO[bytes] | None = None
+    size = 0
+
+    try:
+        async with get_http_client().stream(
+            "GET", url, headers={"apikey": key, "Authorization": f"Bearer {key}"}
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise DownloadError(
+                    f"HTTP {response.status_code}: {response.text[:200]}",
+                    retryable=response.status_code in (408, 429)
+                    or response.status_code >= 500,
+                )
+            declared = response.headers.get("content-length")
+            declared = int(declared) if declared is not None else None
+
+            # Known to be large: straight to disk
+            if declared is not None and declared > threshold:
+                spill = _spill_file(settings.pdf_download_dir)
+
+            async for data in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                hasher.update(data)
+                size += len(data)
+                if spill is None:
+                    buffer += data
+                    if len(buffer) <= threshold:
+                        continue
+                    # Larger than announced (or not announced) — spill now
+                    spill = _spill_file(settings.pdf_download_dir)
+                    data, buffer = bytes(buffer), bytearray()
+                await asyncio.to_thread(spill.write, data)
+
+        if size == 0:
+            raise DownloadError("Object is empty")
+        if declared is not None and size != declared:
+            raise DownloadError(f"Received {size} of {declared} bytes", retryable=True)
+        digest = hasher.hexdigest()
+        if expected_digest is not None and digest != expected_digest:
+            raise DownloadError(
+                f"Content hash {digest[:12]} does not match {expected_digest[:12]}"
+            )
+
+        if spill is None:
+            return DownloadedPdf(size=size, digest=digest, data=bytes(buffer))
+        spill.close()
+        return DownloadedPdf(size=size, digest=digest, path=spill.name)
+
+    except BaseException:
+        if spill is not None:
+            spill.close()
+            os.unlink(spill.name)
+        raise
+
+
+def _spill_file(directory: str) -> IO[bytes]:
+    return tempfile.NamedTemporaryFile(
+        prefix="pdf-", suffix=".pdf", dir=directory or None, delete=False
+    )
@@ -0,0 +1,151 @@
+"""
+Page extraction — turns a PDF into a stream of pages with the bounding
+box of every text block and every word.
+
+Pages are loaded one at a time so only the current page's text and block
+geometry is alive while the downstream stages run.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator, NamedTuple
+
+import pymupdf
+
+# Ask MuPDF to drop its internal resource store every N pages so long
+# documents don't accumulate decoded fonts/images in native memory.
+_STORE_SHRINK_INTERVAL = 64
+
+
+@dataclass(slots=True)
+class TextBlock:
+    """One text block on a page. Coordinates are PDF points, origin top-left."""
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    # Box of each line of ``text`` (split on "\n"), for chunk boxes
+    lines: list[tuple[float, float, float, float]]
+
+
+class Word(NamedTuple):
+    """One word on a page, for highlight lookup."""
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    line: int           # line number on the page, in reading order
+
+
+@dataclass(slots=True)
+class ExtractedPage:
+    """Text blocks and words of a single page."""
+    page_num: int       # 1-based, matches `page_num` in the chunk metadata
+    width: float
+    height: float
+    blocks: list[TextBlock]
+    words: list[Word]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(block.text for block in self.blocks)
+
+
+class UnreadablePdfError(Exception):
+    """The content is not a PDF that PyMuPDF can open."""
+    pass
+
+
+def open_pdf(pdf: bytes | str) -> pymupdf.Document:
+    """
+    Open a PDF from memory (``bytes``) or from a file path. A file is read
+    page by page as needed rather than loaded whole.
+
+    Raises:
+        UnreadablePdfError: If the content is empty or not a valid PDF
+    """
+    try:
+        if isinstance(pdf, str):
+            return pymupdf.open(pdf, filetype="pdf")
+        return pymupdf.open(stream=pdf, filetype="pdf")
+    except pymupdf.FileDataError as exc:
+        raise UnreadablePdfError(str(exc)) from exc
+
+
+def extract_page(page: pymupdf.Page) -> ExtractedPage:
+    """Extract the text blocks and words of one page in reading order."""
+    blocks: list[TextBlock] = []
+
+    # Blocks and words come from one parse of the page.
+    # "dict" output is used rather than "blocks": the tuple-based block
+    # extractor keeps references alive across pages, which makes memory
+    # grow with page count.
+    textpage = page.get_textpage(flags=pymupdf.TEXTFLAGS_TEXT)
+    page_dict = textpage.extractDICT(sort=True)
+
+    for block in page_dict["blocks"]:
+        # type 1 is an image block — nothing to index
+        if block["type"] != 0:
+            continue
+        lines = []
+        for line in block["lines"]:
+            line_text = "".join(span["text"] for span in line["spans"]).strip()
+            if line_text:
+                lines.append((line_text, line["bbox"]))
+        if lines:
+            blocks.append(TextBlock(
+                "\n".join(text for text, _ in lines),
+                *block["bbox"],
+                [tuple(bbox) for _, bbox in lines],
+            ))
+
+    # Sorted word extraction is several times slower than the block sort,
+    # so put raw words into the same reading order via their block number
+    block_rank = {block["number"]: rank for rank, block in enumerate(page_dict["blocks"])}
+    raw_words = textpage.extractWORDS()
+    raw_words.sort(key=lambda w: (block_rank.get(w[5], 0), w[6], w[7]))
+
+    words: list[Word] = []
+    line = -1
+    last_line_key = None
+    for x0, y0, x1, y1, text, block_no, line_no, _ in raw_words:
+        if (block_no, line_no) != last_line_key:
+            last_line_key = (block_no, line_no)
+            line += 1
+        words.append(Word(text, x0, y0, x1, y1, line))
+
+    rect = page.rect
+    return ExtractedPage(
+        page_num=page.number + 1,
+        width=rect.width,
+        height=rect.height,
+        blocks=blocks,
+        words=words,
+    )
+
+
+def iter_pages(
+    doc: pymupdf.Document,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[ExtractedPage]:
+    """
+    Lazily yield extracted pages in ``[start, stop)`` (0-based page indices).
+
+    Args:
+        doc: An open PyMuPDF document
+        start: First page index to extract
+        stop: One past the last page index (defaults to the end of the document)
+    """
+    stop = doc.page_count if stop is None else min(stop, doc.page_count)
+
+    for index in range(start, stop):
+        page = doc.load_page(index)
+        extracted = extract_page(page)
+        del page
+
+        if (index + 1) % _STORE_SHRINK_INTERVAL == 0:
+            pymupdf.TOOLS.store_shrink(100)
+
+        yield extracted
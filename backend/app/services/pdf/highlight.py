@@ -0,0 +1,421 @@
+"""
+Highlight lookup — maps text snippets cited in an answer back to
+rectangles on the PDF page.
+
+Rather than calling ``page.search_for()`` for every snippet, which reopens
+and rescans pages, each document gets a word/character offset index that
+is built once at ingest time and saved next to the chunks:
+
+  - the document text, normalized per word and joined with spaces
+  - each word's start offset in that text, its rectangle and its line
+  - where each page starts, in words and in characters
+
+A lookup is then one ``str.find`` over the normalized text, two binary
+searches to turn the character range into a word range, and a gather of
+the word rectangles, merged into one rectangle per line. Snippets that
+aren't found fall back to the bounding box of the chunk they came from.
+
+Indexes are keyed by content hash, so byte-identical uploads share one.
+During ingestion the index is spooled to disk page by page and the file
+is assembled from the spool, so it's never held in memory whole.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Callable, Iterable
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.embeddings.cache import normalize_text
+from app.services.pdf.extractor import ExtractedPage, iter_pages, open_pdf
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout or the text normalization changes
+INDEX_FORMAT_VERSION = 1
+
+# Arrays that grow with the document, spooled while it's ingested
+_SPOOLED = {
+    "text": (np.dtype(np.uint8), ()),
+    "word_starts": (np.dtype("<i4"), ()),
+    "rects": (np.dtype("<f4"), (4,)),
+    "lines": (np.dtype("<i4"), ()),
+}
+
+
+def normalize_snippet(text: str) -> str:
+    """Form both the index text and the snippets are compared in."""
+    return normalize_text(text).lower()
+
+
+@dataclass(slots=True)
+class HighlightRect:
+    """One highlighted region (a line or part of one). PDF points."""
+    page_num: int
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+class TextIndex:
+    """Word/character offset index of one document."""
+
+    __slots__ = (
+        "text",
+        "word_starts",
+        "rects",
+        "lines",
+        "page_nums",
+        "page_word_starts",
+        "page_char_starts",
+    )
+
+    def __init__(
+        self,
+        text: str,
+        word_starts: np.ndarray,       # (words,) int32 offset into text
+        rects: np.ndarray,             # (words, 4) float32 x0, y0, x1, y1
+        lines: np.ndarray,             # (words,) int32, unique across pages
+        page_nums: np.ndarray,         # (pages,) int32
+        page_word_starts: np.ndarray,  # (pages + 1,) int32
+        page_char_starts: np.ndarray,  # (pages + 1,) int32
+    ):
+        self.text = text
+        self.word_starts = word_starts
+        self.rects = rects
+        self.lines = lines
+        self.page_nums = page_nums
+        self.page_word_starts = page_word_starts
+        self.page_char_starts = page_char_starts
+
+    def __len__(self) -> int:
+        return len(self.word_starts)
+
+    # ── Lookup ───────────────────────────────────────────────────────────
+
+    def find(self, snippet: str, page_num: int | None = None) -> list[HighlightRect] | None:
+        """
+        Rectangles covering the first occurrence of ``snippet``.
+
+        Args:
+            snippet: Text to locate (matched case- and whitespace-insensitively)
+            page_num: Page to look on first; the whole document is searched
+                if it's not found there
+
+        Returns:
+            One rectangle per line spanned, or None if there's no match
+        """
+        needle = normalize_snippet(snippet)
+        if not needle:
+            return None
+
+        # Keys are cast to the arrays' int32: a Python int would make
+        # searchsorted upcast the whole array on every call
+        position = -1
+        if page_num is not None:
+            page = np.searchsorted(self.page_nums, np.int32(page_num))
+            if page < len(self.page_nums) and self.page_nums[page] == page_num:
+                position = self.text.find(
+                    needle,
+                    self.page_char_starts[page],
+                    self.page_char_starts[page + 1],
+                )
+        if position < 0:
+            position = self.text.find(needle)
+        if position < 0:
+            return None
+
+        first = int(np.searchsorted(self.word_starts, np.int32(position), "right")) - 1
+        stop = int(np.searchsorted(
+            self.word_starts, np.int32(position + len(needle) - 1), "right"
+        ))
+        return self._merge_lines(max(first, 0), stop)
+
+    def _merge_lines(self, first: int, stop: int) -> list[HighlightRect]:
+        rects = self.rects[first:stop]
+        lines = self.lines[first:stop]
+
+        # One rectangle per run of words on the same line
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(lines)) + 1))
+        x0 = np.minimum.reduceat(rects[:, 0], starts)
+        y0 = np.minimum.reduceat(rects[:, 1], starts)
+        x1 = np.maximum.reduceat(rects[:, 2], starts)
+        y1 = np.maximum.reduceat(rects[:, 3], starts)
+
+        pages = np.searchsorted(
+            self.page_word_starts, (first + starts).astype(np.int32), "right"
+        ) - 1
+        page_nums = self.page_nums[pages]
+
+        return [
+            HighlightRect(int(p), float(a), float(b), float(c - a), float(d - b))
+            for p, a, b, c, d in zip(
+                page_nums.tolist(), x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()
+            )
+        ]
+
+    # ── Persistence ──────────────────────────────────────────────────────
+
+    def save(self, path: Path) -> None:
+        """Write atomically, so readers never see a partial index."""
+        _write_atomically(path, lambda fh: np.savez(
+            fh,
+            text=np.frombuffer(self.text.encode("utf-8"), dtype=np.uint8),
+            word_starts=self.word_starts,
+            rects=self.rects,
+            lines=self.lines,
+            page_nums=self.page_nums,
+            page_word_starts=self.page_word_starts,
+            page_char_starts=self.page_char_starts,
+        ))
+
+    @classmethod
+    def load(cls, path: Path) -> "TextIndex":
+        with np.load(path) as data:
+            return cls(
+                text=data["text"].tobytes().decode("utf-8"),
+                word_starts=data["word_starts"],
+                rects=data["rects"],
+                lines=data["lines"],
+                page_nums=data["page_nums"],
+                page_word_starts=data["page_word_starts"],
+                page_char_starts=data["page_char_starts"],
+            )
+
+
+def _write_atomically(path: Path, write: Callable[[IO[bytes]], None]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp, "wb") as fh:
+            write(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class TextIndexBuilder:
+    """
+    Collects pages as they stream through ingestion. Each page's text,
+    word offsets, rectangles and lines are appended to spool files as it
+    arrives; only three counters per page stay in memory. ``write()``
+    assembles the index file from the spool, ``build()`` loads it.
+
+    Args:
+        directory: Where to create the spool (the system temp dir if None);
+            removed by ``close()``
+    """
+
+    def __init__(self, directory: str | Path | None = None) -> None:
+        if directory is not None:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        self._spool = Path(tempfile.mkdtemp(prefix="text-index-", dir=directory))
+        self._files = {name: open(self._spool / name, "wb") for name in _SPOOLED}
+        self._page_nums: list[int] = []
+        self._page_words: list[int] = []
+        self._page_chars: list[int] = []
+        self._chars = 0
+        self._next_line = 0
+
+    def __enter__(self) -> "TextIndexBuilder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add_pages(self, pages: Iterable[ExtractedPage]) -> None:
+        for page in pages:
+            self.add_page(page)
+
+    def add_page(self, page: ExtractedPage) -> None:
+        tokens = [normalize_snippet(word.text) for word in page.words]
+        starts = np.empty(len(tokens), dtype=np.int32)
+
+        offset = self._chars
+        for i, token in enumerate(tokens):
+            starts[i] = offset
+            offset += len(token) + 1   # joined with single spaces
+
+        # Page text ends with a separator so matches don't fuse two pages
+        page_text = " ".join(tokens) + " " if tokens else ""
+        self._chars += len(page_text)
+
+        rects = np.array(
+            [(w.x0, w.y0, w.x1, w.y1) for w in page.words], dtype=np.float32
+        )
+        lines = np.fromiter((w.line for w in page.words), dtype=np.int32, count=len(page.words))
+
+        self._files["text"].write(page_text.encode("utf-8"))
+        self._files["word_starts"].write(starts.astype("<i4").tobytes())
+        self._files["rects"].write(rects.astype("<f4").tobytes())
+        self._files["lines"].write((lines + self._next_line).astype("<i4").tobytes())
+
+        self._next_line += int(lines.max()) + 1 if len(lines) else 0
+        self._page_nums.append(page.page_num)
+        self._page_words.append(len(tokens))
+        self._page_chars.append(len(page_text))
+
+    def _page_arrays(self) -> dict[str, np.ndarray]:
+        return {
+            "page_nums": np.array(self._page_nums, dtype=np.int32),
+            "page_word_starts": np.concatenate(
+                ([0], np.cumsum(self._page_words))
+            ).astype(np.int32),
+            "page_char_starts": np.concatenate(
+                ([0], np.cumsum(self._page_chars))
+            ).astype(np.int32),
+        }
+
+    def _flush(self) -> None:
+        for fh in self._files.values():
+            fh.flush()
+
+    def write(self, path: Path) -> None:
+        """
+        Save the index to ``path`` in ``TextIndex.save``'s format, copying
+        the spooled arrays into it in bounded pieces. Atomic.
+        """
+        self._flush()
+
+        def write(fh: IO[bytes]) -> None:
+            with zipfile.ZipFile(fh, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for name, (dtype, tail) in _SPOOLED.items():
+                    spool = self._spool / name
+                    count = spool.stat().st_size // (dtype.itemsize * int(np.prod(tail)))
+                    with zf.open(f"{name}.npy", "w", force_zip64=True) as out, \
+                            open(spool, "rb") as src:
+                        np.lib.format.write_array_header_1_0(out, {
+                            "descr": np.lib.format.dtype_to_descr(dtype),
+                            "fortran_order": False,
+                            "shape": (count, *tail),
+                        })
+                        shutil.copyfileobj(src, out, 1024 * 1024)
+                for name, array in self._page_arrays().items():
+                    with zf.open(f"{name}.npy", "w", force_zip64=True) as out:
+                        np.lib.format.write_array(out, array)
+
+        _write_atomically(path, write)
+
+    def build(self) -> TextIndex:
+        """The index, loaded into memory."""
+        self._flush()
+        spooled = {
+            name: np.fromfile(self._spool / name, dtype=dtype).reshape(-1, *tail)
+            for name, (dtype, tail) in _SPOOLED.items()
+        }
+        return TextIndex(
+            text=spooled.pop("text").tobytes().decode("utf-8"),
+            **spooled,
+            **self._page_arrays(),
+        )
+
+    def close(self) -> None:
+        for fh in self._files.values():
+            fh.close()
+        shutil.rmtree(self._spool, ignore_errors=True)
+
+
+def build_text_index(pdf: bytes | str) -> TextIndex:
+    """Index a document that predates ingest-time indexing (bytes or a
+    file path). Blocking."""
+    with TextIndexBuilder() as builder:
+        doc = open_pdf(pdf)
+        try:
+            builder.add_pages(iter_pages(doc))
+        finally:
+            doc.close()
+        return builder.build()
+
+
+class HighlightService:
+    """
+    Snippet → rectangle lookup over content-hash keyed text indexes.
+
+    Loaded indexes are kept in an LRU of ``max_documents``, so the
+    documents a conversation keeps citing stay in memory. Thread-safe.
+
+    Args:
+        directory: Where indexes are saved at ingest time
+        max_documents: Indexes kept loaded
+    """
+
+    def __init__(self, directory: str | Path, max_documents: int = 64):
+        self.directory = Path(directory) / f"v{INDEX_FORMAT_VERSION}"
+        self.max_documents = max_documents
+        self._loaded: OrderedDict[str, TextIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.npz"
+
+    def contains(self, digest: str) -> bool:
+        return digest in self._loaded or self._path(digest).exists()
+
+    def builder(self) -> TextIndexBuilder:
+        """A builder for an ingest, spooling next to the saved indexes."""
+        return TextIndexBuilder(self.directory / "spool")
+
+    def save(self, digest: str, builder: TextIndexBuilder) -> None:
+        """Save the index built for ``digest``. It isn't loaded: that
+        happens when one of its highlights is first requested."""
+        builder.write(self._path(digest))
+
+    def get_index(
+        self,
+        digest: str,
+        load_pdf: Callable[[], bytes | str] | None = None,
+    ) -> TextIndex | None:
+        """
+        The document's index: from memory, from disk, or — if
+        ``load_pdf`` is given — built from the PDF and saved. Blocking.
+        """
+        with self._lock:
+            index = self._loaded.get(digest)
+            if index is not None:
+                self._loaded.move_to_end(digest)
+                return index
+
+        path = self._path(digest)
+        if path.exists():
+            index = TextIndex.load(path)
+        elif load_pdf is not None:
+            logger.info(f"[{digest[:12]}] Building missing highlight index")
+            index = build_text_index(load_pdf())
+            index.save(path)
+        else:
+            return None
+
+        self._remember(digest, index)
+        return index
+
+    def _remember(self, digest: str, index: TextIndex) -> None:
+        with self._lock:
+            self._loaded[digest] = index
+            self._loaded.move_to_end(digest)
+            while len(self._loaded) > self.max_documents:
+                self._loaded.popitem(last=False)
+
+
+_service: HighlightService | None = None
+
+
+def get_highlight_service() -> HighlightService:
+    global _service
+    if _service is None:
+        settings = get_settings()
+        _service = HighlightService(
+            Path(settings.ingest_cache_dir) / "highlight",
+            max_documents=settings.highlight_cache_documents,
+        )
+    return _service
@@ -0,0 +1,117 @@
+"""
+Incremental re-ingestion — chunk-level diff against the indexed version.
+
+When a file is processed again (a revised version was uploaded in its
+place, or a job is retried), every new chunk is fingerprinted by its
+normalized text and position and matched against the chunks already
+indexed for the file:
+
+  - unchanged  same text at the same page, index and box — left alone
+  - moved      same text at a new position — stored again with its
+               existing vector, so only the metadata is rewritten
+  - added      text not indexed before — embedded and stored
+  - removed    indexed chunks the new version no longer has — deleted
+
+Chunk ids derive from ``(file_id, chunk_index)`` and indexes upsert by
+id, so storing a chunk overwrites whatever the old version had at that
+index; only old indexes nothing was written to need deleting. Embedding
+and index writes are proportional to the change, not to the document.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Iterable
+
+import numpy as np
+
+from app.services.embeddings.cache import text_hash
+from app.services.pdf.chunker import Chunk
+from app.services.search.types import make_chunk_id
+
+# Boxes are stored as float32; closer than this (points) is the same place
+_BBOX_TOLERANCE = 0.01
+
+
+@dataclass
+class DiffStats:
+    unchanged: int = 0
+    moved: int = 0
+    added: int = 0
+    removed: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class _Indexed:
+    """A chunk of the indexed version, as returned by ``DenseIndex.file_chunks``."""
+    chunk_index: int
+    page_num: int
+    bbox: tuple[float, float, float, float]
+    vector: np.ndarray
+
+    def same_position(self, chunk: Chunk) -> bool:
+        return (
+            self.chunk_index == chunk.chunk_index
+            and self.page_num == chunk.page_num
+            and np.allclose(self.bbox, chunk.bbox, atol=_BBOX_TOLERANCE)
+        )
+
+
+class ChunkDiff:
+    """
+    Diff of a file's new chunks against its indexed ones.
+
+    Feed every chunk batch of the new version through ``match()`` before
+    embedding (it attaches the vectors of reused chunks, so the embed
+    stage skips them) and through ``to_store()`` before indexing; once
+    the whole version has been seen, ``removed_ids()`` lists what's gone.
+    """
+
+    def __init__(self, indexed: Iterable[dict]):
+        self._by_text: dict[bytes, list[_Indexed]] = {}
+        self._indexed: set[int] = set()
+        for chunk in indexed:
+            entry = _Indexed(
+                chunk["chunk_index"], chunk["page_num"], chunk["bbox"], chunk["vector"]
+            )
+            self._by_text.setdefault(text_hash(chunk["text"]), []).append(entry)
+            self._indexed.add(entry.chunk_index)
+        self._kept: set[int] = set()
+        self._written: set[int] = set()
+        self.stats = DiffStats()
+
+    def __len__(self) -> int:
+        """Number of chunks of the indexed version."""
+        return len(self._indexed)
+
+    def match(self, batch: list[Chunk]) -> None:
+        for chunk in batch:
+            candidates = self._by_text.get(text_hash(chunk.text))
+            if not candidates:
+                self.stats.added += 1
+                self._written.add(chunk.chunk_index)
+                continue
+
+            # Repeated text (boilerplate) matches its own position first
+            match = next((c for c in candidates if c.same_position(chunk)), candidates[0])
+            candidates.remove(match)
+            if chunk.embedding is None:
+                chunk.embedding = match.vector.tolist()
+
+            if match.same_position(chunk):
+                self.stats.unchanged += 1
+                self._kept.add(chunk.chunk_index)
+            else:
+                self.stats.moved += 1
+                self._written.add(chunk.chunk_index)
+
+    def to_store(self, batch: list[Chunk]) -> list[Chunk]:
+        """The chunks of a matched batch the indexes need: added and moved."""
+        return [chunk for chunk in batch if chunk.chunk_index in self._written]
+
+    def removed_ids(self, file_id: str) -> list[str]:
+        """Ids of indexed chunks that nothing in the new version overwrote."""
+        removed = sorted(self._indexed - self._kept - self._written)
+        self.stats.removed = len(removed)
+        return [make_chunk_id(file_id, chunk_index) for chunk_index in removed]
@@ -0,0 +1,120 @@
+"""
+Ingestion instrumentation — where a document's processing time goes.
+
+An ``IngestTrace`` follows one document through the worker. Stages are
+timed with ``span()`` (or by wrapping the pipeline's callables with
+``timed()``/``timed_iter()``), volumes are added with ``count()``, and
+``finish()`` publishes everything to the process metrics and returns a
+summary for the ``files.ingest_stats`` column.
+
+Stages: metadata, download, diff, extract, chunk, embed, store, finalize.
+Diff is the read of the file's indexed chunks a re-ingest is compared to.
+Extract, chunk, embed and store run interleaved in one pipeline; each
+gets only its own share (chunk is what remains once the others are
+subtracted from the pipeline's wall time).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, ParamSpec, TypeVar
+
+from app.core.metrics import get_metrics_registry
+
+P = ParamSpec("P")
+R = TypeVar("R")
+T = TypeVar("T")
+
+_registry = get_metrics_registry()
+
+STAGE_SECONDS = _registry.histogram(
+    "ingest_stage_seconds",
+    "Time spent per ingestion stage, per document",
+    ("stage",),
+)
+DOCUMENT_SECONDS = _registry.histogram(
+    "ingest_document_seconds",
+    "End-to-end processing time per document",
+    ("status",),
+)
+DOCUMENTS = _registry.counter(
+    "ingest_documents_total",
+    "Documents processed, by outcome",
+    ("status",),
+)
+VOLUME = {
+    name: _registry.counter(f"ingest_{name}_total", help)
+    for name, help in (
+        ("bytes", "PDF bytes downloaded for ingestion"),
+        ("pages", "Pages extracted"),
+        ("chunks", "Chunks produced"),
+        ("embeddings", "Chunk embeddings computed"),
+    )
+}
+
+
+class IngestTrace:
+    """Stage timings and volumes of one document. Thread-safe."""
+
+    def __init__(self, file_id: str):
+        self.file_id = file_id
+        self.stages: dict[str, float] = {}
+        self.counts: dict[str, int] = dict.fromkeys(VOLUME, 0)
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, **amounts: int) -> None:
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counts[name] += amount
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str, fn: Callable[P, R]) -> Callable[P, R]:
+        """``fn``, with every call's duration added to ``stage``."""
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with self.span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def timed_iter(self, stage: str, items: Iterable[T]) -> Iterator[T]:
+        """``items``, with the time spent producing each one added to ``stage``."""
+        iterator = iter(items)
+        while True:
+            with self.span(stage):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def finish(self, status: str) -> dict:
+        """Publish to the process metrics; returns the per-document summary."""
+        elapsed = time.perf_counter() - self._started
+        with self._lock:
+            stages = dict(self.stages)
+            counts = dict(self.counts)
+
+        for stage, seconds in stages.items():
+            STAGE_SECONDS.observe(seconds, stage=stage)
+        for name, amount in counts.items():
+            VOLUME[name].inc(amount)
+        DOCUMENT_SECONDS.observe(elapsed, status=status)
+        DOCUMENTS.inc(status=status)
+
+        return {
+            "status": status,
+            "seconds": round(elapsed, 4),
+            "stages": {stage: round(seconds, 4) for stage, seconds in stages.items()},
+            **counts,
+        }
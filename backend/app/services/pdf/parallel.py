@@ -0,0 +1,142 @@
+"""
+Parallel page extraction — splits a document into page ranges and
+extracts them on a process pool.
+
+Each worker opens the document from a file path by itself and returns
+compact tuples for its pages. The parent yields them back in page order.
+This lets large documents use every core, and it keeps PyMuPDF off the
+API process's event loop.
+"""
+
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator
+
+import pymupdf
+
+from app.core.config import get_settings
+from app.services.pdf.extractor import ExtractedPage, TextBlock, Word, iter_pages
+
+logger = logging.getLogger(__name__)
+
+# (page_num, width, height, blocks, words), blocks/words as plain tuples
+# — cheap to pickle (and to write as JSON, see ``checkpoint``)
+PackedPage = tuple[
+    int,
+    float,
+    float,
+    list[tuple[str, float, float, float, float, list[tuple[float, float, float, float]]]],
+    list[tuple[str, float, float, float, float, int]],
+]
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _worker_count() -> int:
+    return get_settings().extraction_workers or os.cpu_count() or 1
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Shared extraction pool, created on first use."""
+    global _pool
+    if _pool is None:
+        workers = _worker_count()
+        # "spawn" keeps workers independent of the API process's threads
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info("Started PDF extraction pool with %d workers", workers)
+    return _pool
+
+
+def shutdown_extraction_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# ── Worker side ──────────────────────────────────────────────────────────────
+
+
+def pack_page(page: ExtractedPage) -> PackedPage:
+    return (
+        page.page_num,
+        page.width,
+        page.height,
+        [(b.text, b.x0, b.y0, b.x1, b.y1, b.lines) for b in page.blocks],
+        [tuple(w) for w in page.words],
+    )
+
+
+def _extract_range(pdf_path: str, start: int, stop: int) -> list[PackedPage]:
+    """Runs in a pool worker: extract pages ``[start, stop)`` of one file."""
+    with pymupdf.open(pdf_path) as doc:
+        return [pack_page(page) for page in iter_pages(doc, start, stop)]
+
+
+# ── Parent side ──────────────────────────────────────────────────────────────
+
+
+def unpack_page(packed: PackedPage) -> ExtractedPage:
+    page_num, width, height, blocks, words = packed
+    return ExtractedPage(
+        page_num=page_num,
+        width=width,
+        height=height,
+        blocks=[TextBlock(*block) for block in blocks],
+        words=[Word(*word) for word in words],
+    )
+
+
+def iter_pages_parallel(
+    pdf_path: str,
+    page_count: int,
+    range_size: int | None = None,
+    start: int = 0,
+) -> Iterator[list[ExtractedPage]]:
+    """
+    Extract a document on the process pool, yielding one page batch per
+    range in page order.
+
+    At most ``2 × workers`` ranges are in flight, so memory stays bounded
+    even when the consumer is slower than the extractors.
+
+    Args:
+        pdf_path: Path to the PDF on local disk (workers open it themselves)
+        page_count: Number of pages in the document
+        range_size: Pages per task (defaults to ``extraction_range_pages``)
+        start: First page index to extract (0-based)
+    """
+    settings = get_settings()
+    pool = get_extraction_pool()
+    range_size = range_size or settings.extraction_range_pages
+    max_in_flight = _worker_count() * 2
+
+    ranges = iter(
+        (first, min(first + range_size, page_count))
+        for first in range(start, page_count, range_size)
+    )
+    in_flight: deque[Future] = deque()
+
+    def submit_next() -> None:
+        next_range = next(ranges, None)
+        if next_range is not None:
+            in_flight.append(pool.submit(_extract_range, pdf_path, *next_range))
+
+    try:
+        for _ in range(max_in_flight):
+            submit_next()
+
+        while in_flight:
+            packed_pages = in_flight.popleft().result()
+            submit_next()
+            yield [unpack_page(packed) for packed in packed_pages]
+    finally:
+        # Consumer stopped early (error or close) — drop queued work
+        for future in in_flight:
+            future.cancel()
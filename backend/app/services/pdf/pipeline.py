@@ -0,0 +1,159 @@
+"""
+Streaming ingestion pipeline — extract → chunk → embed → store.
+
+Each stage is a generator pulling from the one before it, so only one
+batch of pages and one batch of chunks is alive at any time. Peak memory
+is set by the batch sizes, not by the number of pages in the document.
+"""
+
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Iterable, Iterator, TypeVar
+
+import pymupdf
+
+from app.services.pdf.chunker import (
+    DEFAULT_OVERLAP_TOKENS,
+    DEFAULT_TARGET_TOKENS,
+    Chunk,
+    chunk_pages,
+)
+from app.services.pdf.extractor import ExtractedPage, iter_pages
+
+T = TypeVar("T")
+
+# Bump whenever extraction, chunking or embedding output changes, so
+# anything cached from an older pipeline is no longer reused.
+PIPELINE_VERSION = 3
+
+# texts → one vector per text, in the same order
+EmbedFn = Callable[[list[str]], list[list[float]]]
+# persists a batch of (embedded) chunks
+StoreFn = Callable[[list[Chunk]], None]
+
+
+@dataclass
+class PipelineStats:
+    """Counters collected while the pipeline runs."""
+    pages: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    stored: int = 0
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Yield lists of at most ``size`` items."""
+    if size < 1:
+        raise ValueError("batch size must be at least 1")
+
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def tap(batches: Iterable[list[T]], observe: Callable[[list[T]], None]) -> Iterator[list[T]]:
+    """Pass batches through unchanged, showing each to ``observe`` first."""
+    for batch in batches:
+        observe(batch)
+        yield batch
+
+
+# ── Stages ───────────────────────────────────────────────────────────────────
+
+
+def extract_stage(
+    doc: pymupdf.Document,
+    page_batch_size: int,
+    start: int = 0,
+) -> Iterator[list[ExtractedPage]]:
+    """Extract pages one at a time (from page index ``start``) and hand
+    them on in bounded batches."""
+    yield from batched(iter_pages(doc, start), page_batch_size)
+
+
+def chunk_stage(
+    page_batches: Iterable[list[ExtractedPage]],
+    chunk_batch_size: int,
+    stats: PipelineStats,
+    chunk_tokens: int = DEFAULT_TARGET_TOKENS,
+    chunk_overlap: int = DEFAULT_OVERLAP_TOKENS,
+) -> Iterator[list[Chunk]]:
+    """Chunk pages as they arrive and re-batch the chunks."""
+
+    def pages() -> Iterator[ExtractedPage]:
+        for batch in page_batches:
+            stats.pages += len(batch)
+            yield from batch
+
+    chunks = chunk_pages(pages(), chunk_tokens, chunk_overlap)
+    for batch in batched(chunks, chunk_batch_size):
+        stats.chunks += len(batch)
+        yield batch
+
+
+def embed_stage(
+    chunk_batches: Iterable[list[Chunk]],
+    embed: EmbedFn | None,
+    stats: PipelineStats,
+) -> Iterator[list[Chunk]]:
+    """Attach an embedding to every chunk in each batch that has none yet."""
+    for batch in chunk_batches:
+        missing = [chunk for chunk in batch if chunk.embedding is None]
+        if embed is not None and missing:
+            vectors = embed([chunk.text for chunk in missing])
+            for chunk, vector in zip(missing, vectors, strict=True):
+                chunk.embedding = vector
+            stats.embedded += len(missing)
+        yield batch
+
+
+def store_stage(
+    chunk_batches: Iterable[list[Chunk]],
+    store: StoreFn | None,
+    stats: PipelineStats,
+) -> None:
+    """Drain the pipeline, persisting each batch as it completes."""
+    for batch in chunk_batches:
+        if store is not None:
+            store(batch)
+            stats.stored += len(batch)
+
+
+# ── Entry point ──────────────────────────────────────────────────────────────
+
+
+def run_pipeline(
+    page_batches: Iterable[list[ExtractedPage]],
+    *,
+    embed: EmbedFn | None = None,
+    store: StoreFn | None = None,
+    chunk_batch_size: int = 64,
+    chunk_tokens: int = DEFAULT_TARGET_TOKENS,
+    chunk_overlap: int = DEFAULT_OVERLAP_TOKENS,
+    reuse: Callable[[list[Chunk]], None] | None = None,
+) -> PipelineStats:
+    """
+    Run chunk → embed → store over a stream of page batches.
+
+    Args:
+        page_batches: Batches of extracted pages, in page order
+        embed: Embedding function; chunks pass through unembedded if None
+        store: Sink for finished chunk batches; batches are dropped if None
+        chunk_batch_size: Number of chunks per embed/store call
+        chunk_tokens: Target size of a chunk, in (estimated) tokens
+        chunk_overlap: Tokens shared by consecutive chunks of a page
+        reuse: Sees each chunk batch before embedding; chunks it attaches
+            an embedding to aren't embedded again
+
+    Returns:
+        Counters for pages, chunks, embeddings and stored chunks
+    """
+    stats = PipelineStats()
+
+    chunks = chunk_stage(page_batches, chunk_batch_size, stats, chunk_tokens, chunk_overlap)
+    if reuse is not None:
+        chunks = tap(chunks, reuse)
+    embedded = embed_stage(chunks, embed, stats)
+    store_stage(embedded, store, stats)
+
+    return stats
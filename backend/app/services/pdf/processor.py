@@ -4,18 +4,58 @@ Main PDF processing orchestrator.
 Coordinates the pipeline: download → extract → chunk → embed → store.
 """
 
+import asyncio
 import logging
-from typing import Any
+import os
+import tempfile
+import time
+from functools import partial
+from itertools import chain
+from typing import Any, Callable, Iterable
 
-from app.core.supabase import get_supabase
-from app.core.config import get_settings
+from app.core.supabase import get_async_supabase
+from app.core.config import Settings, get_settings
+from app.services.embeddings import get_embedding_service
+from app.services.pdf.checkpoint import IngestCheckpoint, get_checkpoint_store
+from app.services.pdf.chunker import Chunk
+from app.services.pdf.dedup import get_chunk_registry
+from app.services.pdf.download import DownloadedPdf, download_pdf
+from app.services.pdf.extractor import ExtractedPage, UnreadablePdfError, open_pdf
+from app.services.pdf.highlight import get_highlight_service
+from app.services.pdf.incremental import ChunkDiff
+from app.services.pdf.instrumentation import IngestTrace
+from app.services.pdf.parallel import iter_pages_parallel
+from app.services.scheduler import cpu_bound
+from app.services.pdf.pipeline import (
+    EmbedFn,
+    PipelineStats,
+    StoreFn,
+    extract_stage,
+    run_pipeline,
+    store_stage,
+    tap,
+)
+from app.services.search.indexing import (
+    FileIndexWriter,
+    delete_chunks_from_indexes,
+    delete_chunks_from_vector_store,
+    flush_indexes,
+    get_dense_index,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class DocumentProcessingError(Exception):
-    """Raised when document processing fails at any stage."""
-    pass
+    """
+    Raised when document processing fails at any stage. ``retryable``
+    is False when another attempt can't succeed: the file row is gone,
+    the object is missing from storage, or the PDF can't be parsed.
+    """
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
 
 
 async def process_pdf_document(file_id: str) -> None:
@@ -31,7 +71,18 @@ async def process_pdf_document(file_id: str) -> None:
       6. Store chunks and embeddings in vector database
       7. Update file status to 'processed'
     
+    A file that is already indexed (a revised version replaced it, or a
+    retry) is diffed chunk by chunk against its indexed version: only
+    new or changed chunks are embedded, moved ones are re-stored with
+    their vectors and removed ones deleted (see ``incremental``).
+    
+    Progress is checkpointed batch by batch (see ``checkpoint``): a retry
+    after a crash or failure replays the pages and vectors the previous
+    attempt finished and only extracts/embeds the rest.
+    
     If any stage fails, update status to 'failed' and raise exception.
+    Either way, per-stage timings and volumes are recorded on the row
+    (``ingest_stats``) and in the process metrics.
     
     Args:
         file_id: UUID of the file record in the database
@@ -39,90 +90,393 @@ async def process_pdf_document(file_id: str) -> None:
     Raises:
         DocumentProcessingError: If any processing stage fails
     """
-    supabase = get_supabase()
+    supabase = await get_async_supabase()
     settings = get_settings()
+    trace = IngestTrace(file_id)
+    checkpoint: IngestCheckpoint | None = None
+    pdf: DownloadedPdf | None = None
+    writer: FileIndexWriter | None = None
     
     try:
         # ── Stage 1: Fetch file metadata ─────────────────────────────────
         logger.info(f"[{file_id}] Fetching file metadata")
         
-        result = supabase.table("files").select(
-            "id, storage_path, original_name, user_id"
-        ).eq("id", file_id).maybe_single().execute()
+        with trace.span("metadata"):
+            result = await supabase.table("files").select(
+                "id, storage_path, original_name, user_id"
+            ).eq("id", file_id).maybe_single().execute()
+            
+            if not result or not result.data:
+                raise DocumentProcessingError(
+                    f"File {file_id} not found in database", retryable=False
+                )
+            
+            file_data = result.data
+            storage_path = file_data["storage_path"]
+            user_id = file_data["user_id"]
+            
+            # Update status to 'processing'
+            await supabase.table("files").update(
+                {"status": "processing"}
+            ).eq("id", file_id).execute()
         
-        if not result.data:
-            raise DocumentProcessingError(f"File {file_id} not found in database")
+        # ── Stage 2: Download PDF from storage ───────────────────────────
+        logger.info(f"[{file_id}] Downloading PDF from storage: {storage_path}")
         
-        file_data = result.data
-        storage_path = file_data["storage_path"]
+        # Large files are spilled to a temp file and parsed from disk
+        with trace.span("download"):
+            pdf = await download_pdf_from_storage(storage_path)
+            digest = pdf.digest
+        trace.count(bytes=pdf.size)
         
-        # Update status to 'processing'
-        supabase.table("files").update(
-            {"status": "processing"}
-        ).eq("id", file_id).execute()
+        # ── Stages 3-6: Extract → chunk → embed → store (streaming) ─────
+        # Runs in a thread so PyMuPDF never blocks the event loop.
+        # Whatever is already indexed for the file (an earlier version, or
+        # a failed attempt) is the baseline the new chunks are diffed
+        # against, so unchanged chunks are neither embedded nor rewritten.
+        with trace.span("diff"):
+            indexed = await asyncio.to_thread(
+                get_dense_index().file_chunks, user_id, file_id
+            )
+        diff = ChunkDiff(indexed)
+        del indexed
+        if len(diff):
+            logger.info(f"[{file_id}] Re-ingesting against {len(diff)} indexed chunks")
+        # Local indexes, plus the vector store (uploads run in the background)
+        writer = FileIndexWriter(
+            user_id,
+            file_id,
+            title=file_data["original_name"],
+            loop=asyncio.get_running_loop(),
+        )
         
-        # ── Stage 2: Download PDF from storage ───────────────────────────
-        logger.info(f"[{file_id}] Downloading PDF from storage: {storage_path}")
+        if get_chunk_registry().contains(digest):
+            # Same bytes were ingested before (any account) — reuse the
+            # stored chunk vectors instead of extracting/embedding again
+            logger.info(f"[{file_id}] Duplicate content {digest[:12]}, reusing chunks")
+            stats = await asyncio.to_thread(
+                replay_registered_chunks, digest, settings, writer, trace, diff
+            )
+        else:
+            # Pipeline threads hand chunk batches to the shared embedding
+            # service, which batches them with other documents' chunks
+            embedder = get_embedding_service()
+            embed = partial(
+                embedder.embed_blocking, loop=asyncio.get_running_loop()
+            )
+            checkpoint = await asyncio.to_thread(
+                get_checkpoint_store().open, file_id, digest
+            )
+            if checkpoint.resumable:
+                logger.info(
+                    f"[{file_id}] Resuming from checkpoint: "
+                    f"{checkpoint.pages} pages, {checkpoint.chunks} chunks"
+                )
+            # Under the local scheduler, parsing waits for a CPU slot
+            async with cpu_bound():
+                stats = await asyncio.to_thread(
+                    run_ingest_pipeline,
+                    pdf.source, digest, settings, embed, writer, trace, diff,
+                    checkpoint,
+                )
+            logger.info(
+                f"[{file_id}] Embedding service: {embedder.metrics.snapshot()}"
+            )
         
-        pdf_bytes = download_pdf_from_storage(storage_path)
+        trace.count(pages=stats.pages, chunks=stats.chunks, embeddings=stats.embedded)
         
-        # Todo - rest of processing here
+        with trace.span("store"):
+            upload = await writer.finish()
+            removed = diff.removed_ids(file_id)
+            if removed:
+                await asyncio.to_thread(delete_chunks_from_indexes, user_id, removed)
+                await delete_chunks_from_vector_store(removed)
         
-        # ── Stage X: Mark as processed ───────────────────────────────────
-        logger.info(f"[{file_id}] Processing complete")
+        # Publishes the new chunks and invalidates the user's cached searches
+        with trace.span("finalize"):
+            await asyncio.to_thread(flush_indexes, user_id, file_id)
         
-        supabase.table("files").update(
+        # ── Stage 7: Mark as processed ───────────────────────────────────
+        ingest_stats = trace.finish("processed")
+        ingest_stats["diff"] = diff.stats.as_dict()
+        if checkpoint is not None and checkpoint.resumable:
+            ingest_stats["resumed"] = {
+                "pages": checkpoint.pages,
+                "chunks": checkpoint.restored,
+            }
+        if upload is not None:
+            ingest_stats["vector_store"] = upload.as_dict()
+        logger.info(
+            f"[{file_id}] Processing complete: "
+            f"{stats.pages} pages, {stats.chunks} chunks in "
+            f"{ingest_stats['seconds']:.2f}s {ingest_stats['stages']} "
+            f"{ingest_stats['diff']}"
+        )
+        
+        await supabase.table("files").update(
             {
                 "status": "processed",
                 "processed_at": "now()",
+                "content_hash": digest,
+                "page_count": stats.pages,
+                "ingest_stats": ingest_stats,
             }
         ).eq("id", file_id).execute()
         
+        # Nothing left to resume
+        await asyncio.to_thread(get_checkpoint_store().discard, file_id)
+        
     except Exception as exc:
         logger.error(f"[{file_id}] Processing failed: {exc}", exc_info=True)
         
+        if writer is not None:
+            try:
+                await writer.abort()
+            except Exception as abort_exc:
+                logger.error(f"[{file_id}] Failed to roll back indexes: {abort_exc}")
+        
         # Mark as failed in database
         try:
-            supabase.table("files").update(
+            await supabase.table("files").update(
                 {
                     "status": "failed",
                     "error_message": str(exc)[:500],  # Truncate if too long
+                    "ingest_stats": trace.finish("failed"),
                 }
             ).eq("id", file_id).execute()
         except Exception as db_exc:
             logger.error(f"[{file_id}] Failed to update status: {db_exc}")
         
-        raise DocumentProcessingError(f"Processing failed: {exc}") from exc
+        raise DocumentProcessingError(
+            f"Processing failed: {exc}", retryable=_is_transient(exc)
+        ) from exc
+    
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+        if pdf is not None:
+            pdf.close()
+
+
+def run_ingest_pipeline(
+    pdf: bytes | str,
+    digest: str,
+    settings: Settings,
+    embed: EmbedFn | None = None,
+    store: StoreFn | None = None,
+    trace: IngestTrace | None = None,
+    diff: ChunkDiff | None = None,
+    checkpoint: IngestCheckpoint | None = None,
+) -> PipelineStats:
+    """
+    Extract → chunk → embed → store over the whole document, given as
+    bytes or as the path of a local file.
+    
+    Pages flow through in bounded batches so memory stays flat no matter
+    how long the document is. Documents with at least
+    ``parallel_extraction_min_pages`` pages are extracted on the process
+    pool; smaller ones are extracted inline, where pool overhead would
+    dominate.
+    
+    Every stored chunk is also written to the content-hash registry under
+    ``digest``, and every page to the highlight text index; both are only
+    published if the whole run succeeds.
+    
+    With a ``trace``, the time of each stage is added to it. With a
+    ``diff``, chunks it matches reuse their indexed vectors and only the
+    added/moved ones reach ``store`` (the registry still gets them all).
+    With a ``checkpoint``, pages and vectors it holds are reused and every
+    stored batch is added to it.
+    
+    Blocking — call from a worker thread.
+    """
+    writer = get_chunk_registry().writer(digest)
+    text_index = get_highlight_service().builder()
+    
+    def reuse(batch: list[Chunk]) -> None:
+        # Checkpointed vectors first; the diff still classifies every chunk
+        if checkpoint is not None:
+            checkpoint.restore(batch)
+        if diff is not None:
+            diff.match(batch)
+    
+    def store_batch(batch: list[Chunk]) -> None:
+        writer.append(batch)
+        changed = batch if diff is None else diff.to_store(batch)
+        if store is not None and changed:
+            store(changed)
+        # Only once stored: a resumed run re-stores the rest
+        if checkpoint is not None:
+            checkpoint.append_chunks(batch)
+    
+    if trace is None:
+        trace = IngestTrace(digest[:12])   # timings go unreported
+    if embed is not None:
+        embed = trace.timed("embed", embed)
+    before = {stage: trace.stages.get(stage, 0.0) for stage in ("extract", "embed", "store")}
+    start = time.perf_counter()
+    
+    try:
+        stats = _run_extraction_pipeline(
+            pdf,
+            settings,
+            embed=embed,
+            store=trace.timed("store", store_batch),
+            on_pages=text_index.add_pages,
+            wrap_pages=partial(trace.timed_iter, "extract"),
+            reuse=reuse if diff is not None or checkpoint is not None else None,
+            checkpoint=checkpoint,
+        )
+    except BaseException:
+        writer.abort()
+        text_index.close()
+        raise
+    
+    # Chunking is interleaved with the other stages; it gets the rest
+    others = sum(trace.stages.get(stage, 0.0) - before[stage] for stage in before)
+    trace.add_time("chunk", max(time.perf_counter() - start - others, 0.0))
+    
+    with trace.span("store"):
+        try:
+            get_highlight_service().save(digest, text_index)
+        finally:
+            text_index.close()
+        writer.commit(pages=stats.pages)
+    return stats
+
+
+def replay_registered_chunks(
+    digest: str,
+    settings: Settings,
+    store: StoreFn | None = None,
+    trace: IngestTrace | None = None,
+    diff: ChunkDiff | None = None,
+) -> PipelineStats:
+    """
+    Feed the chunks recorded for ``digest`` straight into the store stage,
+    skipping extraction, chunking and embedding. ``store`` is bound to
+    the new file, so the reused chunks are tagged with its owner. With a
+    ``diff``, only chunks the file's indexed version lacks are stored.
+    
+    Blocking — call from a worker thread.
+    """
+    registry = get_chunk_registry()
+    stats = PipelineStats(pages=registry.page_count(digest))
+    if trace is not None and store is not None:
+        store = trace.timed("store", store)
+    
+    def counted(batches):
+        for batch in batches:
+            stats.chunks += len(batch)
+            if diff is not None:
+                diff.match(batch)
+                batch = diff.to_store(batch)
+            if batch:
+                yield batch
+    
+    store_stage(
+        counted(registry.iter_batches(digest, settings.ingest_chunk_batch_size)),
+        store,
+        stats,
+    )
+    return stats
+
+
+def _run_extraction_pipeline(
+    pdf: bytes | str,
+    settings: Settings,
+    embed: EmbedFn | None,
+    store: StoreFn | None,
+    on_pages: Callable[[list[ExtractedPage]], None] | None = None,
+    wrap_pages: Callable[[Iterable[list[ExtractedPage]]], Iterable[list[ExtractedPage]]] | None = None,
+    reuse: Callable[[list[Chunk]], None] | None = None,
+    checkpoint: IngestCheckpoint | None = None,
+) -> PipelineStats:
+    # Checkpointed pages are replayed; extraction picks up after them
+    start = checkpoint.pages if checkpoint is not None else 0
+    
+    def observed(page_batches):
+        if checkpoint is not None:
+            page_batches = chain(
+                checkpoint.iter_pages(settings.ingest_page_batch_size),
+                tap(page_batches, checkpoint.append_pages),
+            )
+        if on_pages is not None:
+            page_batches = tap(page_batches, on_pages)
+        return page_batches if wrap_pages is None else wrap_pages(page_batches)
+    
+    doc = open_pdf(pdf)
+    try:
+        page_count = doc.page_count
+        
+        if page_count - start < settings.parallel_extraction_min_pages:
+            return run_pipeline(
+                observed(extract_stage(doc, settings.ingest_page_batch_size, start)),
+                embed=embed,
+                store=store,
+                chunk_batch_size=settings.ingest_chunk_batch_size,
+                chunk_tokens=settings.chunk_target_tokens,
+                chunk_overlap=settings.chunk_overlap_tokens,
+                reuse=reuse,
+            )
+    finally:
+        doc.close()
+    
+    def parallel(path: str) -> PipelineStats:
+        return run_pipeline(
+            observed(iter_pages_parallel(path, page_count, start=start)),
+            embed=embed,
+            store=store,
+            chunk_batch_size=settings.ingest_chunk_batch_size,
+            chunk_tokens=settings.chunk_target_tokens,
+            chunk_overlap=settings.chunk_overlap_tokens,
+            reuse=reuse,
+        )
+    
+    # Pool workers open the document themselves, so hand them a file
+    # path instead of pickling the bytes into every task. A spilled
+    # download already is one.
+    if isinstance(pdf, str):
+        return parallel(pdf)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(pdf)
+    try:
+        return parallel(tmp.name)
+    finally:
+        os.unlink(tmp.name)
 
 
-def download_pdf_from_storage(storage_path: str) -> bytes:
+async def download_pdf_from_storage(
+    storage_path: str,
+    expected_digest: str | None = None,
+) -> DownloadedPdf:
     """
     Download a PDF file from Supabase Storage.
     
+    Streamed: small files are kept in memory, large ones spilled to a
+    temp file (see ``download``). Close the result when done with it.
+    
     Args:
         storage_path: Path to the file in storage (e.g., "user_id/file_id.pdf")
+        expected_digest: Content hash the file must have, if known
         
     Returns:
-        Raw bytes of the PDF file
+        The downloaded file, with its size and content hash
         
     Raises:
         DocumentProcessingError: If download fails
     """
-    settings = get_settings()
-    supabase = get_supabase()
-    
     try:
-        # Download the file bytes
-        response = supabase.storage.from_(
-            settings.supabase_storage_bucket
-        ).download(storage_path)
-        
-        if not response:
-            raise DocumentProcessingError(f"Failed to download: {storage_path}")
-        
-        return response
-        
+        return await download_pdf(storage_path, expected_digest)
     except Exception as exc:
         raise DocumentProcessingError(
-            f"Storage download failed for {storage_path}: {exc}"
+            f"Storage download failed for {storage_path}: {exc}",
+            retryable=getattr(exc, "retryable", True),
         ) from exc
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Whether a retry of the failed attempt might succeed."""
+    if isinstance(exc, UnreadablePdfError):
+        return False
+    return getattr(exc, "retryable", True)
@@ -0,0 +1,281 @@
+"""
+In-process job scheduler for running ingestion without Cloud Tasks.
+
+Jobs are keyed strings (file ids) handed to one async handler. The
+scheduler adds what an external queue would otherwise provide:
+
+  - priorities     — lower value runs first
+  - fairness       — within a priority, tenants take turns, so one user
+                     uploading thousands of files doesn't starve the rest
+  - concurrency    — ``concurrency`` jobs in flight; CPU-heavy sections
+                     (wrapped in ``cpu_bound()``) are further limited to
+                     ``cpu_concurrency`` at a time, so I/O-bound stages of
+                     other jobs keep going while PDFs are being parsed
+  - retries        — failed jobs are retried with exponential backoff and
+                     jitter, up to ``max_attempts``; an error whose
+                     ``retryable`` attribute is False fails the job at once
+  - backpressure   — ``submit`` waits while the tenant already has
+                     ``max_pending`` jobs queued (``try_submit`` refuses
+                     instead); per tenant, so one user's flood blocks only
+                     that user's enqueues
+"""
+
+import asyncio
+import logging
+import random
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+JobHandler = Callable[[str], Awaitable[None]]
+
+# CPU slots of the scheduler running the current job, if any
+_cpu_slots: ContextVar[asyncio.Semaphore | None] = ContextVar("cpu_slots", default=None)
+
+
+@asynccontextmanager
+async def cpu_bound() -> AsyncIterator[None]:
+    """
+    Mark a CPU-heavy section of a job. Under the scheduler it waits for a
+    CPU slot; anywhere else (e.g. the Cloud Tasks worker) it's a no-op.
+    """
+    slots = _cpu_slots.get()
+    if slots is None:
+        yield
+        return
+    async with slots:
+        yield
+
+
+@dataclass(slots=True)
+class _Job:
+    key: str
+    tenant: str
+    priority: int
+    attempts: int = 0
+
+
+@dataclass
+class SchedulerStats:
+    queued: int = 0
+    running: int = 0
+    retrying: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+
+
+class JobScheduler:
+    """
+    Priority queue with per-tenant round robin, drained by worker tasks.
+
+    Args:
+        handler: Runs one job; raising marks the attempt as failed
+        concurrency: Jobs in flight
+        cpu_concurrency: ``cpu_bound()`` sections running at once
+        max_pending: Queued jobs per tenant before ``submit`` starts waiting
+        max_attempts: Attempts per job, including the first
+        retry_delay: Backoff before the first retry, doubled per attempt
+        retry_max_delay: Backoff cap
+    """
+
+    def __init__(
+        self,
+        handler: JobHandler,
+        concurrency: int = 4,
+        cpu_concurrency: int = 2,
+        max_pending: int = 10_000,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+        retry_max_delay: float = 300.0,
+    ):
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self.stats = SchedulerStats()
+
+        self._cpu_slots = asyncio.Semaphore(cpu_concurrency)
+        # priority → tenant → jobs; tenants rotate to the back after each pick
+        self._queues: dict[int, OrderedDict[str, deque[_Job]]] = {}
+        self._queued_keys: set[str] = set()
+        self._queued_by_tenant: Counter[str] = Counter()
+        self._changed = asyncio.Condition()
+        self._retry_timers: set[asyncio.TimerHandle] = set()
+        self._requeues: set[asyncio.Task] = set()
+        self._unfinished = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers: list[asyncio.Task] = []
+
+    # ── Enqueueing ───────────────────────────────────────────────────────
+
+    async def submit(
+        self,
+        key: str,
+        tenant: str = "",
+        priority: int = PRIORITY_NORMAL,
+    ) -> bool:
+        """
+        Queue a job, waiting while the queue is full.
+
+        Returns:
+            False if a job with this key is already queued (not yet
+            started, or waiting to be retried)
+        """
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: self._queued_by_tenant[tenant] < self.max_pending
+            )
+            return self._enqueue(_Job(key, tenant, priority))
+
+    async def try_submit(
+        self,
+        key: str,
+        tenant: str = "",
+        priority: int = PRIORITY_NORMAL,
+    ) -> bool:
+        """Queue a job unless the queue is full (or the key already queued)."""
+        async with self._changed:
+            if self._queued_by_tenant[tenant] >= self.max_pending:
+                return False
+            return self._enqueue(_Job(key, tenant, priority))
+
+    def _enqueue(self, job: _Job) -> bool:
+        # Caller holds self._changed
+        if job.key in self._queued_keys:
+            return False
+        self._ensure_workers()
+        self._unfinished += 1
+        self._idle.clear()
+        self._push(job)
+        return True
+
+    def _push(self, job: _Job) -> None:
+        tenants = self._queues.setdefault(job.priority, OrderedDict())
+        tenants.setdefault(job.tenant, deque()).append(job)
+        self._queued_keys.add(job.key)
+        self._queued_by_tenant[job.tenant] += 1
+        self.stats.queued += 1
+        self._changed.notify_all()
+
+    def _pop(self) -> _Job | None:
+        for priority in sorted(self._queues):
+            tenants = self._queues[priority]
+            tenant, jobs = next(iter(tenants.items()))
+            job = jobs.popleft()
+            if jobs:
+                tenants.move_to_end(tenant)
+            else:
+                del tenants[tenant]
+                if not tenants:
+                    del self._queues[priority]
+            self._queued_keys.discard(job.key)
+            self._queued_by_tenant[job.tenant] -= 1
+            if not self._queued_by_tenant[job.tenant]:
+                del self._queued_by_tenant[job.tenant]
+            self.stats.queued -= 1
+            return job
+        return None
+
+    # ── Workers ──────────────────────────────────────────────────────────
+
+    def _ensure_workers(self) -> None:
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._run_worker(), name=f"scheduler-{i}")
+                for i in range(self.concurrency)
+            ]
+
+    async def _run_worker(self) -> None:
+        _cpu_slots.set(self._cpu_slots)
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: bool(self._queues))
+                job = self._pop()
+                # Room freed up for anyone blocked in submit()
+                self._changed.notify_all()
+
+            job.attempts += 1
+            self.stats.running += 1
+            try:
+                await self.handler(job.key)
+            except Exception as exc:
+                self.stats.running -= 1
+                self._failed(job, exc)
+            else:
+                self.stats.running -= 1
+                self.stats.succeeded += 1
+                self._finished()
+
+    def _failed(self, job: _Job, exc: Exception) -> None:
+        if job.attempts >= self.max_attempts or not getattr(exc, "retryable", True):
+            logger.error(f"[{job.key}] Job failed after {job.attempts} attempts: {exc}")
+            self.stats.failed += 1
+            self._finished()
+            return
+
+        if job.key in self._queued_keys:
+            # Submitted again while it ran: the queued job is the retry
+            logger.warning(
+                f"[{job.key}] Attempt {job.attempts} failed, already queued again: {exc}"
+            )
+            self._finished()
+            return
+
+        delay = min(self.retry_max_delay, self.retry_delay * 2 ** (job.attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        logger.warning(
+            f"[{job.key}] Attempt {job.attempts} failed, retrying in {delay:.1f}s: {exc}"
+        )
+        self.stats.retries += 1
+        self.stats.retrying += 1
+        # The waiting retry holds its key like a queued job, so submits
+        # of the same key are deduplicated against it
+        self._queued_keys.add(job.key)
+
+        def retry() -> None:
+            self._retry_timers.discard(timer)
+            self.stats.retrying -= 1
+            task = asyncio.create_task(self._requeue(job))
+            self._requeues.add(task)
+            task.add_done_callback(self._requeues.discard)
+
+        timer = asyncio.get_running_loop().call_later(delay, retry)
+        self._retry_timers.add(timer)
+
+    async def _requeue(self, job: _Job) -> None:
+        # Retries skip backpressure: the job was already accepted
+        async with self._changed:
+            self._push(job)
+
+    def _finished(self) -> None:
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._idle.set()
+
+    # ── Lifecycle ────────────────────────────────────────────────────────
+
+    async def join(self) -> None:
+        """Wait until every submitted job has succeeded or given up."""
+        await self._idle.wait()
+
+    async def aclose(self) -> None:
+        """Stop the workers. Queued jobs and pending retries are dropped."""
+        for timer in self._retry_timers:
+            timer.cancel()
+        self._retry_timers.clear()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
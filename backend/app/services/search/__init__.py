@@ -0,0 +1,88 @@
+"""
+Search service — local retrievers, fusion, reranking, index maintenance
+and the external vector store mirror.
+"""
+
+from app.services.search.bm25 import BM25Index
+from app.services.search.cache import QueryCache, QueryKey, get_query_cache
+from app.services.search.dense import DenseCompactor, DenseIndex
+from app.services.search.fusion import FusedHits, reciprocal_rank_fusion
+from app.services.search.hybrid import HybridResult, hybrid_search, search_documents
+from app.services.search.indexing import (
+    FileIndexWriter,
+    delete_chunks_from_indexes,
+    delete_chunks_from_vector_store,
+    delete_file_from_indexes,
+    delete_files_from_indexes,
+    delete_files_from_vector_store,
+    delete_user_from_indexes,
+    delete_user_from_vector_store,
+    flush_indexes,
+    get_dense_index,
+    get_sparse_index,
+    index_chunks,
+)
+from app.services.search.rerank import (
+    CohereRerankProvider,
+    FakeRerankProvider,
+    RerankerClient,
+    RerankProvider,
+    RerankProviderError,
+    get_reranker_client,
+)
+from app.services.search.types import SearchHits
+from app.services.search.vector_store import (
+    InMemoryVectorStore,
+    QdrantVectorStore,
+    UpsertSession,
+    UpsertStats,
+    VectorPoint,
+    VectorStore,
+    VectorStoreClient,
+    VectorStoreError,
+    close_vector_store_client,
+    get_vector_store_client,
+)
+
+__all__ = [
+    "BM25Index",
+    "CohereRerankProvider",
+    "DenseCompactor",
+    "DenseIndex",
+    "FakeRerankProvider",
+    "FileIndexWriter",
+    "FusedHits",
+    "HybridResult",
+    "InMemoryVectorStore",
+    "QdrantVectorStore",
+    "QueryCache",
+    "QueryKey",
+    "RerankProvider",
+    "RerankProviderError",
+    "RerankerClient",
+    "SearchHits",
+    "UpsertSession",
+    "UpsertStats",
+    "VectorPoint",
+    "VectorStore",
+    "VectorStoreClient",
+    "VectorStoreError",
+    "close_vector_store_client",
+    "delete_chunks_from_indexes",
+    "delete_chunks_from_vector_store",
+    "delete_file_from_indexes",
+    "delete_files_from_indexes",
+    "delete_files_from_vector_store",
+    "delete_user_from_indexes",
+    "delete_user_from_vector_store",
+    "flush_indexes",
+    "get_dense_index",
+    "get_query_cache",
+    "get_reranker_client",
+    "get_sparse_index",
+    "get_vector_store_client",
+    "hybrid_search",
+    "index_chunks",
+    "reciprocal_rank_fusion",
+    "search_documents",
+]
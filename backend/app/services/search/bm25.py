@@ -0,0 +1,457 @@
+"""
+In-process BM25 keyword index.
+
+The index is sharded per tenant (``user_id``), so a query only touches
+that user's postings and term statistics. Inside a shard:
+
+  • postings are one int32 doc-id array and one float32 tf array per
+    term, grown by doubling (no dicts of lists);
+  • per-document length, file and liveness are parallel NumPy arrays;
+  • deleting a file only clears its ``alive`` bits. Document frequency
+    is counted over live postings at query time, and the shard is
+    compacted once enough of it is dead;
+  • chunk ids are deterministic, so adding a chunk id that is already
+    indexed replaces the old document (re-indexing upserts).
+
+Scores are accumulated with vectorized scatter-adds into a dense score
+buffer, and top-k uses ``argpartition`` rather than a full sort.
+
+Shards persist as one ``.npz`` per tenant. They are loaded on first use,
+so the index also works as an offline stand-in for a hosted sparse
+index.
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+from app.services.search.types import SearchHits, make_chunk_id
+
+if TYPE_CHECKING:
+    from app.services.pdf.chunker import Chunk
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Compact a shard once this fraction of its documents is deleted
+_COMPACT_DEAD_RATIO = 0.25
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _grow(array: np.ndarray, needed: int) -> np.ndarray:
+    """Return ``array`` with capacity for at least ``needed`` items."""
+    if needed <= len(array):
+        return array
+    grown = np.zeros(max(needed, 2 * len(array), 16), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _Shard:
+    """BM25 postings and document table for one tenant."""
+
+    def __init__(self) -> None:
+        self.vocab: dict[str, int] = {}
+        self.post_docs: list[np.ndarray] = []    # int32 doc ids per term
+        self.post_tfs: list[np.ndarray] = []     # float32 term freqs per term
+        self.post_len: list[int] = []            # used length of each array
+
+        self.n_docs = 0
+        self.doc_len = np.zeros(0, dtype=np.int32)
+        self.doc_file = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.chunk_ids: list[str] = []
+        self._chunk_docs: dict[str, int] | None = None   # chunk id → live doc, built lazily
+
+        self.file_ids: list[str] = []
+        self.file_index: dict[str, int] = {}
+
+        self.live_docs = 0
+        self.live_len = 0
+        self.dirty = False
+
+    # ── Writes ───────────────────────────────────────────────────────────
+
+    def _file_number(self, file_id: str) -> int:
+        number = self.file_index.get(file_id)
+        if number is None:
+            number = len(self.file_ids)
+            self.file_ids.append(file_id)
+            self.file_index[file_id] = number
+        return number
+
+    def _live_docs_of(self, chunk_ids: Iterable[str]) -> np.ndarray:
+        if self._chunk_docs is None:
+            alive = self.alive[:self.n_docs]
+            self._chunk_docs = {
+                chunk_id: doc for doc, chunk_id in enumerate(self.chunk_ids) if alive[doc]
+            }
+        docs = [self._chunk_docs[c] for c in chunk_ids if c in self._chunk_docs]
+        return np.array(docs, dtype=np.int64)
+
+    def _kill(self, docs: np.ndarray) -> int:
+        docs = docs[self.alive[docs]]
+        if not len(docs):
+            return 0
+        self.alive[docs] = False
+        self.live_docs -= len(docs)
+        self.live_len -= int(self.doc_len[docs].sum())
+        self.dirty = True
+        if self._chunk_docs is not None:
+            for doc in docs.tolist():
+                self._chunk_docs.pop(self.chunk_ids[doc], None)
+
+        if self.n_docs - self.live_docs > _COMPACT_DEAD_RATIO * self.n_docs:
+            self.compact()
+        return len(docs)
+
+    def add_many(self, docs: list[tuple[str, str, str]]) -> None:
+        """Index ``(chunk_id, file_id, text)`` triples, replacing any live
+        documents with the same chunk ids."""
+        if not docs:
+            return
+        self._kill(self._live_docs_of(chunk_id for chunk_id, _, _ in docs))
+
+        first = self.n_docs
+        count = len(docs)
+        self.doc_len = _grow(self.doc_len, first + count)
+        self.doc_file = _grow(self.doc_file, first + count)
+        self.alive = _grow(self.alive, first + count)
+
+        term_ids: list[int] = []
+        doc_ids: list[int] = []
+        freqs: list[int] = []
+
+        for offset, (chunk_id, file_id, text) in enumerate(docs):
+            doc = first + offset
+            term_freqs = Counter(tokenize(text))
+            length = sum(term_freqs.values())
+
+            self.doc_len[doc] = length
+            self.doc_file[doc] = self._file_number(file_id)
+            self.alive[doc] = True
+            self.chunk_ids.append(chunk_id)
+            self.live_len += length
+            if self._chunk_docs is not None:
+                self._chunk_docs[chunk_id] = doc
+
+            for term, tf in term_freqs.items():
+                term_id = self.vocab.get(term)
+                if term_id is None:
+                    term_id = len(self.post_docs)
+                    self.vocab[term] = term_id
+                    self.post_docs.append(np.zeros(0, dtype=np.int32))
+                    self.post_tfs.append(np.zeros(0, dtype=np.float32))
+                    self.post_len.append(0)
+                term_ids.append(term_id)
+                doc_ids.append(doc)
+                freqs.append(tf)
+
+        self.n_docs += count
+        self.live_docs += count
+        self.dirty = True
+
+        # Group the new postings by term so each posting list is extended
+        # with one slice copy instead of one scalar write per document.
+        terms = np.array(term_ids, dtype=np.int32)
+        order = np.argsort(terms, kind="stable")
+        terms = terms[order]
+        new_docs = np.array(doc_ids, dtype=np.int32)[order]
+        new_tfs = np.array(freqs, dtype=np.float32)[order]
+
+        unique_terms, starts = np.unique(terms, return_index=True)
+        ends = np.append(starts[1:], len(terms))
+
+        for term_id, start, end in zip(
+            unique_terms.tolist(), starts.tolist(), ends.tolist()
+        ):
+            used = self.post_len[term_id]
+            size = used + end - start
+            self.post_docs[term_id] = _grow(self.post_docs[term_id], size)
+            self.post_tfs[term_id] = _grow(self.post_tfs[term_id], size)
+            self.post_docs[term_id][used:size] = new_docs[start:end]
+            self.post_tfs[term_id][used:size] = new_tfs[start:end]
+            self.post_len[term_id] = size
+
+    def delete_file(self, file_id: str) -> int:
+        return self.delete_files([file_id])
+
+    def delete_files(self, file_ids: Iterable[str]) -> int:
+        numbers = [self.file_index[f] for f in file_ids if f in self.file_index]
+        if not numbers:
+            return 0
+
+        n = self.n_docs
+        return self._kill(np.flatnonzero(np.isin(self.doc_file[:n], numbers)))
+
+    def delete_chunks(self, chunk_ids: Iterable[str]) -> int:
+        return self._kill(self._live_docs_of(chunk_ids))
+
+    def compact(self) -> None:
+        """Drop dead documents and renumber the survivors."""
+        n = self.n_docs
+        keep = np.flatnonzero(self.alive[:n])
+        remap = np.full(n, -1, dtype=np.int32)
+        remap[keep] = np.arange(len(keep), dtype=np.int32)
+
+        vocab: dict[str, int] = {}
+        post_docs, post_tfs, post_len = [], [], []
+        for term, term_id in self.vocab.items():
+            used = self.post_len[term_id]
+            new_docs = remap[self.post_docs[term_id][:used]]
+            live = new_docs >= 0
+            if not live.any():
+                continue
+            vocab[term] = len(post_docs)
+            post_docs.append(new_docs[live])
+            post_tfs.append(self.post_tfs[term_id][:used][live])
+            post_len.append(int(live.sum()))
+
+        self.vocab, self.post_docs, self.post_tfs, self.post_len = (
+            vocab, post_docs, post_tfs, post_len
+        )
+        self.doc_len = self.doc_len[keep]
+        self.doc_file = self.doc_file[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.chunk_ids = [self.chunk_ids[i] for i in keep]
+        self._chunk_docs = None
+        self.n_docs = len(keep)
+        self.dirty = True
+
+    # ── Reads ────────────────────────────────────────────────────────────
+
+    def search(
+        self,
+        terms: list[str],
+        k: int,
+        file_ids: Iterable[str] | None,
+        k1: float,
+        b: float,
+    ) -> SearchHits:
+        n = self.n_docs
+        if not n or not self.live_docs:
+            return SearchHits.empty()
+
+        alive = self.alive[:n]
+        avgdl = self.live_len / self.live_docs
+        scores = np.zeros(n, dtype=np.float32)
+
+        for term, qtf in Counter(terms).items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            used = self.post_len[term_id]
+            docs = self.post_docs[term_id][:used]
+            tfs = self.post_tfs[term_id][:used]
+
+            live = alive[docs]
+            df = int(live.sum())
+            if not df:
+                continue
+            docs, tfs = docs[live], tfs[live]
+
+            idf = np.log1p((self.live_docs - df + 0.5) / (df + 0.5))
+            norm = k1 * (1.0 - b + b * self.doc_len[docs] / np.float32(avgdl))
+            # doc ids are unique within a posting list, so fancy-index += is safe
+            scores[docs] += (qtf * idf * (k1 + 1.0)) * tfs / (tfs + norm)
+
+        if file_ids is not None:
+            allowed = [self.file_index[f] for f in file_ids if f in self.file_index]
+            scores[~np.isin(self.doc_file[:n], allowed)] = 0.0
+
+        candidates = np.flatnonzero(scores)
+        if not len(candidates):
+            return SearchHits.empty()
+
+        if len(candidates) > k:
+            top = np.argpartition(scores[candidates], -k)[-k:]
+            candidates = candidates[top]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return SearchHits(
+            ids=np.array([self.chunk_ids[i] for i in order], dtype=object),
+            scores=scores[order],
+        )
+
+    # ── Persistence ──────────────────────────────────────────────────────
+
+    def save(self, path: Path) -> None:
+        terms = list(self.vocab)
+        term_ids = [self.vocab[t] for t in terms]
+        lengths = np.array([self.post_len[t] for t in term_ids], dtype=np.int64)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        n = self.n_docs
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            terms=np.array(terms, dtype=str),
+            offsets=offsets,
+            docs=np.concatenate(
+                [self.post_docs[t][:self.post_len[t]] for t in term_ids]
+                or [np.zeros(0, dtype=np.int32)]
+            ),
+            tfs=np.concatenate(
+                [self.post_tfs[t][:self.post_len[t]] for t in term_ids]
+                or [np.zeros(0, dtype=np.float32)]
+            ),
+            doc_len=self.doc_len[:n],
+            doc_file=self.doc_file[:n],
+            alive=self.alive[:n],
+            chunk_ids=np.array(self.chunk_ids, dtype=str),
+            file_ids=np.array(self.file_ids, dtype=str),
+        )
+        tmp_path.replace(path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> "_Shard":
+        shard = cls()
+        with np.load(path) as data:
+            offsets = data["offsets"]
+            docs, tfs = data["docs"], data["tfs"]
+            for term_id, term in enumerate(data["terms"].tolist()):
+                start, stop = offsets[term_id], offsets[term_id + 1]
+                shard.vocab[term] = term_id
+                shard.post_docs.append(docs[start:stop])
+                shard.post_tfs.append(tfs[start:stop])
+                shard.post_len.append(int(stop - start))
+
+            shard.doc_len = data["doc_len"]
+            shard.doc_file = data["doc_file"]
+            shard.alive = data["alive"]
+            shard.chunk_ids = data["chunk_ids"].tolist()
+            shard.file_ids = data["file_ids"].tolist()
+
+        shard.n_docs = len(shard.chunk_ids)
+        shard.file_index = {f: i for i, f in enumerate(shard.file_ids)}
+        live = shard.alive[:shard.n_docs]
+        shard.live_docs = int(live.sum())
+        shard.live_len = int(shard.doc_len[:shard.n_docs][live].sum())
+        return shard
+
+
+class BM25Index:
+    """
+    Multi-tenant BM25 index.
+
+    Args:
+        directory: Where tenant shards are persisted; in-memory only if None
+        k1: Term-frequency saturation
+        b: Length-normalisation strength
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self._directory = Path(directory) if directory is not None else None
+        if self._directory is not None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self._shards: dict[str, _Shard] = {}
+        self._lock = threading.RLock()
+
+    def _path(self, user_id: str) -> Path | None:
+        if self._directory is None:
+            return None
+        return self._directory / f"{user_id}.npz"
+
+    def _shard(self, user_id: str, create: bool) -> _Shard | None:
+        shard = self._shards.get(user_id)
+        if shard is None:
+            path = self._path(user_id)
+            if path is not None and path.exists():
+                shard = _Shard.load(path)
+            elif create:
+                shard = _Shard()
+            else:
+                return None
+            self._shards[user_id] = shard
+        return shard
+
+    def add_chunks(
+        self,
+        user_id: str,
+        file_id: str,
+        chunks: Iterable["Chunk"],
+    ) -> None:
+        docs = [
+            (make_chunk_id(file_id, chunk.chunk_index), file_id, chunk.text)
+            for chunk in chunks
+        ]
+        with self._lock:
+            self._shard(user_id, create=True).add_many(docs)
+
+    def restore_chunks(
+        self,
+        user_id: str,
+        file_id: str,
+        rows: Iterable[dict],
+    ) -> None:
+        """Re-add chunks from stored rows (``chunk_id`` and ``text``, as
+        ``DenseIndex.file_chunks`` returns them), replacing live ones."""
+        docs = [(row["chunk_id"], file_id, row["text"]) for row in rows]
+        with self._lock:
+            self._shard(user_id, create=True).add_many(docs)
+
+    def delete_file(self, user_id: str, file_id: str) -> int:
+        """Remove every chunk of ``file_id``; returns the number removed."""
+        return self.delete_files(user_id, [file_id])
+
+    def delete_files(self, user_id: str, file_ids: Iterable[str]) -> int:
+        """Remove every chunk of several files in one pass."""
+        with self._lock:
+            shard = self._shard(user_id, create=False)
+            return shard.delete_files(file_ids) if shard is not None else 0
+
+    def delete_chunks(self, user_id: str, chunk_ids: Iterable[str]) -> int:
+        """Remove single chunks by id; returns the number removed."""
+        with self._lock:
+            shard = self._shard(user_id, create=False)
+            return shard.delete_chunks(chunk_ids) if shard is not None else 0
+
+    def delete_user(self, user_id: str) -> None:
+        with self._lock:
+            self._shards.pop(user_id, None)
+            path = self._path(user_id)
+            if path is not None:
+                path.unlink(missing_ok=True)
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        k: int = 50,
+        file_ids: Iterable[str] | None = None,
+    ) -> SearchHits:
+        """Top-``k`` chunks of ``user_id`` for ``query``, optionally within ``file_ids``."""
+        terms = tokenize(query)
+        with self._lock:
+            shard = self._shard(user_id, create=False)
+            if shard is None or not terms:
+                return SearchHits.empty()
+            return shard.search(terms, k, file_ids, self.k1, self.b)
+
+    def flush(self, user_id: str | None = None) -> None:
+        """Persist changed shards (one tenant, or all of them)."""
+        with self._lock:
+            user_ids = [user_id] if user_id is not None else list(self._shards)
+            for uid in user_ids:
+                shard = self._shards.get(uid)
+                path = self._path(uid)
+                if shard is not None and shard.dirty and path is not None:
+                    shard.save(path)
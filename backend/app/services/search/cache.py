@@ -0,0 +1,222 @@
+"""
+Per-tenant query result cache.
+
+Users keep asking the same (or nearly the same) question over the same
+documents. Every repeat would otherwise run embed → dense → sparse →
+RRF → rerank again. Results are cached in two tiers:
+
+  - ``fused``    — RRF candidates, before reranking
+  - ``reranked`` — final results, keyed also by the reranker settings
+
+so a rerank change can reuse the fused candidates. Keys are
+``(user_id, normalized query, document-scope hash, params)``. Entries
+expire after a TTL and are evicted LRU per tier.
+
+Invalidation is per tenant: anything that changes a tenant's corpus
+(upload finished, file or account deleted) drops all of that tenant's
+entries and bumps its generation. A search that started before the
+change cannot write its now-stale result back afterwards.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Iterable, NamedTuple
+
+from app.core.config import get_settings
+from app.services.embeddings.cache import normalize_text
+
+FUSED = "fused"
+RERANKED = "reranked"
+
+_TRAILING_PUNCTUATION = "?!.,;: "
+
+
+def normalize_query(query: str) -> str:
+    """Near-identical questions share a key: case, spacing and trailing
+    punctuation are ignored."""
+    return normalize_text(query).casefold().rstrip(_TRAILING_PUNCTUATION)
+
+
+def scope_hash(file_ids: Iterable[str] | None) -> str:
+    """Order-independent hash of the documents a search is limited to."""
+    if file_ids is None:
+        return "*"
+    joined = "\n".join(sorted(set(file_ids)))
+    return hashlib.blake2b(joined.encode(), digest_size=12).hexdigest()
+
+
+class QueryKey(NamedTuple):
+    user_id: str
+    query: str
+    scope: str
+    params: tuple
+
+    @classmethod
+    def build(
+        cls,
+        user_id: str,
+        query: str,
+        file_ids: Iterable[str] | None = None,
+        params: tuple[Hashable, ...] = (),
+    ) -> "QueryKey":
+        return cls(user_id, normalize_query(query), scope_hash(file_ids), params)
+
+
+@dataclass
+class TierStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    stale_writes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class _Tier:
+    max_entries: int
+    ttl: float
+    entries: OrderedDict = field(default_factory=OrderedDict)  # key → (expires, value)
+    stats: TierStats = field(default_factory=TierStats)
+
+
+class QueryCache:
+    """
+    Thread-safe tiered LRU/TTL cache of search results.
+
+    Args:
+        max_entries: Entries kept per tier across all tenants
+        ttl: Seconds an entry stays valid
+        reranked_ttl: TTL of the reranked tier (defaults to ``ttl``)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl: float = 600.0,
+        reranked_ttl: float | None = None,
+    ):
+        self._tiers = {
+            FUSED: _Tier(max_entries, ttl),
+            RERANKED: _Tier(max_entries, reranked_ttl if reranked_ttl is not None else ttl),
+        }
+        self._generations: dict[str, int] = {}
+        self._tenant_keys: dict[str, set[tuple[str, QueryKey]]] = {}
+        self._lock = threading.Lock()
+
+    # ── Lookups ──────────────────────────────────────────────────────────
+
+    def generation(self, user_id: str) -> int:
+        """Take this before computing a result; pass it to ``put``."""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def get(self, tier: str, key: QueryKey) -> Any | None:
+        with self._lock:
+            t = self._tiers[tier]
+            entry = t.entries.get(key)
+            if entry is None:
+                t.stats.misses += 1
+                return None
+
+            expires, value = entry
+            if expires <= time.monotonic():
+                self._drop(tier, key)
+                t.stats.expirations += 1
+                t.stats.misses += 1
+                return None
+
+            t.entries.move_to_end(key)
+            t.stats.hits += 1
+            return value
+
+    def put(self, tier: str, key: QueryKey, value: Any, generation: int) -> bool:
+        """
+        Store ``value`` unless the tenant's corpus changed since
+        ``generation`` was taken. Returns whether it was stored.
+        """
+        with self._lock:
+            t = self._tiers[tier]
+            if self._generations.get(key.user_id, 0) != generation:
+                t.stats.stale_writes += 1
+                return False
+
+            t.entries[key] = (time.monotonic() + t.ttl, value)
+            t.entries.move_to_end(key)
+            self._tenant_keys.setdefault(key.user_id, set()).add((tier, key))
+
+            while len(t.entries) > t.max_entries:
+                oldest = next(iter(t.entries))
+                self._drop(tier, oldest)
+                t.stats.evictions += 1
+            return True
+
+    # ── Invalidation ─────────────────────────────────────────────────────
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Drop every entry of a tenant. Returns how many were removed."""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            keys = self._tenant_keys.pop(user_id, set())
+            for tier, key in keys:
+                if self._tiers[tier].entries.pop(key, None) is not None:
+                    self._tiers[tier].stats.invalidations += 1
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            for t in self._tiers.values():
+                t.entries.clear()
+            self._tenant_keys.clear()
+            # Bump every known generation so in-flight writes are dropped
+            for user_id in self._generations:
+                self._generations[user_id] += 1
+
+    def _drop(self, tier: str, key: QueryKey) -> None:
+        self._tiers[tier].entries.pop(key, None)
+        keys = self._tenant_keys.get(key.user_id)
+        if keys is not None:
+            keys.discard((tier, key))
+            if not keys:
+                del self._tenant_keys[key.user_id]
+
+    # ── Stats ────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    "entries": len(t.entries),
+                    "hits": t.stats.hits,
+                    "misses": t.stats.misses,
+                    "hit_rate": round(t.stats.hit_rate, 4),
+                    "evictions": t.stats.evictions,
+                    "expirations": t.stats.expirations,
+                    "invalidations": t.stats.invalidations,
+                    "stale_writes": t.stats.stale_writes,
+                }
+                for name, t in self._tiers.items()
+            }
+
+
+_cache: QueryCache | None = None
+
+
+def get_query_cache() -> QueryCache:
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = QueryCache(
+            max_entries=settings.query_cache_max_entries,
+            ttl=settings.query_cache_ttl,
+            reranked_ttl=settings.query_cache_reranked_ttl,
+        )
+    return _cache
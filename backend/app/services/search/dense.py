@@ -0,0 +1,738 @@
+"""
+Memory-mapped dense vector index.
+
+Every tenant (``user_id``) has its own directory of immutable segments:
+
+  seg_<seq>.vec.npy    (rows × dim) float32/float16 unit vectors
+  seg_<seq>.meta.npy   structured rows: chunk id, file code, page_num,
+                       chunk_index, bounding box, text offset/length
+  seg_<seq>.txt        UTF-8 chunk texts, addressed by the meta rows
+  seg_<seq>.files.json file code → {file_id, title}
+  manifest.json        live segment numbers + tombstones
+
+Vectors and metadata are opened with ``mmap_mode="r"``, so a worker
+process maps them zero-copy instead of reading gigabytes into its heap.
+The OS page cache is shared between every process on the box.
+
+Writes only append. Chunks are buffered per tenant and sealed into a new
+segment on ``flush()`` (all of a tenant's buffered files, or just some).
+Deleting a file writes a tombstone ``file_id → seq``: rows of that file
+in segments up to ``seq`` are dead, and rows re-added later land in
+newer segments and stay live. Single
+chunks are tombstoned the same way by chunk id, which is how adding a
+chunk id that is already indexed overwrites the old row (chunk ids are
+deterministic, so re-indexing upserts). Compaction merges a tenant's
+segments, drops dead rows and clears the tombstones it applied.
+``DenseCompactor`` runs it in the background.
+
+Queries are batched matrix products over row blocks of each segment,
+with a partial-sort top-k merged across blocks.
+"""
+
+import fcntl
+import json
+import logging
+import shutil
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+from app.services.search.types import SearchHits, make_chunk_id
+
+if TYPE_CHECKING:
+    from app.services.pdf.chunker import Chunk
+
+logger = logging.getLogger(__name__)
+
+META_DTYPE = np.dtype([
+    ("chunk_id", "U36"),
+    ("file_code", "i4"),
+    ("page_num", "i4"),
+    ("chunk_index", "i4"),
+    ("bbox", "f4", (4,)),       # x0, y0, x1, y1
+    ("text_start", "i8"),
+    ("text_len", "i4"),
+])
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# ── Segments ─────────────────────────────────────────────────────────────────
+
+
+class _Segment:
+    """One sealed, read-only segment mapped from disk."""
+
+    def __init__(self, directory: Path, seq: int):
+        self.seq = seq
+        stem = directory / f"seg_{seq:08d}"
+        self.vectors = np.load(f"{stem}.vec.npy", mmap_mode="r")
+        self.meta = np.load(f"{stem}.meta.npy", mmap_mode="r")
+        text_path = Path(f"{stem}.txt")
+        self.text = (
+            np.memmap(text_path, dtype=np.uint8, mode="r")
+            if text_path.stat().st_size
+            else np.zeros(0, dtype=np.uint8)
+        )
+        self.files: list[dict] = json.loads(Path(f"{stem}.files.json").read_text())
+        self.file_codes = {f["file_id"]: code for code, f in enumerate(self.files)}
+
+        # Dead-row mask, recomputed whenever the tombstones change
+        self._dead: np.ndarray | None = None
+        self._dead_version = -1
+        # Rows in chunk id order, built on the first lookup; segments are
+        # immutable, so it never goes stale
+        self._id_order: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def dead_rows(
+        self,
+        tombstones: dict[str, int],
+        chunk_tombstones: dict[str, int],
+        version: int,
+    ) -> np.ndarray | None:
+        if self._dead_version != version:
+            dead_codes = [
+                code for file_id, code in self.file_codes.items()
+                if tombstones.get(file_id, -1) >= self.seq
+            ]
+            dead_chunks = [
+                chunk_id for chunk_id, seq in chunk_tombstones.items()
+                if seq >= self.seq
+            ]
+            dead = np.isin(self.meta["file_code"], dead_codes) if dead_codes else None
+            if dead_chunks:
+                chunks = np.isin(self.meta["chunk_id"], dead_chunks)
+                dead = chunks if dead is None else dead | chunks
+            self._dead = dead
+            self._dead_version = version
+        return self._dead
+
+    def rows_of(self, chunk_ids: np.ndarray) -> np.ndarray:
+        """Row of each of ``chunk_ids`` in this segment, -1 where absent."""
+        if not len(self):
+            return np.full(len(chunk_ids), -1)
+        ids = self.meta["chunk_id"]
+        if self._id_order is None:
+            self._id_order = np.argsort(ids)
+        pos = np.searchsorted(ids, chunk_ids, sorter=self._id_order)
+        rows = self._id_order[np.minimum(pos, len(ids) - 1)]
+        return np.where(ids[rows] == chunk_ids, rows, -1)
+
+    def row_text(self, row: int) -> str:
+        start, length = int(self.meta["text_start"][row]), int(self.meta["text_len"][row])
+        return bytes(self.text[start:start + length]).decode("utf-8")
+
+    def row_chunk(self, row: int) -> dict:
+        """A row as chunk fields (text, location, vector), for re-ingestion."""
+        meta = self.meta[row]
+        return {
+            "chunk_id": str(meta["chunk_id"]),
+            "text": self.row_text(row),
+            "page_num": int(meta["page_num"]),
+            "chunk_index": int(meta["chunk_index"]),
+            "bbox": tuple(float(v) for v in meta["bbox"]),
+            "vector": np.asarray(self.vectors[row], dtype=np.float32),
+        }
+
+    def row_metadata(self, row: int, user_id: str) -> dict:
+        meta = self.meta[row]
+        file_info = self.files[int(meta["file_code"])]
+        x0, y0, x1, y1 = (float(v) for v in meta["bbox"])
+        return {
+            "user_id": user_id,
+            "text": self.row_text(row),
+            "bounding_box": {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0},
+            "title": file_info["title"],
+            "page_num": int(meta["page_num"]),
+            "file_id": file_info["file_id"],
+            "chunk_index": int(meta["chunk_index"]),
+        }
+
+    @staticmethod
+    def write(
+        directory: Path,
+        seq: int,
+        vectors: np.ndarray,
+        meta: np.ndarray,
+        text: bytes,
+        files: list[dict],
+    ) -> None:
+        """Write a segment; it only becomes visible once the manifest lists it."""
+        stem = directory / f"seg_{seq:08d}"
+        np.save(f"{stem}.vec.npy", vectors)
+        np.save(f"{stem}.meta.npy", meta)
+        Path(f"{stem}.txt").write_bytes(text)
+        Path(f"{stem}.files.json").write_text(json.dumps(files))
+
+    @staticmethod
+    def remove(directory: Path, seq: int) -> None:
+        stem = directory / f"seg_{seq:08d}"
+        for suffix in (".vec.npy", ".meta.npy", ".txt", ".files.json"):
+            Path(f"{stem}{suffix}").unlink(missing_ok=True)
+
+
+@dataclass
+class _Pending:
+    """Rows added since the last flush, not yet visible to queries."""
+    vectors: list[np.ndarray] = field(default_factory=list)
+    rows: list[tuple] = field(default_factory=list)
+    texts: list[bytes] = field(default_factory=list)
+    files: dict[str, int] = field(default_factory=dict)
+    titles: list[str] = field(default_factory=list)
+    chunk_rows: dict[str, int] = field(default_factory=dict)
+
+    def keep(self, rows: list[int]) -> None:
+        self.rows = [self.rows[i] for i in rows]
+        self.vectors = [self.vectors[i] for i in rows]
+        self.texts = [self.texts[i] for i in rows]
+        self.chunk_rows = {row[0]: i for i, row in enumerate(self.rows)}
+
+    def split(self, file_ids: set[str]) -> tuple["_Pending", "_Pending"]:
+        """The rows of ``file_ids`` and those of the other files, as two
+        new buffers with their own file codes."""
+        taken, kept = _Pending(), _Pending()
+        codes = {code: file_id for file_id, code in self.files.items()}
+        for vector, row, text in zip(self.vectors, self.rows, self.texts):
+            file_id = codes[row[1]]
+            target = taken if file_id in file_ids else kept
+            code = target.files.get(file_id)
+            if code is None:
+                code = len(target.titles)
+                target.files[file_id] = code
+                target.titles.append(self.titles[row[1]])
+            target.chunk_rows[row[0]] = len(target.rows)
+            target.vectors.append(vector)
+            target.rows.append((row[0], code, *row[2:]))
+            target.texts.append(text)
+        return taken, kept
+
+
+class _Tenant:
+    """Segments, tombstones and pending rows of one user."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.lock = threading.RLock()
+        self.segments: list[_Segment] = []
+        self.tombstones: dict[str, int] = {}
+        self.chunk_tombstones: dict[str, int] = {}
+        self.tombstone_version = 0
+        self.next_seq = 1
+        self.pending = _Pending()
+        self.manifest_mtime = 0
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    def reload_if_changed(self) -> None:
+        """Pick up segments sealed or compacted by another process."""
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self.manifest_mtime:
+            return
+
+        manifest = json.loads(self.manifest_path.read_text())
+        current = {seg.seq: seg for seg in self.segments}
+        self.segments = [
+            current.get(seq) or _Segment(self.directory, seq)
+            for seq in manifest["segments"]
+        ]
+        self.tombstones = manifest["tombstones"]
+        self.chunk_tombstones = manifest.get("chunk_tombstones", {})
+        self.tombstone_version += 1
+        self.next_seq = manifest["next_seq"]
+        self.manifest_mtime = mtime
+
+    def write_manifest(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "segments": [seg.seq for seg in self.segments],
+            "tombstones": self.tombstones,
+            "chunk_tombstones": self.chunk_tombstones,
+            "next_seq": self.next_seq,
+        }))
+        tmp_path.replace(self.manifest_path)
+        self.manifest_mtime = self.manifest_path.stat().st_mtime_ns
+
+    @contextmanager
+    def write_lock(self):
+        """
+        Exclusive across threads *and* processes, with the manifest
+        refreshed first — several ingest workers may share one directory.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.lock, open(self.directory / ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.reload_if_changed()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def dead_rows(self, seg: _Segment) -> np.ndarray | None:
+        return seg.dead_rows(self.tombstones, self.chunk_tombstones, self.tombstone_version)
+
+    def live_rows(self) -> int:
+        total = 0
+        for seg in self.segments:
+            dead = self.dead_rows(seg)
+            total += len(seg) - (int(dead.sum()) if dead is not None else 0)
+        return total
+
+    def locate(self, chunk_ids: Iterable[str]) -> dict[str, tuple[_Segment, int]]:
+        """Segment and row of the live sealed row of each of ``chunk_ids``
+        that has one. The newest segment holding an id decides."""
+        remaining = np.array(list(chunk_ids), dtype=META_DTYPE["chunk_id"])
+        found: dict[str, tuple[_Segment, int]] = {}
+        for seg in reversed(self.segments):
+            if not remaining.size:
+                break
+            rows = seg.rows_of(remaining)
+            present = rows >= 0
+            dead = self.dead_rows(seg)
+            for chunk_id, row in zip(remaining[present].tolist(), rows[present].tolist()):
+                if dead is None or not dead[row]:
+                    found[chunk_id] = (seg, row)
+            remaining = remaining[~present]
+        return found
+
+    def tombstone_chunks(self, chunk_ids: Iterable[str]) -> bool:
+        """Kill the sealed rows of ``chunk_ids``; True if any were live."""
+        live = list(self.locate(chunk_ids))
+        if not live:
+            return False
+        seq = self.segments[-1].seq
+        for chunk_id in live:
+            self.chunk_tombstones[chunk_id] = seq
+        self.tombstone_version += 1
+        return True
+
+
+# ── Index ────────────────────────────────────────────────────────────────────
+
+
+class DenseIndex:
+    """
+    Multi-tenant, memory-mapped dense index.
+
+    Args:
+        directory: Root directory; one sub-directory per tenant
+        dtype: On-disk vector dtype, "float32" or "float16"
+        block_rows: Rows scored per matrix product (bounds scratch memory)
+        max_segments: Segment count above which a tenant needs compaction
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        dtype: str = "float32",
+        block_rows: int = 65536,
+        max_segments: int = 8,
+    ):
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        self.block_rows = block_rows
+        self.max_segments = max_segments
+        self._tenants: dict[str, _Tenant] = {}
+        self._lock = threading.Lock()
+
+    def _tenant(self, user_id: str) -> _Tenant:
+        with self._lock:
+            tenant = self._tenants.get(user_id)
+            if tenant is None:
+                tenant = _Tenant(self._directory / user_id)
+                self._tenants[user_id] = tenant
+        with tenant.lock:
+            tenant.reload_if_changed()
+        return tenant
+
+    # ── Writes ───────────────────────────────────────────────────────────
+
+    def add_chunks(
+        self,
+        user_id: str,
+        file_id: str,
+        chunks: Iterable["Chunk"],
+        title: str = "",
+    ) -> None:
+        """
+        Buffer embedded chunks; they become searchable on ``flush()``.
+        A chunk id that is already indexed (or buffered) is overwritten.
+        """
+        tenant = self._tenant(user_id)
+        with tenant.lock:
+            pending = tenant.pending
+            file_code = pending.files.get(file_id)
+            if file_code is None:
+                file_code = len(pending.titles)
+                pending.files[file_id] = file_code
+                pending.titles.append(title)
+
+            for chunk in chunks:
+                if chunk.embedding is None:
+                    continue
+                chunk_id = make_chunk_id(file_id, chunk.chunk_index)
+                text = chunk.text.encode("utf-8")
+                vector = np.asarray(chunk.embedding, dtype=np.float32)
+                row = (
+                    chunk_id,
+                    file_code,
+                    chunk.page_num,
+                    chunk.chunk_index,
+                    chunk.bbox,
+                    len(text),
+                )
+                existing = pending.chunk_rows.get(chunk_id)
+                if existing is not None:
+                    pending.vectors[existing] = vector
+                    pending.rows[existing] = row
+                    pending.texts[existing] = text
+                    continue
+                pending.chunk_rows[chunk_id] = len(pending.rows)
+                pending.vectors.append(vector)
+                pending.rows.append(row)
+                pending.texts.append(text)
+
+    def flush(self, user_id: str, file_ids: Iterable[str] | None = None) -> None:
+        """
+        Seal the tenant's pending rows into a new segment — only those of
+        ``file_ids`` if given, so files still being ingested stay buffered.
+        """
+        tenant = self._tenant(user_id)
+        with tenant.write_lock():
+            if file_ids is None:
+                pending, kept = tenant.pending, _Pending()
+            else:
+                pending, kept = tenant.pending.split(set(file_ids))
+            if not pending.rows:
+                return
+
+            meta = np.zeros(len(pending.rows), dtype=META_DTYPE)
+            offset = 0
+            for i, (chunk_id, code, page_num, chunk_index, bbox, length) in enumerate(
+                pending.rows
+            ):
+                meta[i] = (chunk_id, code, page_num, chunk_index, bbox, offset, length)
+                offset += length
+
+            vectors = _normalize(np.stack(pending.vectors)).astype(self.dtype)
+            files = [
+                {"file_id": file_id, "title": pending.titles[code]}
+                for file_id, code in pending.files.items()
+            ]
+
+            # Older rows of re-added chunk ids die with this segment's arrival
+            # (only files already sealed can have any)
+            reindexed = {
+                file_id for file_id in pending.files
+                if any(file_id in seg.file_codes for seg in tenant.segments)
+            }
+            if reindexed:
+                codes = {pending.files[file_id] for file_id in reindexed}
+                tenant.tombstone_chunks(row[0] for row in pending.rows if row[1] in codes)
+
+            seq = tenant.next_seq
+            _Segment.write(
+                tenant.directory, seq, vectors, meta, b"".join(pending.texts), files
+            )
+            tenant.segments.append(_Segment(tenant.directory, seq))
+            tenant.next_seq = seq + 1
+            tenant.pending = kept
+            tenant.write_manifest()
+
+    def discard_pending(self, user_id: str, file_id: str) -> None:
+        """Drop the buffered rows of ``file_id``; its sealed rows stay."""
+        tenant = self._tenant(user_id)
+        with tenant.lock:
+            pending = tenant.pending
+            code = pending.files.get(file_id)
+            if code is not None:
+                pending.keep([i for i, row in enumerate(pending.rows) if row[1] != code])
+
+    def delete_file(self, user_id: str, file_id: str) -> None:
+        """Tombstone every sealed row of ``file_id`` and drop pending ones."""
+        self.delete_files(user_id, [file_id])
+
+    def delete_files(self, user_id: str, file_ids: Iterable[str]) -> None:
+        """``delete_file`` for several files, with one manifest write."""
+        file_ids = set(file_ids)
+        tenant = self._tenant(user_id)
+        with tenant.write_lock():
+            pending = tenant.pending
+            codes = {pending.files[f] for f in file_ids if f in pending.files}
+            if codes:
+                pending.keep([i for i, row in enumerate(pending.rows) if row[1] not in codes])
+
+            sealed = {
+                file_id for file_id in file_ids
+                if any(file_id in seg.file_codes for seg in tenant.segments)
+            }
+            if not sealed:
+                return
+            for file_id in sealed:
+                tenant.tombstones[file_id] = tenant.segments[-1].seq
+            tenant.tombstone_version += 1
+            tenant.write_manifest()
+
+    def delete_chunks(self, user_id: str, chunk_ids: Iterable[str]) -> None:
+        """Tombstone the sealed rows of single chunks and drop pending ones."""
+        chunk_ids = set(chunk_ids)
+        tenant = self._tenant(user_id)
+        with tenant.write_lock():
+            pending = tenant.pending
+            if any(chunk_id in pending.chunk_rows for chunk_id in chunk_ids):
+                pending.keep([
+                    i for i, row in enumerate(pending.rows) if row[0] not in chunk_ids
+                ])
+            if tenant.segments and tenant.tombstone_chunks(chunk_ids):
+                tenant.write_manifest()
+
+    def delete_user(self, user_id: str) -> None:
+        with self._lock:
+            self._tenants.pop(user_id, None)
+        shutil.rmtree(self._directory / user_id, ignore_errors=True)
+
+    # ── Compaction ───────────────────────────────────────────────────────
+
+    def needs_compaction(self, user_id: str) -> bool:
+        tenant = self._tenant(user_id)
+        with tenant.lock:
+            return (
+                len(tenant.segments) > self.max_segments
+                or bool(tenant.tombstones)
+                or bool(tenant.chunk_tombstones)
+            )
+
+    def compact(self, user_id: str) -> None:
+        """Merge all of a tenant's segments into one, dropping dead rows."""
+        tenant = self._tenant(user_id)
+        with tenant.write_lock():
+            old = tenant.segments
+            if not old or (
+                len(old) == 1 and not tenant.tombstones and not tenant.chunk_tombstones
+            ):
+                return
+
+            live_masks = []
+            for seg in old:
+                dead = tenant.dead_rows(seg)
+                live_masks.append(~dead if dead is not None else np.ones(len(seg), bool))
+            total = int(sum(mask.sum() for mask in live_masks))
+
+            seq = old[-1].seq
+            new_seq = tenant.next_seq
+            stem = tenant.directory / f"seg_{new_seq:08d}"
+            dim = old[0].vectors.shape[1]
+
+            # Stream rows into the merged files instead of concatenating in RAM
+            vectors = np.lib.format.open_memmap(
+                f"{stem}.vec.npy", mode="w+", dtype=self.dtype, shape=(total, dim)
+            )
+            meta = np.lib.format.open_memmap(
+                f"{stem}.meta.npy", mode="w+", dtype=META_DTYPE, shape=(total,)
+            )
+            files: list[dict] = []
+            file_codes: dict[str, int] = {}
+            row = 0
+            text_offset = 0
+
+            with open(f"{stem}.txt", "wb") as text_out:
+                for seg, live in zip(old, live_masks):
+                    rows = np.flatnonzero(live)
+                    count = len(rows)
+                    if not count:
+                        continue
+
+                    remap = np.zeros(len(seg.files), dtype=np.int32)
+                    for code, info in enumerate(seg.files):
+                        if info["file_id"] not in file_codes:
+                            file_codes[info["file_id"]] = len(files)
+                            files.append(info)
+                        remap[code] = file_codes[info["file_id"]]
+
+                    vectors[row:row + count] = seg.vectors[rows]
+                    block = np.array(seg.meta[rows])
+                    block["file_code"] = remap[block["file_code"]]
+
+                    for i, src in enumerate(rows):
+                        start = int(seg.meta["text_start"][src])
+                        length = int(seg.meta["text_len"][src])
+                        text_out.write(bytes(seg.text[start:start + length]))
+                        block["text_start"][i] = text_offset
+                        text_offset += length
+
+                    meta[row:row + count] = block
+                    row += count
+
+            vectors.flush()
+            meta.flush()
+            del vectors, meta
+            Path(f"{stem}.files.json").write_text(json.dumps(files))
+
+            tenant.segments = [_Segment(tenant.directory, new_seq)] if total else []
+            tenant.next_seq = new_seq + 1
+            tenant.tombstones = {
+                file_id: ts for file_id, ts in tenant.tombstones.items() if ts > seq
+            }
+            tenant.chunk_tombstones = {
+                chunk_id: ts for chunk_id, ts in tenant.chunk_tombstones.items() if ts > seq
+            }
+            tenant.tombstone_version += 1
+            tenant.write_manifest()
+            if not total:
+                _Segment.remove(tenant.directory, new_seq)
+
+            # Readers that still map the old files keep their inodes alive
+            for seg in old:
+                _Segment.remove(tenant.directory, seg.seq)
+
+        logger.info("Compacted dense index for %s: %d segments → %d rows",
+                    user_id, len(old), total)
+
+    def tenants_needing_compaction(self) -> list[str]:
+        with self._lock:
+            user_ids = list(self._tenants)
+        return [uid for uid in user_ids if self.needs_compaction(uid)]
+
+    # ── Reads ────────────────────────────────────────────────────────────
+
+    def search(
+        self,
+        user_id: str,
+        vector: list[float] | np.ndarray,
+        k: int = 50,
+        file_ids: Iterable[str] | None = None,
+    ) -> SearchHits:
+        """Top-``k`` chunks by cosine similarity to ``vector``."""
+        query = np.asarray(vector, dtype=np.float32)[None, :]
+        return self.search_batch(user_id, query, k, file_ids)[0]
+
+    def search_batch(
+        self,
+        user_id: str,
+        vectors: np.ndarray,
+        k: int = 50,
+        file_ids: Iterable[str] | None = None,
+    ) -> list[SearchHits]:
+        """Top-``k`` per query row of ``vectors`` (m × dim), in one pass."""
+        queries = _normalize(np.asarray(vectors, dtype=np.float32))
+        m = len(queries)
+        allowed = set(file_ids) if file_ids is not None else None
+
+        tenant = self._tenant(user_id)
+        with tenant.lock:
+            segments = list(tenant.segments)
+            dead_masks = [tenant.dead_rows(seg) for seg in segments]
+
+        best_scores = np.full((m, 0), -np.inf, dtype=np.float32)
+        best_ids = np.empty((m, 0), dtype=object)
+
+        for seg, dead in zip(segments, dead_masks):
+            mask = ~dead if dead is not None else None
+            if allowed is not None:
+                codes = [c for f, c in seg.file_codes.items() if f in allowed]
+                in_scope = np.isin(seg.meta["file_code"], codes)
+                mask = in_scope if mask is None else mask & in_scope
+
+            for start in range(0, len(seg), self.block_rows):
+                stop = min(start + self.block_rows, len(seg))
+                block = np.asarray(seg.vectors[start:stop], dtype=np.float32)
+                scores = queries @ block.T                       # (m × rows)
+                if mask is not None:
+                    scores[:, ~mask[start:stop]] = -np.inf
+
+                take = min(k, stop - start)
+                top = np.argpartition(scores, -take, axis=1)[:, -take:]
+                top_scores = np.take_along_axis(scores, top, axis=1)
+                top_ids = seg.meta["chunk_id"][start:stop][top].astype(object)
+
+                best_scores = np.concatenate([best_scores, top_scores], axis=1)
+                best_ids = np.concatenate([best_ids, top_ids], axis=1)
+                if best_scores.shape[1] > k:
+                    keep = np.argpartition(best_scores, -k, axis=1)[:, -k:]
+                    best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                    best_ids = np.take_along_axis(best_ids, keep, axis=1)
+
+        results = []
+        for i in range(m):
+            order = np.argsort(-best_scores[i], kind="stable")
+            order = order[np.isfinite(best_scores[i][order])]
+            results.append(SearchHits(best_ids[i][order], best_scores[i][order]))
+        return results
+
+    def get_metadata(self, user_id: str, chunk_ids: Iterable[str]) -> dict[str, dict]:
+        """README-schema metadata (incl. text) for live chunks."""
+        tenant = self._tenant(user_id)
+        with tenant.lock:
+            return {
+                chunk_id: seg.row_metadata(row, user_id)
+                for chunk_id, (seg, row) in tenant.locate(chunk_ids).items()
+            }
+
+    def file_chunks(self, user_id: str, file_id: str) -> list[dict]:
+        """
+        Every live sealed chunk of ``file_id`` — text, location and vector
+        (normalized, as stored) — in chunk order.
+        """
+        tenant = self._tenant(user_id)
+        with tenant.lock:
+            chunks = []
+            for seg in tenant.segments:
+                code = seg.file_codes.get(file_id)
+                if code is None:
+                    continue
+                rows = seg.meta["file_code"] == code
+                dead = tenant.dead_rows(seg)
+                if dead is not None:
+                    rows &= ~dead
+                chunks.extend(seg.row_chunk(row) for row in np.flatnonzero(rows).tolist())
+        chunks.sort(key=lambda chunk: chunk["chunk_index"])
+        return chunks
+
+
+class DenseCompactor:
+    """Background thread compacting tenants that have too many segments or
+    outstanding tombstones."""
+
+    def __init__(self, index: DenseIndex, interval: float = 60.0):
+        self._index = index
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="dense-compactor", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            for user_id in self._index.tenants_needing_compaction():
+                try:
+                    self._index.compact(user_id)
+                except Exception as exc:
+                    logger.error("Dense compaction failed for %s: %s", user_id, exc)
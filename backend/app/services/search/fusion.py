@@ -0,0 +1,158 @@
+"""
+Reciprocal Rank Fusion over any number of retrievers.
+
+Each retriever contributes ``weight / (k + rank)`` for every id it
+returned. The fused score of an id is the sum over retrievers. All
+of the scoring — accumulation, top-k and the per-retriever breakdown —
+is done with NumPy: one ``bincount`` and one partial sort, with no
+per-candidate Python loops. String ids are interned to integer codes
+once first.
+
+Per-retriever ranks and contributions are returned for the fused top-k,
+which is what the "Show Reasoning" view displays.
+"""
+
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from app.services.search.types import SearchHits
+
+DEFAULT_RRF_K = 60
+
+
+@dataclass(slots=True)
+class FusedHits:
+    """Fused top-k, best first, with a per-retriever breakdown."""
+    ids: np.ndarray             # (top_k,) chunk ids
+    scores: np.ndarray          # (top_k,) fused RRF score
+    ranks: np.ndarray           # (top_k × retrievers) 1-based rank, 0 = not returned
+    contributions: np.ndarray   # (top_k × retrievers) weighted RRF term
+    retrievers: list[str]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def head(self, n: int) -> "FusedHits":
+        """The best ``n`` hits."""
+        return FusedHits(
+            self.ids[:n], self.scores[:n], self.ranks[:n], self.contributions[:n],
+            self.retrievers,
+        )
+
+    def explain(self, index: int) -> dict:
+        """Breakdown of one fused hit for the debug view."""
+        return {
+            "id": self.ids[index],
+            "score": float(self.scores[index]),
+            "retrievers": {
+                name: {
+                    "rank": int(self.ranks[index, r]) or None,
+                    "contribution": float(self.contributions[index, r]),
+                }
+                for r, name in enumerate(self.retrievers)
+            },
+        }
+
+
+def _factorize(ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ``(unique_ids, inverse)`` like ``np.unique(..., return_inverse=True)``,
+    minus the sort.
+
+    Integer ids go straight to NumPy. String ids are interned to dense
+    codes in a single hashing pass, which costs about a third of
+    sorting thousands of UUID strings.
+    """
+    if ids.dtype.kind in "iu":
+        return np.unique(ids, return_inverse=True)
+
+    codes: dict = {}
+    inverse = np.fromiter(
+        (codes.setdefault(i, len(codes)) for i in ids.tolist()),
+        dtype=np.int64,
+        count=len(ids),
+    )
+    unique_ids = np.empty(len(codes), dtype=object)
+    unique_ids[:] = list(codes)
+    return unique_ids, inverse
+
+
+def reciprocal_rank_fusion(
+    results: Mapping[str, SearchHits] | Sequence[SearchHits],
+    weights: Mapping[str, float] | Sequence[float] | None = None,
+    top_k: int = 50,
+    k: int = DEFAULT_RRF_K,
+) -> FusedHits:
+    """
+    Fuse ranked lists with weighted RRF.
+
+    Args:
+        results: Ranked hits per retriever, by name (or positionally)
+        weights: Per-retriever weight, same keys/order as ``results``;
+            all 1.0 if None
+        top_k: Number of fused results to return
+        k: RRF damping constant
+
+    Returns:
+        The fused top-k with ranks and contributions per retriever
+    """
+    if isinstance(results, Mapping):
+        names = list(results)
+        hit_lists = [results[name] for name in names]
+        if isinstance(weights, Mapping):
+            weights = [weights.get(name, 1.0) for name in names]
+    else:
+        hit_lists = list(results)
+        names = [f"retriever_{i}" for i in range(len(hit_lists))]
+
+    n = len(hit_lists)
+    weight_array = (
+        np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+    )
+    lengths = np.array([len(hits) for hits in hit_lists], dtype=np.int64)
+    total = int(lengths.sum())
+
+    if not total:
+        return FusedHits(
+            ids=np.empty(0, dtype=object),
+            scores=np.empty(0),
+            ranks=np.zeros((0, n), dtype=np.int32),
+            contributions=np.zeros((0, n)),
+            retrievers=names,
+        )
+
+    # Flatten every list into parallel (id, retriever, rank) arrays
+    all_ids = np.concatenate([np.asarray(hits.ids) for hits in hit_lists])
+    retriever = np.repeat(np.arange(n), lengths)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    rank = np.arange(total) - starts + 1
+
+    contribution = weight_array[retriever] / (k + rank)
+
+    unique_ids, inverse = _factorize(all_ids)
+    fused = np.bincount(inverse, weights=contribution, minlength=len(unique_ids))
+
+    take = min(top_k, len(unique_ids))
+    top = np.argpartition(-fused, take - 1)[:take]
+    top = top[np.argsort(-fused[top], kind="stable")]
+
+    # Scatter the per-retriever terms of the winners into (top_k × n)
+    position = np.full(len(unique_ids), -1, dtype=np.int64)
+    position[top] = np.arange(take)
+    row = position[inverse]
+    selected = row >= 0
+
+    ranks = np.zeros((take, n), dtype=np.int32)
+    contributions = np.zeros((take, n))
+    ranks[row[selected], retriever[selected]] = rank[selected]
+    contributions[row[selected], retriever[selected]] = contribution[selected]
+
+    return FusedHits(
+        ids=unique_ids[top],
+        scores=fused[top],
+        ranks=ranks,
+        contributions=contributions,
+        retrievers=names,
+    )
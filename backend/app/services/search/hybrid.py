@@ -0,0 +1,172 @@
+"""
+Hybrid search — dense + BM25 retrieval fused with RRF, then reranked.
+
+    query ─┬─ embed → dense ─┐
+           └─ BM25 ──────────┴─ RRF → fused candidates → rerank
+
+Results are served from the per-tenant query cache when possible. Every
+stage's hits are kept on the result for the "Show Reasoning" view.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, replace
+from typing import Iterable
+
+from app.services.embeddings import get_embedding_service
+from app.services.search.cache import FUSED, RERANKED, QueryKey, get_query_cache
+from app.services.search.fusion import FusedHits, reciprocal_rank_fusion
+from app.services.search.indexing import get_dense_index, get_sparse_index
+from app.services.search.rerank import RerankProviderError, get_reranker_client
+from app.services.search.types import SearchHits
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class HybridResult:
+    """Hits of every search stage, from raw retrievers to reranked."""
+    fused: FusedHits
+    dense: SearchHits
+    sparse: SearchHits
+    reranked: SearchHits | None = None
+    cached: bool = False
+
+    @property
+    def final(self) -> SearchHits:
+        """Reranked hits if reranking ran, otherwise the fused ranking."""
+        if self.reranked is not None:
+            return self.reranked
+        return SearchHits(ids=self.fused.ids, scores=self.fused.scores)
+
+
+async def hybrid_search(
+    user_id: str,
+    query: str,
+    file_ids: Iterable[str] | None = None,
+    top_k: int = 50,
+    candidates: int = 50,
+) -> HybridResult:
+    """
+    Run both retrievers for ``query`` over a tenant's documents and fuse.
+
+    Args:
+        user_id: Tenant to search
+        query: User question
+        file_ids: Limit the search to these files; all files if None
+        top_k: Fused candidates to return
+        candidates: Hits taken from each retriever
+
+    Returns:
+        Fused top-k with per-retriever hits
+    """
+    if file_ids is not None:
+        file_ids = list(file_ids)
+
+    cache = get_query_cache()
+    key = QueryKey.build(user_id, query, file_ids, params=(top_k, candidates))
+
+    hit = cache.get(FUSED, key)
+    if hit is not None:
+        return replace(hit, cached=True)
+
+    # Taken before searching: an upload/delete finishing mid-search makes
+    # this result stale, and the cache will refuse it
+    generation = cache.generation(user_id)
+
+    embedder = get_embedding_service()
+    dense_index = get_dense_index()
+    sparse_index = get_sparse_index()
+
+    async def dense_search() -> SearchHits:
+        [vector] = await embedder.embed([query])
+        return await asyncio.to_thread(
+            dense_index.search, user_id, vector, candidates, file_ids
+        )
+
+    dense_hits, sparse_hits = await asyncio.gather(
+        dense_search(),
+        asyncio.to_thread(sparse_index.search, user_id, query, candidates, file_ids),
+    )
+
+    fused = reciprocal_rank_fusion(
+        {"dense": dense_hits, "sparse": sparse_hits}, top_k=top_k
+    )
+    result = HybridResult(fused=fused, dense=dense_hits, sparse=sparse_hits)
+    cache.put(FUSED, key, result, generation)
+    return result
+
+
+async def search_documents(
+    user_id: str,
+    query: str,
+    file_ids: Iterable[str] | None = None,
+    top_k: int = 10,
+    rerank: bool = True,
+) -> HybridResult:
+    """
+    Hybrid search followed by reranking of the fused candidates.
+
+    Falls back to the fused order when ``rerank`` is False, no rerank
+    provider is configured or the provider fails; a fallback result is not
+    cached as reranked, so the next search tries the provider again.
+
+    Args:
+        user_id: Tenant to search
+        query: User question
+        file_ids: Limit the search to these files; all files if None
+        top_k: Final results to return
+        rerank: Whether to run the rerank stage
+
+    Returns:
+        Final top-k (``result.final``) with every stage's hits
+    """
+    if file_ids is not None:
+        file_ids = list(file_ids)
+
+    reranker = get_reranker_client() if rerank else None
+    if reranker is None:
+        return await hybrid_search(user_id, query, file_ids, top_k=top_k)
+
+    cache = get_query_cache()
+    key = QueryKey.build(
+        user_id,
+        query,
+        file_ids,
+        params=(top_k, reranker.model, reranker.max_candidates, reranker.score_gap),
+    )
+
+    hit = cache.get(RERANKED, key)
+    if hit is not None:
+        return replace(hit, cached=True)
+
+    generation = cache.generation(user_id)
+
+    result = await hybrid_search(
+        user_id, query, file_ids, top_k=max(top_k, reranker.max_candidates)
+    )
+
+    chunk_ids = result.fused.ids.tolist()
+    metadata = await asyncio.to_thread(
+        get_dense_index().get_metadata, user_id, chunk_ids
+    )
+    # A chunk can vanish between search and lookup if its file was deleted
+    live = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id in metadata]
+
+    try:
+        reranked = await reranker.rerank(
+            query,
+            [chunk_ids[i] for i in live],
+            [metadata[chunk_ids[i]]["text"] for i in live],
+            fused_scores=result.fused.scores[live],
+        )
+    except RerankProviderError as exc:
+        logger.warning("Rerank failed, serving the fused order: %s", exc)
+        return replace(result, fused=result.fused.head(top_k), cached=False)
+    result = replace(
+        result,
+        reranked=SearchHits(ids=reranked.ids[:top_k], scores=reranked.scores[:top_k]),
+        cached=False,
+    )
+    cache.put(RERANKED, key, result, generation)
+    return result
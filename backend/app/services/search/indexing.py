@@ -0,0 +1,252 @@
+"""
+Index maintenance — one place that keeps every search index in sync
+with the documents in the database.
+
+The ingestion pipeline writes through ``index_chunks`` (which upserts by
+chunk id) and ``delete_chunks_from_indexes``; file and account deletion
+go through ``delete_files_from_indexes``/``delete_user_from_indexes``.
+Deleting and flushing also invalidate the tenant's cached search results.
+
+When an external vector store is configured (see ``vector_store``), a
+``FileIndexWriter`` also uploads each file's chunks there, and the
+``*_from_vector_store`` coroutines mirror deletions.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.core.config import get_settings
+from app.services.search.bm25 import BM25Index
+from app.services.search.cache import get_query_cache
+from app.services.search.dense import DenseCompactor, DenseIndex
+from app.services.search.types import make_chunk_id
+from app.services.search.vector_store import (
+    UpsertStats,
+    VectorPoint,
+    get_vector_store_client,
+)
+
+if TYPE_CHECKING:
+    from app.services.pdf.chunker import Chunk
+
+logger = logging.getLogger(__name__)
+
+_sparse_index: BM25Index | None = None
+_dense_index: DenseIndex | None = None
+_compactor: DenseCompactor | None = None
+
+
+def get_sparse_index() -> BM25Index:
+    global _sparse_index
+    if _sparse_index is None:
+        settings = get_settings()
+        _sparse_index = BM25Index(Path(settings.search_index_dir) / "bm25")
+    return _sparse_index
+
+
+def get_dense_index() -> DenseIndex:
+    global _dense_index
+    if _dense_index is None:
+        settings = get_settings()
+        _dense_index = DenseIndex(
+            Path(settings.search_index_dir) / "dense",
+            dtype=settings.dense_index_dtype,
+        )
+    return _dense_index
+
+
+def start_dense_compactor() -> None:
+    global _compactor
+    if _compactor is None:
+        settings = get_settings()
+        _compactor = DenseCompactor(
+            get_dense_index(), interval=settings.dense_compaction_interval
+        )
+        _compactor.start()
+
+
+def stop_dense_compactor() -> None:
+    global _compactor
+    if _compactor is not None:
+        _compactor.stop()
+        _compactor = None
+
+
+def index_chunks(
+    user_id: str,
+    file_id: str,
+    chunks: list["Chunk"],
+    title: str = "",
+) -> None:
+    """Add (or overwrite) a batch of a file's chunks in every index. Blocking."""
+    get_sparse_index().add_chunks(user_id, file_id, chunks)
+    get_dense_index().add_chunks(user_id, file_id, chunks, title=title)
+
+
+class FileIndexWriter:
+    """
+    The ingestion pipeline's store function for one file.
+
+    Each call writes a chunk batch to the local indexes (``index_chunks``)
+    and, with a vector store configured, queues it for upload; uploads
+    run on ``loop`` while the pipeline goes on. Call the writer from a
+    pipeline thread, then ``finish()`` (or ``abort()``) on the loop.
+
+    ``abort()`` rolls the file back to its last flushed version: its
+    buffered dense rows are dropped, and the chunks written to BM25 and
+    the vector store are deleted, or restored from the flushed rows where
+    they overwrote one. Finish with ``flush_indexes(user_id, file_id)``,
+    so the tenant's other files in flight stay buffered and revertible.
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        file_id: str,
+        title: str = "",
+        loop: asyncio.AbstractEventLoop | None = None,
+    ):
+        self.user_id = user_id
+        self.file_id = file_id
+        self.title = title
+        self._loop = loop
+        client = get_vector_store_client() if loop is not None else None
+        self._client = client
+        self._upload = client.session(file_id) if client is not None else None
+        self._written: set[str] = set()
+
+    def __call__(self, chunks: list["Chunk"]) -> None:
+        self._written.update(
+            make_chunk_id(self.file_id, chunk.chunk_index) for chunk in chunks
+        )
+        index_chunks(self.user_id, self.file_id, chunks, title=self.title)
+        if self._upload is not None:
+            self._upload.upsert_blocking(self._points(chunks), self._loop)
+
+    def _points(self, chunks: list["Chunk"]) -> list[VectorPoint]:
+        return [
+            VectorPoint(
+                id=make_chunk_id(self.file_id, chunk.chunk_index),
+                vector=chunk.embedding,
+                payload=chunk.to_metadata(
+                    file_id=self.file_id, user_id=self.user_id, title=self.title
+                ),
+            )
+            for chunk in chunks
+        ]
+
+    async def finish(self) -> UpsertStats | None:
+        """Wait for the uploads; their stats, or None without a vector store."""
+        if self._upload is None:
+            return None
+        return await self._upload.finish()
+
+    async def abort(self) -> None:
+        """Cancel the uploads and roll back what was written (see above)."""
+        if self._upload is not None:
+            await self._upload.abort()
+        if not self._written:
+            return
+        stale, restored = await asyncio.to_thread(self._roll_back_local)
+        logger.info(
+            f"[{self.file_id}] Rolled back {len(self._written)} written chunks "
+            f"({len(restored)} restored)"
+        )
+        if self._client is None:
+            return
+        try:
+            await self._client.delete_points(stale)
+            if restored:
+                session = self._client.session(f"{self.file_id} rollback")
+                await session.upsert(restored)
+                await session.finish()
+        except Exception as exc:
+            logger.warning(f"[{self.file_id}] Vector store rollback failed: {exc}")
+
+    def _roll_back_local(self) -> tuple[list[str], list[VectorPoint]]:
+        """Local part of ``abort()``; returns the ids the vector store must
+        drop and the flushed points it must get back. Blocking."""
+        dense = get_dense_index()
+        dense.discard_pending(self.user_id, self.file_id)
+        flushed = {
+            row["chunk_id"]: row
+            for row in dense.file_chunks(self.user_id, self.file_id)
+            if row["chunk_id"] in self._written
+        }
+        stale = [chunk_id for chunk_id in self._written if chunk_id not in flushed]
+
+        sparse = get_sparse_index()
+        sparse.delete_chunks(self.user_id, stale)
+        sparse.restore_chunks(self.user_id, self.file_id, flushed.values())
+
+        metadata = dense.get_metadata(self.user_id, flushed) if self._client else {}
+        restored = [
+            VectorPoint(id=chunk_id, vector=row["vector"].tolist(), payload=metadata[chunk_id])
+            for chunk_id, row in flushed.items()
+            if chunk_id in metadata
+        ]
+        return stale, restored
+
+
+def delete_chunks_from_indexes(user_id: str, chunk_ids: list[str]) -> None:
+    """Remove single chunks from every index. Blocking."""
+    get_sparse_index().delete_chunks(user_id, chunk_ids)
+    get_dense_index().delete_chunks(user_id, chunk_ids)
+
+
+def delete_file_from_indexes(user_id: str, file_id: str) -> None:
+    """Remove all of a file's chunks from every index. Blocking."""
+    delete_files_from_indexes(user_id, [file_id])
+
+
+def delete_files_from_indexes(user_id: str, file_ids: list[str]) -> None:
+    """Remove the chunks of several files from every index in one pass. Blocking."""
+    get_sparse_index().delete_files(user_id, file_ids)
+    get_dense_index().delete_files(user_id, file_ids)
+    get_query_cache().invalidate_user(user_id)
+
+
+def delete_user_from_indexes(user_id: str) -> None:
+    """Drop everything indexed for a tenant. Blocking."""
+    get_sparse_index().delete_user(user_id)
+    get_dense_index().delete_user(user_id)
+    get_query_cache().invalidate_user(user_id)
+
+
+def flush_indexes(user_id: str, file_id: str | None = None) -> None:
+    """Persist a tenant's index changes to disk. Blocking.
+
+    Called once a document is fully indexed, so this is also where the
+    tenant's cached results become stale. With ``file_id``, only that
+    file's buffered dense rows are sealed: other files the tenant is
+    still ingesting stay buffered, so a failure can still discard them.
+    """
+    get_sparse_index().flush(user_id)
+    get_dense_index().flush(user_id, None if file_id is None else [file_id])
+    get_query_cache().invalidate_user(user_id)
+
+
+# ── External vector store ────────────────────────────────────────────────────
+
+
+async def delete_chunks_from_vector_store(chunk_ids: list[str]) -> None:
+    """Remove single chunks from the vector store, if one is configured."""
+    client = get_vector_store_client()
+    if client is not None and chunk_ids:
+        await client.delete_points(chunk_ids)
+
+
+async def delete_files_from_vector_store(user_id: str, file_ids: list[str]) -> None:
+    """Remove the chunks of ``file_ids`` from the vector store, if one is configured."""
+    client = get_vector_store_client()
+    if client is not None and file_ids:
+        await client.delete_files(user_id, file_ids)
+
+
+async def delete_user_from_vector_store(user_id: str) -> None:
+    """Drop a tenant's chunks from the vector store, if one is configured."""
+    client = get_vector_store_client()
+    if client is not None:
+        await client.delete_user(user_id)
@@ -0,0 +1,428 @@
+"""
+Reranking — the final search stage, and the single place the app calls
+the rerank model.
+
+Rerank is the slowest remote hop of a search, so ``RerankerClient``
+keeps the number and size of calls down:
+
+  - candidates are capped at ``max_candidates``, and cut early where the
+    fused RRF score drops by more than ``score_gap`` (relative to the top
+    score), since the tail past a cliff rarely makes the final page
+  - (query, chunk_id) scores are memoized for ``memo_ttl`` seconds
+  - concurrent searches for the same query are coalesced: their
+    candidates are merged into one provider call (deduplicated, up to
+    the provider's document limit) within a ``max_wait`` window
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Sequence
+
+import httpx
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.embeddings.cache import normalize_text
+from app.services.search.types import SearchHits
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+
+# ── Providers ────────────────────────────────────────────────────────────────
+
+
+class RerankProviderError(Exception):
+    """Raised when a provider call fails."""
+    pass
+
+
+class RerankProvider(ABC):
+    """One rerank model behind a (query, documents) → scores API."""
+
+    model: str
+    max_documents: int
+
+    @abstractmethod
+    async def rerank(self, query: str, documents: list[str]) -> list[float]:
+        """Relevance of each document to ``query`` (at most
+        ``max_documents``), preserving order."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class CohereRerankProvider(RerankProvider):
+    """Cohere's ``/v2/rerank`` endpoint."""
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "rerank-v3.5",
+        api_base: str = "https://api.cohere.com",
+        max_documents: int = 1000,
+        timeout: float = 30.0,
+    ):
+        self.model = model
+        self.max_documents = max_documents
+        self._client = httpx.AsyncClient(
+            base_url=api_base.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+        )
+
+    async def rerank(self, query: str, documents: list[str]) -> list[float]:
+        try:
+            resp = await self._client.post(
+                "/v2/rerank",
+                json={
+                    "model": self.model,
+                    "query": query,
+                    "documents": documents,
+                    "top_n": len(documents),
+                },
+            )
+            resp.raise_for_status()
+            results = resp.json()["results"]
+        except (httpx.HTTPError, ValueError, KeyError) as exc:
+            raise RerankProviderError(f"Rerank request failed: {exc}") from exc
+
+        scores = [0.0] * len(documents)
+        for item in results:
+            scores[item["index"]] = item["relevance_score"]
+        return scores
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class FakeRerankProvider(RerankProvider):
+    """
+    Deterministic local stand-in for tests and benchmarks.
+
+    Scores by query-term overlap, with a small hash-based tie-breaker, so
+    the same (query, document) pair always scores the same. ``latency``
+    simulates the round trip, plus ``per_document_latency`` for each
+    document in the call.
+    """
+
+    def __init__(
+        self,
+        max_documents: int = 1000,
+        latency: float = 0.0,
+        per_document_latency: float = 0.0,
+        model: str = "fake",
+    ):
+        self.model = model
+        self.max_documents = max_documents
+        self.latency = latency
+        self.per_document_latency = per_document_latency
+        self.calls = 0
+        self.documents_scored = 0
+
+    @staticmethod
+    def _score(query_terms: set[str], document: str) -> float:
+        terms = set(_WORD.findall(document.lower()))
+        overlap = len(query_terms & terms) / (len(query_terms) or 1)
+        digest = hashlib.blake2b(document.encode(), digest_size=2).digest()
+        return 0.9 * overlap + 0.1 * int.from_bytes(digest, "little") / 0xFFFF
+
+    async def rerank(self, query: str, documents: list[str]) -> list[float]:
+        self.calls += 1
+        self.documents_scored += len(documents)
+        delay = self.latency + self.per_document_latency * len(documents)
+        if delay:
+            await asyncio.sleep(delay)
+        query_terms = set(_WORD.findall(query.lower()))
+        return [self._score(query_terms, document) for document in documents]
+
+
+# ── Client ───────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class RerankMetrics:
+    """Running counters; read with ``snapshot()``."""
+    requests: int = 0
+    candidates: int = 0
+    candidates_cut: int = 0
+    memo_hits: int = 0
+    coalesced: int = 0
+    calls: int = 0
+    documents_sent: int = 0
+    provider_errors: int = 0
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "requests": self.requests,
+            "candidates": self.candidates,
+            "candidates_cut": self.candidates_cut,
+            "memo_hits": self.memo_hits,
+            "coalesced": self.coalesced,
+            "calls": self.calls,
+            "documents_sent": self.documents_sent,
+            "documents_per_call": round(self.documents_sent / self.calls, 2)
+            if self.calls else 0.0,
+            "provider_errors": self.provider_errors,
+        }
+
+
+@dataclass
+class _Pending:
+    chunk_id: str
+    text: str
+    future: asyncio.Future = field(repr=False)
+
+
+class RerankerClient:
+    """
+    Coalescing, memoizing front-end for a ``RerankProvider``.
+
+    Args:
+        provider: Model to call
+        max_candidates: Most candidates reranked per search
+        min_candidates: Never cut below this many by score gap
+        score_gap: Relative RRF score drop that ends the candidate list;
+            0 disables the cutoff
+        memo_ttl: Seconds a (query, chunk_id) score is reused
+        memo_max_entries: Memoized scores kept (LRU)
+        max_wait: Seconds to wait for other searches of the same query
+        max_concurrent_calls: Provider calls allowed in flight at once
+    """
+
+    def __init__(
+        self,
+        provider: RerankProvider,
+        max_candidates: int = 50,
+        min_candidates: int = 10,
+        score_gap: float = 0.3,
+        memo_ttl: float = 120.0,
+        memo_max_entries: int = 50_000,
+        max_wait: float = 0.005,
+        max_concurrent_calls: int = 4,
+    ):
+        self.provider = provider
+        self.max_candidates = max_candidates
+        self.min_candidates = min_candidates
+        self.score_gap = score_gap
+        self.memo_ttl = memo_ttl
+        self.memo_max_entries = memo_max_entries
+        self.max_wait = max_wait
+        self.metrics = RerankMetrics()
+
+        self._memo: OrderedDict[tuple[str, str], tuple[float, float]] = OrderedDict()
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+        self._pending: dict[str, list[_Pending]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._call_slots = asyncio.Semaphore(max_concurrent_calls)
+        self._sends: set[asyncio.Task] = set()
+
+    @property
+    def model(self) -> str:
+        return self.provider.model
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    def select_candidates(self, fused_scores: Sequence[float]) -> int:
+        """How many of the (descending) fused candidates to rerank."""
+        n = min(len(fused_scores), self.max_candidates)
+        if self.score_gap <= 0 or n <= self.min_candidates:
+            return n
+
+        scores = np.asarray(fused_scores[:n], dtype=np.float64)
+        if scores[0] <= 0:
+            return n
+        # gaps[i] = drop between candidate i and i + 1
+        gaps = (scores[:-1] - scores[1:]) / scores[0]
+        cliffs = np.flatnonzero(gaps[self.min_candidates - 1:] > self.score_gap)
+        return self.min_candidates + int(cliffs[0]) if cliffs.size else n
+
+    async def rerank(
+        self,
+        query: str,
+        chunk_ids: Sequence[str],
+        texts: Sequence[str],
+        fused_scores: Sequence[float] | None = None,
+    ) -> SearchHits:
+        """
+        Rerank fused candidates (best first) for ``query``.
+
+        Args:
+            query: User question
+            chunk_ids: Candidate chunk ids, in fused order
+            texts: Candidate texts, aligned with ``chunk_ids``
+            fused_scores: RRF scores, used for the gap cutoff
+
+        Returns:
+            The kept candidates ordered by rerank score
+        """
+        self.metrics.requests += 1
+        n = (
+            self.select_candidates(fused_scores)
+            if fused_scores is not None
+            else min(len(chunk_ids), self.max_candidates)
+        )
+        self.metrics.candidates += n
+        self.metrics.candidates_cut += len(chunk_ids) - n
+        if not n:
+            return SearchHits.empty()
+
+        query = normalize_text(query)
+        chunk_ids = list(chunk_ids[:n])
+        unique = dict(zip(chunk_ids, texts[:n]))
+
+        scores = self._memo_get(query, list(unique))
+        self.metrics.memo_hits += len(scores)
+
+        missing = [chunk_id for chunk_id in unique if chunk_id not in scores]
+        if missing:
+            # shield: a cancelled search must not cancel a slot other
+            # searches are also waiting on
+            results = await asyncio.gather(
+                *(
+                    asyncio.shield(self._submit(query, chunk_id, unique[chunk_id]))
+                    for chunk_id in missing
+                )
+            )
+            scores.update(zip(missing, results))
+
+        ids = np.array(list(unique), dtype=object)
+        values = np.array([scores[chunk_id] for chunk_id in unique], dtype=np.float32)
+        order = np.argsort(-values, kind="stable")
+        return SearchHits(ids=ids[order], scores=values[order])
+
+    async def aclose(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        await self.provider.aclose()
+
+    # ── Memo ─────────────────────────────────────────────────────────────
+
+    def _memo_get(self, query: str, chunk_ids: list[str]) -> dict[str, float]:
+        now = time.monotonic()
+        found: dict[str, float] = {}
+        for chunk_id in chunk_ids:
+            key = (query, chunk_id)
+            entry = self._memo.get(key)
+            if entry is None:
+                continue
+            expires, score = entry
+            if expires <= now:
+                del self._memo[key]
+                continue
+            self._memo.move_to_end(key)
+            found[chunk_id] = score
+        return found
+
+    def _memo_put(self, query: str, scores: dict[str, float]) -> None:
+        expires = time.monotonic() + self.memo_ttl
+        for chunk_id, score in scores.items():
+            self._memo[(query, chunk_id)] = (expires, score)
+            self._memo.move_to_end((query, chunk_id))
+        while len(self._memo) > self.memo_max_entries:
+            self._memo.popitem(last=False)
+
+    # ── Coalescing ───────────────────────────────────────────────────────
+
+    def _submit(self, query: str, chunk_id: str, text: str) -> asyncio.Future:
+        key = (query, chunk_id)
+        # Same candidate already queued/in flight for another search
+        if key in self._in_flight:
+            self.metrics.coalesced += 1
+            return self._in_flight[key]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._in_flight[key] = future
+
+        pending = self._pending.setdefault(query, [])
+        pending.append(_Pending(chunk_id, text, future))
+
+        if len(pending) >= self.provider.max_documents:
+            self._flush(query)
+        elif query not in self._timers:
+            self._timers[query] = loop.call_later(self.max_wait, self._flush, query)
+        return future
+
+    def _flush(self, query: str) -> None:
+        timer = self._timers.pop(query, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(query, None)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send(query, batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _send(self, query: str, batch: list[_Pending]) -> None:
+        try:
+            async with self._call_slots:
+                self.metrics.calls += 1
+                self.metrics.documents_sent += len(batch)
+                scores = await self.provider.rerank(query, [item.text for item in batch])
+
+            for item, score in zip(batch, scores, strict=True):
+                if not item.future.done():
+                    item.future.set_result(score)
+            self._memo_put(
+                query, {item.chunk_id: score for item, score in zip(batch, scores)}
+            )
+        except Exception as exc:
+            self.metrics.provider_errors += 1
+            logger.error("Rerank call of %d documents failed: %s", len(batch), exc)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+        finally:
+            for item in batch:
+                self._in_flight.pop((query, item.chunk_id), None)
+
+
+_client: RerankerClient | None = None
+
+
+def create_rerank_provider() -> RerankProvider | None:
+    """Build the provider selected by ``rerank_provider`` (None = disabled)."""
+    settings = get_settings()
+
+    if settings.rerank_provider == "none":
+        return None
+
+    if settings.rerank_provider == "fake":
+        return FakeRerankProvider(latency=settings.rerank_fake_latency_ms / 1000)
+
+    if settings.rerank_provider == "cohere":
+        return CohereRerankProvider(
+            api_key=settings.rerank_api_key,
+            model=settings.rerank_model,
+            api_base=settings.rerank_api_base,
+        )
+
+    raise ValueError(f"Unknown rerank provider: {settings.rerank_provider}")
+
+
+def get_reranker_client() -> RerankerClient | None:
+    """Shared reranker client, or None if reranking is disabled."""
+    global _client
+    if _client is None:
+        provider = create_rerank_provider()
+        if provider is None:
+            return None
+        settings = get_settings()
+        _client = RerankerClient(
+            provider,
+            max_candidates=settings.rerank_max_candidates,
+            min_candidates=settings.rerank_min_candidates,
+            score_gap=settings.rerank_score_gap,
+            memo_ttl=settings.rerank_memo_ttl,
+            max_wait=settings.rerank_batch_wait_ms / 1000,
+        )
+    return _client
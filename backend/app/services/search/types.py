@@ -0,0 +1,30 @@
+"""
+Shared types for the retrievers.
+"""
+
+import uuid
+from dataclasses import dataclass
+
+import numpy as np
+
+# Fixed namespace so a chunk's id depends only on (file_id, chunk_index)
+_CHUNK_ID_NAMESPACE = uuid.UUID("5b8d3c1e-0f7a-4c39-9a52-6f1f3b2d7e40")
+
+
+def make_chunk_id(file_id: str, chunk_index: int) -> str:
+    """Deterministic UUID for a chunk — re-indexing overwrites, never duplicates."""
+    return str(uuid.uuid5(_CHUNK_ID_NAMESPACE, f"{file_id}:{chunk_index}"))
+
+
+@dataclass(slots=True)
+class SearchHits:
+    """Ranked results of one retriever, best first."""
+    ids: np.ndarray       # chunk ids (str)
+    scores: np.ndarray    # float32, descending
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def empty(cls) -> "SearchHits":
+        return cls(np.empty(0, dtype=object), np.empty(0, dtype=np.float32))
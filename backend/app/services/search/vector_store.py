@@ -0,0 +1,523 @@
+"""
+External vector store — chunks mirrored into a vector database.
+
+With ``vector_store_provider`` set, every chunk batch written to the
+local indexes is also upserted into a vector database (Qdrant over its
+REST API, or an in-memory store for tests and benchmarks), and file,
+chunk and account deletions follow it there. Writes go through
+``VectorStoreClient``, which is built for ingestion throughput:
+
+  - batches are sized by points and by estimated request body size, so
+    each stays within ``max_batch_points`` and ``max_batch_bytes`` (under
+    the server's payload limit)
+  - a job's batches are uploaded in the background, with at most
+    ``max_in_flight`` outstanding across all jobs; the pipeline only
+    waits when that many are, so uploads overlap with embedding
+  - transport errors, 429 and 5xx are retried with exponential backoff
+    and jitter, up to ``max_attempts`` per batch
+  - a file's or a tenant's points are deleted by ``file_id``/``user_id``
+    payload filter, without listing their ids first
+
+Each ingestion job uploads through an ``UpsertSession``, whose stats
+(including vectors/sec) end up in the file's ``ingest_stats``.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Iterator
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# JSON characters per vector component, e.g. "-0.012345678,"
+_FLOAT_BYTES = 14
+# "id", key names and punctuation of one point
+_POINT_OVERHEAD = 96
+
+_registry = get_metrics_registry()
+
+UPSERTED = _registry.counter(
+    "vector_store_upserted_total", "Points upserted into the vector store"
+)
+RETRIES = _registry.counter(
+    "vector_store_retries_total", "Vector store requests retried", ("op",)
+)
+REQUEST_SECONDS = _registry.histogram(
+    "vector_store_request_seconds",
+    "Vector store request latency, retries included",
+    ("op",),
+)
+
+
+class VectorStoreError(Exception):
+    """Raised when a vector store request fails. ``retryable`` errors are
+    transient (network, throttling, server errors)."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass(slots=True)
+class VectorPoint:
+    """One chunk's vector and its metadata payload."""
+    id: str
+    vector: list[float]
+    payload: dict
+
+    def estimated_size(self) -> int:
+        """Approximate bytes this point adds to an upsert request body."""
+        return (
+            _POINT_OVERHEAD
+            + len(self.vector) * _FLOAT_BYTES
+            + len(json.dumps(self.payload, separators=(",", ":")))
+        )
+
+
+# ── Stores ───────────────────────────────────────────────────────────────────
+
+
+class VectorStore(ABC):
+    """A vector database collection, addressed by point id and payload."""
+
+    max_batch_points: int
+    max_batch_bytes: int
+
+    @abstractmethod
+    async def upsert(self, points: list[VectorPoint]) -> None:
+        """Insert or overwrite ``points`` (one batch)."""
+
+    @abstractmethod
+    async def delete_points(self, ids: list[str]) -> None:
+        """Delete points by id."""
+
+    @abstractmethod
+    async def delete_by_filter(
+        self,
+        user_id: str,
+        file_ids: list[str] | None = None,
+    ) -> None:
+        """Delete a tenant's points, or only those of ``file_ids``."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class QdrantVectorStore(VectorStore):
+    """
+    One Qdrant collection over the REST API. The collection (and keyword
+    indexes on ``user_id``/``file_id`` for filtered deletes) is created on
+    first use if missing.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        collection: str,
+        dimensions: int,
+        max_batch_points: int = 256,
+        max_batch_bytes: int = 8 * 1024 * 1024,
+        timeout: float = 30.0,
+    ):
+        self.collection = collection
+        self.dimensions = dimensions
+        self.max_batch_points = max_batch_points
+        self.max_batch_bytes = max_batch_bytes
+        self._client = httpx.AsyncClient(
+            base_url=url.rstrip("/"),
+            headers={"api-key": api_key} if api_key else {},
+            timeout=timeout,
+        )
+        self._ready = False
+        self._ready_lock = asyncio.Lock()
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        body: dict | None = None,
+        ok: tuple[int, ...] = (),
+    ) -> httpx.Response:
+        try:
+            resp = await self._client.request(method, path, json=body)
+        except httpx.TransportError as exc:
+            raise VectorStoreError(f"Qdrant request failed: {exc}", retryable=True) from exc
+        if resp.status_code >= 400 and resp.status_code not in ok:
+            raise VectorStoreError(
+                f"Qdrant {method} {path} returned {resp.status_code}: {resp.text[:200]}",
+                retryable=resp.status_code == 429 or resp.status_code >= 500,
+            )
+        return resp
+
+    async def _ensure_collection(self) -> None:
+        if self._ready:
+            return
+        async with self._ready_lock:
+            if self._ready:
+                return
+            path = f"/collections/{self.collection}"
+            resp = await self._request("GET", path, ok=(404,))
+            if resp.status_code == 404:
+                # 409: another worker created it first
+                await self._request(
+                    "PUT",
+                    path,
+                    {"vectors": {"size": self.dimensions, "distance": "Cosine"}},
+                    ok=(409,),
+                )
+                for field in ("user_id", "file_id"):
+                    await self._request(
+                        "PUT",
+                        f"{path}/index?wait=true",
+                        {"field_name": field, "field_schema": "keyword"},
+                    )
+            self._ready = True
+
+    async def upsert(self, points: list[VectorPoint]) -> None:
+        await self._ensure_collection()
+        await self._request(
+            "PUT",
+            f"/collections/{self.collection}/points?wait=true",
+            {"points": [
+                {"id": p.id, "vector": p.vector, "payload": p.payload} for p in points
+            ]},
+        )
+
+    async def delete_points(self, ids: list[str]) -> None:
+        await self._ensure_collection()
+        await self._request(
+            "POST",
+            f"/collections/{self.collection}/points/delete?wait=true",
+            {"points": ids},
+        )
+
+    async def delete_by_filter(
+        self,
+        user_id: str,
+        file_ids: list[str] | None = None,
+    ) -> None:
+        await self._ensure_collection()
+        must: list[dict] = [{"key": "user_id", "match": {"value": user_id}}]
+        if file_ids is not None:
+            must.append({"key": "file_id", "match": {"any": file_ids}})
+        await self._request(
+            "POST",
+            f"/collections/{self.collection}/points/delete?wait=true",
+            {"filter": {"must": must}},
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class InMemoryVectorStore(VectorStore):
+    """
+    Process-local stand-in for tests and benchmarks. ``latency`` simulates
+    the per-request round trip; the first ``failures`` requests raise a
+    retryable error.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        failures: int = 0,
+        max_batch_points: int = 256,
+        max_batch_bytes: int = 8 * 1024 * 1024,
+    ):
+        self.latency = latency
+        self.failures = failures
+        self.max_batch_points = max_batch_points
+        self.max_batch_bytes = max_batch_bytes
+        self.points: dict[str, VectorPoint] = {}
+        self.requests = 0
+
+    async def _round_trip(self) -> None:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failures > 0:
+            self.failures -= 1
+            raise VectorStoreError("Simulated failure", retryable=True)
+
+    async def upsert(self, points: list[VectorPoint]) -> None:
+        await self._round_trip()
+        for point in points:
+            self.points[point.id] = point
+
+    async def delete_points(self, ids: list[str]) -> None:
+        await self._round_trip()
+        for point_id in ids:
+            self.points.pop(point_id, None)
+
+    async def delete_by_filter(
+        self,
+        user_id: str,
+        file_ids: list[str] | None = None,
+    ) -> None:
+        await self._round_trip()
+        wanted = set(file_ids) if file_ids is not None else None
+        self.points = {
+            point_id: point
+            for point_id, point in self.points.items()
+            if point.payload.get("user_id") != user_id
+            or (wanted is not None and point.payload.get("file_id") not in wanted)
+        }
+
+
+# ── Client ───────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class UpsertStats:
+    """What one job uploaded, and how fast."""
+    vectors: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def vectors_per_sec(self) -> float:
+        return self.vectors / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            **asdict(self),
+            "seconds": round(self.seconds, 4),
+            "vectors_per_sec": round(self.vectors_per_sec, 1),
+        }
+
+
+class VectorStoreClient:
+    """
+    Batching, pipelined, retrying front-end for a ``VectorStore``.
+
+    Args:
+        store: Where points go
+        max_batch_points: Points per upsert (capped at the store's limit)
+        max_batch_bytes: Estimated body bytes per upsert (capped likewise)
+        max_in_flight: Upsert batches outstanding at once, across all jobs
+        max_attempts: Tries per request before giving up
+        retry_delay: Backoff before the first retry, doubled per attempt
+        retry_max_delay: Backoff cap
+    """
+
+    def __init__(
+        self,
+        store: VectorStore,
+        max_batch_points: int | None = None,
+        max_batch_bytes: int | None = None,
+        max_in_flight: int = 4,
+        max_attempts: int = 5,
+        retry_delay: float = 0.5,
+        retry_max_delay: float = 10.0,
+    ):
+        self.store = store
+        self.max_batch_points = min(
+            max_batch_points or store.max_batch_points, store.max_batch_points
+        )
+        self.max_batch_bytes = min(
+            max_batch_bytes or store.max_batch_bytes, store.max_batch_bytes
+        )
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    def session(self, label: str) -> "UpsertSession":
+        """A new upload for one job; ``label`` tags its log lines."""
+        return UpsertSession(self, label)
+
+    async def delete_points(self, ids: list[str]) -> None:
+        for start in range(0, len(ids), self.max_batch_points):
+            batch = ids[start:start + self.max_batch_points]
+            await self.call("delete", lambda: self.store.delete_points(batch))
+
+    async def delete_files(self, user_id: str, file_ids: list[str]) -> None:
+        await self.call("delete", lambda: self.store.delete_by_filter(user_id, file_ids))
+
+    async def delete_user(self, user_id: str) -> None:
+        await self.call("delete", lambda: self.store.delete_by_filter(user_id))
+
+    async def aclose(self) -> None:
+        await self.store.aclose()
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def batches(self, points: list[VectorPoint]) -> Iterator[list[VectorPoint]]:
+        """Split ``points`` into batches within the point and byte limits.
+        A point over the byte limit on its own is sent alone."""
+        batch: list[VectorPoint] = []
+        size = 0
+        for point in points:
+            point_size = point.estimated_size()
+            if batch and (
+                len(batch) >= self.max_batch_points
+                or size + point_size > self.max_batch_bytes
+            ):
+                yield batch
+                batch, size = [], 0
+            batch.append(point)
+            size += point_size
+        if batch:
+            yield batch
+
+    async def call(self, op: str, request: Callable[[], Awaitable[None]]) -> int:
+        """Run ``request`` with retries; returns how many retries it took."""
+        start = time.perf_counter()
+        attempt = 1
+        while True:
+            try:
+                await request()
+                REQUEST_SECONDS.observe(time.perf_counter() - start, op=op)
+                return attempt - 1
+            except VectorStoreError as exc:
+                if not exc.retryable or attempt >= self.max_attempts:
+                    raise
+                delay = min(self.retry_max_delay, self.retry_delay * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning(
+                    f"Vector store {op} attempt {attempt} failed, "
+                    f"retrying in {delay:.2f}s: {exc}"
+                )
+                RETRIES.inc(op=op)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+
+class UpsertSession:
+    """
+    One job's upload. ``upsert()`` returns once its batches are in flight;
+    ``finish()`` waits for them and raises the first failure, which also
+    fails any later ``upsert()`` early.
+    """
+
+    def __init__(self, client: VectorStoreClient, label: str):
+        self.label = label
+        self.stats = UpsertStats()
+        self._client = client
+        self._tasks: set[asyncio.Task] = set()
+        self._error: BaseException | None = None
+        self._started: float | None = None
+        self._last_done = 0.0
+
+    async def upsert(self, points: list[VectorPoint]) -> None:
+        for batch in self._client.batches(points):
+            if self._error is not None:
+                raise self._error
+            # Backpressure: wait for a slot before queueing more
+            await self._client._slots.acquire()
+            if self._started is None:
+                self._started = time.perf_counter()
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            # Also runs for a task cancelled before it started (abort)
+            task.add_done_callback(self._release)
+
+    def upsert_blocking(
+        self,
+        points: list[VectorPoint],
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        """``upsert()`` for pipeline worker threads, run on the client's loop."""
+        asyncio.run_coroutine_threadsafe(self.upsert(points), loop).result()
+
+    async def finish(self) -> UpsertStats:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._error is not None:
+            raise self._error
+        if self._started is not None:
+            self.stats.seconds = self._last_done - self._started
+        logger.info(
+            f"[{self.label}] Upserted {self.stats.vectors} vectors in "
+            f"{self.stats.batches} batches, {self.stats.vectors_per_sec:.0f} vectors/s"
+        )
+        return self.stats
+
+    async def abort(self) -> None:
+        """Cancel whatever is still in flight (the job failed)."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _send(self, batch: list[VectorPoint]) -> None:
+        try:
+            retries = await self._client.call(
+                "upsert", lambda: self._client.store.upsert(batch)
+            )
+            self.stats.vectors += len(batch)
+            self.stats.batches += 1
+            self.stats.retries += retries
+            self._last_done = time.perf_counter()
+            UPSERTED.inc(len(batch))
+        except Exception as exc:
+            logger.error(f"[{self.label}] Vector upsert of {len(batch)} failed: {exc}")
+            if self._error is None:
+                self._error = exc
+
+    def _release(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._client._slots.release()
+
+
+_client: VectorStoreClient | None = None
+
+
+def create_vector_store() -> VectorStore | None:
+    """Build the store selected by ``vector_store_provider`` (None = disabled)."""
+    settings = get_settings()
+
+    if settings.vector_store_provider == "none":
+        return None
+
+    if settings.vector_store_provider == "memory":
+        return InMemoryVectorStore(latency=settings.vector_store_fake_latency_ms / 1000)
+
+    if settings.vector_store_provider == "qdrant":
+        return QdrantVectorStore(
+            url=settings.qdrant_url,
+            api_key=settings.qdrant_api_key,
+            collection=settings.qdrant_collection,
+            dimensions=settings.embedding_dimensions,
+        )
+
+    raise ValueError(f"Unknown vector store provider: {settings.vector_store_provider}")
+
+
+def get_vector_store_client() -> VectorStoreClient | None:
+    """Shared vector store client, or None if no vector store is configured."""
+    global _client
+    if _client is None:
+        store = create_vector_store()
+        if store is None:
+            return None
+        settings = get_settings()
+        _client = VectorStoreClient(
+            store,
+            max_batch_points=settings.vector_store_batch_points,
+            max_batch_bytes=settings.vector_store_batch_bytes,
+            max_in_flight=settings.vector_store_max_in_flight,
+            max_attempts=settings.vector_store_max_attempts,
+            retry_delay=settings.vector_store_retry_delay,
+        )
+    return _client
+
+
+async def close_vector_store_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,92 @@
+"""
+Bulk Supabase Storage operations — full listings and batched removal.
+
+``list`` returns at most one page per call, and ``remove`` takes a list of
+paths per call; these helpers page through a whole prefix and remove any
+number of objects in concurrent batches.
+"""
+
+import asyncio
+import logging
+from typing import Callable
+
+from storage3 import AsyncStorageClient
+
+from app.services.pdf.pipeline import batched
+
+logger = logging.getLogger(__name__)
+
+LIST_PAGE_SIZE = 1000
+
+
+async def list_object_paths(
+    storage: AsyncStorageClient,
+    bucket: str,
+    prefix: str,
+) -> list[str]:
+    """Every object path under ``prefix``, descending into sub-folders."""
+    bucket_api = storage.from_(bucket)
+    paths: list[str] = []
+    folders = [prefix.strip("/")]
+
+    while folders:
+        folder = folders.pop()
+        offset = 0
+        while True:
+            page = await bucket_api.list(
+                path=folder,
+                options={
+                    "limit": LIST_PAGE_SIZE,
+                    "offset": offset,
+                    "sortBy": {"column": "name", "order": "asc"},
+                },
+            )
+            for obj in page:
+                path = f"{folder}/{obj['name']}" if folder else obj["name"]
+                # Folders are listed as entries without an id
+                if obj.get("id") is None:
+                    folders.append(path)
+                else:
+                    paths.append(path)
+            if len(page) < LIST_PAGE_SIZE:
+                break
+            offset += LIST_PAGE_SIZE
+
+    return paths
+
+
+async def remove_objects(
+    storage: AsyncStorageClient,
+    bucket: str,
+    paths: list[str],
+    batch_size: int = 1000,
+    concurrency: int = 4,
+    on_removed: Callable[[int], None] | None = None,
+) -> list[str]:
+    """
+    Remove ``paths`` in batches of ``batch_size``, ``concurrency`` at a time.
+    ``on_removed`` is called with the size of each batch that succeeds.
+
+    Returns:
+        The paths whose batch failed (empty when everything was removed)
+    """
+    bucket_api = storage.from_(bucket)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def remove(batch: list[str]) -> None:
+        async with slots:
+            await bucket_api.remove(batch)
+        if on_removed is not None:
+            on_removed(len(batch))
+
+    batches = list(batched(paths, batch_size))
+    results = await asyncio.gather(
+        *(remove(batch) for batch in batches), return_exceptions=True
+    )
+
+    failed: list[str] = []
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to remove {len(batch)} storage objects: {result}")
+            failed.extend(batch)
+    return failed
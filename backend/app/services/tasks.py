@@ -1,52 +1,216 @@
 """
-Google Cloud Tasks integration for enqueuing background PDF processing jobs.
+Background job queue for PDF processing.
+
+Jobs go through a pluggable backend selected by ``queue_backend``:
+
+  - ``cloud_tasks`` — Google Cloud Tasks calls ``/worker/process-pdf``
+  - ``local``       — the in-process scheduler (``app.services.scheduler``)
+                      runs the worker directly, with priorities, per-user
+                      fairness, concurrency limits and retries, so
+                      upload → process works (and can be load-tested)
+                      without GCP
+
+``enqueue_pdf_jobs`` submits a whole batch concurrently over one
+long-lived client, then flips every accepted file to ``'queued'`` with a
+single update.
 """
 
+import asyncio
 import json
 import logging
+from abc import ABC, abstractmethod
 
 from google.cloud import tasks_v2
 
 from app.core.config import get_settings
-from app.core.supabase import get_supabase
+from app.core.supabase import get_async_supabase
+from app.services.pdf.pipeline import batched
+from app.services.scheduler import PRIORITY_NORMAL, JobScheduler
 
 logger = logging.getLogger(__name__)
 
 
-def enqueue_pdf_job(file_id: str) -> None:
+class QueueBackend(ABC):
+    """Somewhere PDF processing jobs can be sent."""
+
+    @abstractmethod
+    async def submit(
+        self,
+        file_ids: list[str],
+        user_id: str | None = None,
+        priority: int = PRIORITY_NORMAL,
+    ) -> list[str]:
+        """Enqueue one job per file. Returns the ids that were accepted.
+        ``user_id`` and ``priority`` are scheduling hints a backend may ignore."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class CloudTasksBackend(QueueBackend):
+    """One HTTP task per file, targeting the worker endpoint."""
+
+    def __init__(
+        self,
+        project_id: str,
+        location: str,
+        queue: str,
+        worker_base_url: str,
+        max_concurrency: int = 32,
+    ):
+        if not all((project_id, location, queue, worker_base_url)):
+            raise ValueError(
+                "Cloud Tasks backend needs gcp_project_id, gcp_location, "
+                "gcp_queue and worker_base_url"
+            )
+        self.parent = tasks_v2.CloudTasksClient.queue_path(project_id, location, queue)
+        self.worker_endpoint = f"{worker_base_url}/worker/process-pdf"
+        self._slots = asyncio.Semaphore(max_concurrency)
+        # Created on first use: the gRPC channel binds to the running loop
+        self._client: tasks_v2.CloudTasksAsyncClient | None = None
+
+    def _get_client(self) -> tasks_v2.CloudTasksAsyncClient:
+        if self._client is None:
+            self._client = tasks_v2.CloudTasksAsyncClient()
+        return self._client
+
+    async def _create_task(self, file_id: str) -> None:
+        task = {
+            "http_request": {
+                "http_method": tasks_v2.HttpMethod.POST,
+                "url": self.worker_endpoint,
+                "headers": {"Content-type": "application/json"},
+                "body": json.dumps({"file_id": file_id}).encode(),
+            }
+        }
+        async with self._slots:
+            response = await self._get_client().create_task(
+                request={"parent": self.parent, "task": task}
+            )
+        logger.info("Cloud Task created: %s", response.name)
+
+    async def submit(
+        self,
+        file_ids: list[str],
+        user_id: str | None = None,
+        priority: int = PRIORITY_NORMAL,
+    ) -> list[str]:
+        results = await asyncio.gather(
+            *(self._create_task(file_id) for file_id in file_ids),
+            return_exceptions=True,
+        )
+        accepted = []
+        for file_id, result in zip(file_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"[{file_id}] Failed to create Cloud Task: {result}")
+            else:
+                accepted.append(file_id)
+        return accepted
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.transport.close()
+            self._client = None
+
+
+class LocalQueueBackend(QueueBackend):
+    """Runs jobs in this process on a ``JobScheduler``."""
+
+    def __init__(self, scheduler: JobScheduler):
+        self.scheduler = scheduler
+
+    async def submit(
+        self,
+        file_ids: list[str],
+        user_id: str | None = None,
+        priority: int = PRIORITY_NORMAL,
+    ) -> list[str]:
+        # Waits for room when the scheduler is full (backpressure); a file
+        # that is already queued counts as accepted
+        for file_id in file_ids:
+            await self.scheduler.submit(file_id, tenant=user_id or "", priority=priority)
+        return list(file_ids)
+
+    async def join(self) -> None:
+        """Wait until every submitted job has finished."""
+        await self.scheduler.join()
+
+    async def aclose(self) -> None:
+        await self.scheduler.aclose()
+
+
+async def _process_pdf(file_id: str) -> None:
+    # Imported here: the processor pulls in the whole ingestion stack
+    from app.services.pdf.processor import process_pdf_document
+
+    await process_pdf_document(file_id)
+
+
+_backend: QueueBackend | None = None
+
+
+def get_queue_backend() -> QueueBackend:
+    global _backend
+    if _backend is None:
+        settings = get_settings()
+        if settings.queue_backend == "cloud_tasks":
+            _backend = CloudTasksBackend(
+                settings.gcp_project_id,
+                settings.gcp_location,
+                settings.gcp_queue,
+                settings.worker_base_url,
+                max_concurrency=settings.enqueue_concurrency,
+            )
+        elif settings.queue_backend == "local":
+            _backend = LocalQueueBackend(JobScheduler(
+                _process_pdf,
+                concurrency=settings.local_queue_workers,
+                cpu_concurrency=settings.local_queue_cpu_workers,
+                max_pending=settings.local_queue_max_pending,
+                max_attempts=settings.local_queue_max_attempts,
+                retry_delay=settings.local_queue_retry_delay,
+            ))
+        else:
+            raise ValueError(f"Unknown queue backend: {settings.queue_backend}")
+    return _backend
+
+
+async def close_queue_backend() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.aclose()
+        _backend = None
+
+
+async def enqueue_pdf_jobs(
+    file_ids: list[str],
+    user_id: str | None = None,
+    priority: int = PRIORITY_NORMAL,
+) -> list[str]:
     """
-    Create a Cloud Task that tells the worker to process a PDF.
+    Enqueue processing for a batch of files (of one user, if given).
 
-    On success the file's status is flipped to ``'queued'`` in the database.
-    If anything goes wrong the exception is re-raised so the caller can
-    decide how to handle it (e.g. return an error to the client).
+    Accepted files are flipped to ``'queued'`` — only those still
+    ``'uploaded'``, so a job that already started isn't set back — in one
+    update per ``db_in_filter_batch_size`` ids, run concurrently, so the
+    ``in.(...)`` filter stays within URL length limits. Returns the ids
+    that were accepted by the queue.
     """
-    settings = get_settings()
-
-    client = tasks_v2.CloudTasksClient()
-    parent = client.queue_path(
-        settings.gcp_project_id,
-        settings.gcp_location,
-        settings.gcp_queue,
-    )
-
-    worker_endpoint = f"{settings.worker_base_url}/worker/process-pdf"
-    payload = {"file_id": file_id}
-
-    task = {
-        "http_request": {
-            "http_method": tasks_v2.HttpMethod.POST,
-            "url": worker_endpoint,
-            "headers": {"Content-type": "application/json"},
-            "body": json.dumps(payload).encode(),
-        }
-    }
+    if not file_ids:
+        return []
+
+    accepted = await get_queue_backend().submit(file_ids, user_id, priority)
 
-    response = client.create_task(request={"parent": parent, "task": task})
-    logger.info("Cloud Task created: %s", response.name)
+    if accepted:
+        supabase = await get_async_supabase()
+        batch_size = get_settings().db_in_filter_batch_size
+        await asyncio.gather(*(
+            supabase.table("files")
+            .update({"status": "queued"})
+            .in_("id", batch)
+            .eq("status", "uploaded")
+            .execute()
+            for batch in batched(accepted, batch_size)
+        ))
+    return accepted
 
-    # Mark the document as queued now that the task was accepted
-    supabase = get_supabase()
-    supabase.table("files").update({"status": "queued"}).eq(
-        "id", file_id
-    ).execute()
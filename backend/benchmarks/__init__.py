@@ -0,0 +1,16 @@
+"""
+Offline benchmarks for the backend.
+
+Runs the real app against in-memory fakes (Supabase tables and storage,
+the task queue, embedding and rerank providers) over a deterministic
+synthetic PDF corpus, and writes the results as JSON:
+
+    cd backend
+    python -m benchmarks --output before.json
+    git checkout my-branch
+    python -m benchmarks --output after.json
+    python -m benchmarks.compare before.json after.json
+
+``--quick`` shrinks every scenario for a smoke run; ``--scenarios``
+picks a subset (see ``benchmarks.scenarios.SCENARIOS``).
+"""
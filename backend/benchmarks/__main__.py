@@ -0,0 +1,118 @@
+"""
+Command line entry point: ``python -m benchmarks``.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.environment import configure
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _run(names: list[str], seed: int, quick: bool, latency: float) -> dict:
+    # Imported after configure(): the app reads its settings on import
+    import httpx
+
+    from app.core.supabase import close_async_supabase
+    from app.services.pdf.parallel import shutdown_extraction_pool
+    from app.services.tasks import close_queue_backend
+    from benchmarks.fakes import FakeSupabase, install_fake_embeddings, install_fake_reranker
+    from benchmarks.scenarios import SCENARIOS, Bench
+    from main import app
+
+    supabase = FakeSupabase(latency=latency)
+    supabase.install()
+    install_fake_embeddings(latency=latency)
+    install_fake_reranker(latency=latency)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        bench = Bench(supabase=supabase, client=client, seed=seed, quick=quick)
+        try:
+            for name in names:
+                print(f"  {name} ...", file=sys.stderr, flush=True)
+                start = time.perf_counter()
+                results[name] = await SCENARIOS[name](bench)
+                print(f"  {name} done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        finally:
+            await close_queue_backend()
+            shutdown_extraction_pool()
+            await close_async_supabase()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument(
+        "--scenarios",
+        help="comma-separated subset to run (default: all)",
+    )
+    parser.add_argument("--output", type=Path, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="small inputs, for a smoke run")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed (default: 0)")
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=2.0,
+        help="simulated latency of every fake service call (default: 2)",
+    )
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench-"))
+    configure(workdir, latency_ms=args.latency_ms)
+    logging.basicConfig(level=logging.WARNING)
+
+    from benchmarks.scenarios import SCENARIOS
+
+    names = list(SCENARIOS)
+    if args.scenarios:
+        wanted = [name.strip() for name in args.scenarios.split(",")]
+        unknown = set(wanted) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        # Registry order, so ingest always precedes the scenarios that need it
+        names = [name for name in SCENARIOS if name in wanted]
+
+    results = asyncio.run(_run(names, args.seed, args.quick, args.latency_ms / 1000))
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "quick": args.quick,
+            "latency_ms": args.latency_ms,
+        },
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare two benchmark reports: ``python -m benchmarks.compare a.json b.json``.
+
+Every numeric value present in both reports is listed with its relative
+change. Whether higher is better depends on the metric (``*_ms`` and
+``*seconds`` lower, ``*_per_*`` higher), so changes are shown, not judged.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+
+def flatten(node: object, prefix: str = "") -> dict[str, float]:
+    if isinstance(node, dict):
+        values = {}
+        for key, value in node.items():
+            values.update(flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+        return values
+    if isinstance(node, (int, float)) and not isinstance(node, bool):
+        return {prefix: float(node)}
+    return {}
+
+
+def compare(before: dict, after: dict, threshold: float = 0.0) -> list[tuple[str, float, float, float | None]]:
+    """(metric, before, after, relative change) for metrics in both reports."""
+    old, new = flatten(before.get("results", {})), flatten(after.get("results", {}))
+    rows = []
+    for metric in sorted(old.keys() & new.keys()):
+        change = (new[metric] - old[metric]) / abs(old[metric]) if old[metric] else None
+        if change is None or abs(change) >= threshold:
+            rows.append((metric, old[metric], new[metric], change))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare", description=__doc__)
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.0,
+        help="only show changes of at least this fraction (e.g. 0.05)",
+    )
+    args = parser.parse_args()
+
+    before = json.loads(args.before.read_text())
+    after = json.loads(args.after.read_text())
+    print(f"before: {before['meta'].get('commit')}  after: {after['meta'].get('commit')}")
+
+    rows = compare(before, after, args.threshold)
+    width = max((len(metric) for metric, *_ in rows), default=10)
+    for metric, old, new, change in rows:
+        delta = f"{change:+.1%}" if change is not None else "n/a"
+        print(f"{metric:<{width}}  {old:>12.3f}  {new:>12.3f}  {delta:>8}")
+
+
+if __name__ == "__main__":
+    main()
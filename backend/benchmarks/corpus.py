@@ -0,0 +1,170 @@
+"""
+Deterministic synthetic PDF corpus.
+
+The same seed always yields byte-identical documents, so numbers from
+different commits are measured on the same input. Documents vary in:
+
+  - page count  — from single-page memos to long reports
+  - layout      — one column, two columns, or a report with running
+                  header/footer and section headings
+  - density     — words per page (sparse, normal, dense)
+
+Text is drawn from a fixed vocabulary with a per-document topic mixed in,
+and a few sentences of every document are kept as ``phrases`` so search
+scenarios can ask questions that have real answers in the corpus.
+"""
+
+import random
+from dataclasses import dataclass, field
+
+import pymupdf
+
+LAYOUTS = ("single", "two_column", "report")
+DENSITIES = {"sparse": 150, "normal": 400, "dense": 900}
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792      # US Letter, points
+MARGIN = 54
+
+_COMMON = (
+    "the of and to in is that for on with as by this be are from at or an it "
+    "which was were has have not but all can more also may these their its "
+    "into such other than only over after under between each both through "
+    "during without within however therefore whereas although"
+).split()
+
+_TOPICS = {
+    "finance": "revenue margin liquidity capital dividend equity ledger audit "
+               "forecast budget invoice accrual depreciation solvency hedge",
+    "legal": "clause indemnity liability warranty jurisdiction arbitration "
+             "breach covenant tenant lessor statute remedy termination consent",
+    "medical": "patient diagnosis dosage clinical trial symptom therapy "
+               "cardiac renal protocol adverse placebo cohort biopsy",
+    "engineering": "tolerance torque bearing voltage circuit firmware latency "
+                   "throughput actuator sensor calibration load stress",
+    "research": "hypothesis sample variance regression corpus benchmark "
+                "baseline ablation citation dataset replication survey",
+}
+
+
+@dataclass
+class SyntheticDocument:
+    name: str
+    pdf: bytes
+    pages: int
+    layout: str
+    density: str
+    topic: str
+    phrases: list[str] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.pdf)
+
+
+def _sentence(rng: random.Random, topic_words: list[str]) -> str:
+    words = [
+        rng.choice(topic_words) if rng.random() < 0.3 else rng.choice(_COMMON)
+        for _ in range(rng.randint(8, 22))
+    ]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def _paragraphs(rng: random.Random, topic_words: list[str], words: int) -> list[str]:
+    paragraphs, total = [], 0
+    while total < words:
+        sentences = [_sentence(rng, topic_words) for _ in range(rng.randint(2, 6))]
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += paragraph.count(" ") + 1
+    return paragraphs
+
+
+def _write_page(
+    page: pymupdf.Page,
+    layout: str,
+    paragraphs: list[str],
+    page_num: int,
+    title: str,
+    fontsize: float,
+) -> None:
+    top, bottom = MARGIN, PAGE_HEIGHT - MARGIN
+    if layout == "report":
+        page.insert_text((MARGIN, MARGIN - 18), title, fontsize=8)
+        page.insert_text((PAGE_WIDTH / 2 - 20, PAGE_HEIGHT - MARGIN + 24), f"Page {page_num}", fontsize=8)
+        page.insert_text((MARGIN, top + 14), f"Section {page_num}", fontsize=14)
+        top += 28
+
+    if layout == "two_column":
+        gutter = 18
+        width = (PAGE_WIDTH - 2 * MARGIN - gutter) / 2
+        half = (len(paragraphs) + 1) // 2
+        columns = [
+            (pymupdf.Rect(MARGIN, top, MARGIN + width, bottom), paragraphs[:half]),
+            (pymupdf.Rect(MARGIN + width + gutter, top, PAGE_WIDTH - MARGIN, bottom), paragraphs[half:]),
+        ]
+    else:
+        columns = [(pymupdf.Rect(MARGIN, top, PAGE_WIDTH - MARGIN, bottom), paragraphs)]
+
+    for rect, text in columns:
+        # Overflowing text is dropped by insert_textbox; density is approximate
+        page.insert_textbox(rect, "\n\n".join(text), fontsize=fontsize, fontname="helv")
+
+
+def generate_document(
+    seed: int,
+    index: int,
+    pages: int,
+    layout: str,
+    density: str,
+) -> SyntheticDocument:
+    rng = random.Random(f"{seed}:{index}")
+    topic = rng.choice(sorted(_TOPICS))
+    topic_words = _TOPICS[topic].split()
+    words_per_page = DENSITIES[density]
+    fontsize = {"sparse": 11, "normal": 9, "dense": 6.5}[density]
+    if layout == "two_column":
+        fontsize -= 1
+    title = f"{topic.title()} document {index:04d}"
+
+    doc = pymupdf.open()
+    phrases: list[str] = []
+    for page_num in range(1, pages + 1):
+        paragraphs = _paragraphs(rng, topic_words, words_per_page)
+        if rng.random() < 0.5 and len(phrases) < 8:
+            phrases.append(paragraphs[0].split(".")[0])
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        _write_page(page, layout, paragraphs, page_num, title, fontsize)
+
+    doc.set_metadata({"title": title, "creationDate": "D:20240101000000Z", "modDate": "D:20240101000000Z"})
+    pdf = doc.tobytes(garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+
+    return SyntheticDocument(
+        name=f"{topic}-{index:04d}.pdf",
+        pdf=pdf,
+        pages=pages,
+        layout=layout,
+        density=density,
+        topic=topic,
+        phrases=phrases or [title],
+    )
+
+
+def generate_corpus(
+    documents: int,
+    seed: int = 0,
+    page_counts: tuple[int, ...] = (1, 4, 12, 40, 120),
+) -> list[SyntheticDocument]:
+    """``documents`` documents cycling through page counts, layouts and densities."""
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(documents):
+        corpus.append(generate_document(
+            seed,
+            index,
+            pages=page_counts[index % len(page_counts)],
+            layout=rng.choice(LAYOUTS),
+            density=rng.choice(sorted(DENSITIES)),
+        ))
+    return corpus
@@ -0,0 +1,34 @@
+"""
+Settings for an offline run.
+
+Must be applied before anything under ``app`` is imported: settings are
+read once and cached. Every external service points at a fake, and all
+on-disk state (search indexes, ingest caches) lives in a scratch
+directory, so runs never touch real data and never see each other's.
+"""
+
+import os
+from pathlib import Path
+
+JWT_SECRET = "bench-jwt-secret-bench-jwt-secret"
+
+
+def configure(workdir: Path, latency_ms: float = 0.0) -> None:
+    os.environ.update({
+        "SUPABASE_URL": "http://supabase.bench",
+        "SUPABASE_SERVICE_ROLE_KEY": "bench.bench.bench",
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "AUTH_MODE": "local",
+        "AUTH_REMOTE_FALLBACK": "false",
+        "QDRANT_URL": "http://qdrant.bench",
+        "QDRANT_API_KEY": "bench",
+        "QUEUE_BACKEND": "local",
+        "EMBEDDING_PROVIDER": "fake",
+        "EMBEDDING_DIMENSIONS": "384",
+        "RERANK_PROVIDER": "fake",
+        "RERANK_FAKE_LATENCY_MS": str(int(latency_ms)),
+        "VECTOR_STORE_PROVIDER": "memory",
+        "VECTOR_STORE_FAKE_LATENCY_MS": str(int(latency_ms)),
+        "SEARCH_INDEX_DIR": str(workdir / "indexes"),
+        "INGEST_CACHE_DIR": str(workdir / "ingest"),
+    })
@@ -0,0 +1,281 @@
+"""
+In-memory stand-ins for the backend's external services.
+
+  - ``FakeSupabase``     — PostgREST tables, Storage and the Auth admin API,
+                           served from dicts through an ``httpx.MockTransport``
+                           with a fixed per-request latency; installed as the
+                           transport of the shared Supabase HTTP client, so
+                           the real async client and every route run unchanged
+  - ``RecordingQueue``   — a queue backend that accepts and records jobs
+                           without running them
+  - ``install_fake_embeddings`` / ``install_fake_reranker`` — the repo's own
+                           deterministic providers, with simulated latency
+
+Search runs on the real local dense/BM25 index in a scratch directory;
+the external vector store is the app's own ``InMemoryVectorStore``.
+
+Only the PostgREST features the backend uses are implemented: ``select``
+projection, ``eq``/``neq``/``in``/``is`` filters, ``limit``/``offset``,
+single-object responses, insert/update/delete returning rows.
+"""
+
+import asyncio
+import json
+import uuid
+from collections import Counter, defaultdict
+from urllib.parse import parse_qsl, unquote
+
+import httpx
+
+import app.core.supabase as supabase_module
+import app.services.embeddings as embeddings_module
+import app.services.search.rerank as rerank_module
+import app.services.tasks as tasks_module
+from app.core.config import get_settings
+from app.services.embeddings import EmbeddingService, FakeEmbeddingProvider
+from app.services.search.rerank import FakeRerankProvider, RerankerClient
+from app.services.scheduler import PRIORITY_NORMAL
+from app.services.tasks import QueueBackend
+
+_OBJECT_ACCEPT = "application/vnd.pgrst.object+json"
+
+
+def _parse_in(value: str) -> set[str]:
+    items = value.strip("()")
+    return {item.strip().strip('"') for item in items.split(",")} if items else set()
+
+
+def _matches(row: dict, column: str, expression: str) -> bool:
+    op, _, value = expression.partition(".")
+    current = row.get(column)
+    if op == "eq":
+        return current is not None and str(current) == value
+    if op == "neq":
+        return current is None or str(current) != value
+    if op == "in":
+        return current is not None and str(current) in _parse_in(value)
+    if op == "is":
+        return current is None if value == "null" else str(current).lower() == value
+    raise NotImplementedError(f"Filter operator {op!r} is not faked")
+
+
+class FakeSupabase:
+    """
+    Supabase in dicts. ``latency`` seconds are awaited on every request, so
+    the event loop keeps serving other requests meanwhile, as with a real
+    remote server.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables: defaultdict[str, list[dict]] = defaultdict(list)
+        self.objects: dict[str, dict[str, bytes]] = defaultdict(dict)
+        self.deleted_users: list[str] = []
+        self.requests: Counter[str] = Counter()
+
+    # ── Setup ────────────────────────────────────────────────────────────
+
+    def install(self) -> None:
+        """Route the backend's shared Supabase client through this fake."""
+        supabase_module._http_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(self.handle),
+            follow_redirects=True,
+        )
+        supabase_module._async_client = None
+
+    def put_object(self, bucket: str, path: str, data: bytes) -> None:
+        self.objects[bucket][path] = data
+
+    def round_trips(self) -> int:
+        return sum(self.requests.values())
+
+    def reset_counts(self) -> None:
+        self.requests.clear()
+
+    # ── Dispatch ─────────────────────────────────────────────────────────
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        path = unquote(request.url.path)
+        if path.startswith("/rest/v1/"):
+            self.requests[f"rest {request.method}"] += 1
+            return self._rest(request, path.removeprefix("/rest/v1/"))
+        if path.startswith("/storage/v1/"):
+            self.requests[f"storage {request.method}"] += 1
+            return self._storage(request, path.removeprefix("/storage/v1/"))
+        if path.startswith("/auth/v1/admin/users/") and request.method == "DELETE":
+            self.requests["auth DELETE"] += 1
+            self.deleted_users.append(path.rsplit("/", 1)[1])
+            return httpx.Response(200, json={})
+        return httpx.Response(404, json={"message": f"Not faked: {request.method} {path}"})
+
+    # ── PostgREST ────────────────────────────────────────────────────────
+
+    def _rest(self, request: httpx.Request, table: str) -> httpx.Response:
+        rows = self.tables[table]
+        params = parse_qsl(request.url.query.decode(), keep_blank_values=True)
+        columns, limit, offset, filters = None, None, 0, []
+        for key, value in params:
+            if key == "select":
+                columns = None if value == "*" else [c.strip() for c in value.split(",")]
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key not in ("order", "columns", "on_conflict"):
+                filters.append((key, value))
+
+        def selected(candidates: list[dict]) -> list[dict]:
+            return [r for r in candidates if all(_matches(r, c, e) for c, e in filters)]
+
+        if request.method == "POST":
+            body = json.loads(request.content)
+            result = []
+            for row in body if isinstance(body, list) else [body]:
+                row = {"id": str(uuid.uuid4()), **row}
+                rows.append(row)
+                result.append(row)
+        elif request.method == "GET":
+            result = selected(rows)[offset:]
+            if limit is not None:
+                result = result[:limit]
+        elif request.method == "PATCH":
+            changes = json.loads(request.content)
+            result = selected(rows)
+            for row in result:
+                row.update(changes)
+        elif request.method == "DELETE":
+            result = selected(rows)
+            doomed = {id(r) for r in result}
+            self.tables[table] = [r for r in rows if id(r) not in doomed]
+        else:
+            return httpx.Response(405)
+
+        if columns is not None:
+            result = [{c: r.get(c) for c in columns} for r in result]
+
+        if request.headers.get("accept") == _OBJECT_ACCEPT:
+            if len(result) != 1:
+                return httpx.Response(406, json={
+                    "code": "PGRST116",
+                    "details": f"The result contains {len(result)} rows",
+                    "hint": None,
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                })
+            return httpx.Response(200, json=result[0])
+        return httpx.Response(200 if request.method != "POST" else 201, json=result)
+
+    # ── Storage ──────────────────────────────────────────────────────────
+
+    def _storage(self, request: httpx.Request, path: str) -> httpx.Response:
+        method = request.method
+        parts = path.split("/")
+
+        if parts[:3] == ["object", "upload", "sign"]:
+            bucket, key = parts[3], "/".join(parts[4:])
+            if method == "POST":
+                return httpx.Response(200, json={"url": f"/object/upload/sign/{bucket}/{key}?token=t"})
+            self.objects[bucket][key] = request.content
+            return httpx.Response(200, json={"Key": f"{bucket}/{key}"})
+
+        if parts[:2] == ["object", "sign"]:
+            bucket, key = parts[2], "/".join(parts[3:])
+            if method == "GET":
+                return self._object(bucket, key)
+            if key:
+                return httpx.Response(200, json={"signedURL": f"/object/sign/{bucket}/{key}?token=t"})
+            paths = json.loads(request.content)["paths"]
+            return httpx.Response(200, json=[
+                {
+                    "path": p,
+                    "signedURL": f"/object/sign/{bucket}/{p}?token=t",
+                    "error": None if p in self.objects[bucket] else "Object not found",
+                }
+                for p in paths
+            ])
+
+        if parts[:2] == ["object", "list"]:
+            return self._list(parts[2], json.loads(request.content))
+
+        if parts[0] == "object" and method == "DELETE":
+            bucket = parts[1]
+            removed = [p for p in json.loads(request.content)["prefixes"] if p in self.objects[bucket]]
+            for p in removed:
+                del self.objects[bucket][p]
+            return httpx.Response(200, json=[{"name": p} for p in removed])
+
+        if parts[0] == "object" and method == "GET":
+            return self._object(parts[1], "/".join(parts[2:]))
+
+        return httpx.Response(404, json={"message": f"Not faked: {method} {path}"})
+
+    def _object(self, bucket: str, key: str) -> httpx.Response:
+        data = self.objects[bucket].get(key)
+        if data is None:
+            return httpx.Response(400, json={"statusCode": "404", "error": "not_found", "message": "Object not found"})
+        return httpx.Response(200, content=data, headers={"Content-Type": "application/pdf"})
+
+    def _list(self, bucket: str, body: dict) -> httpx.Response:
+        prefix = body.get("prefix", "").strip("/")
+        limit, offset = body.get("limit", 100), body.get("offset", 0)
+        entries: dict[str, dict] = {}
+        for key in sorted(self.objects[bucket]):
+            if prefix and not key.startswith(prefix + "/"):
+                continue
+            rest = key[len(prefix) + 1:] if prefix else key
+            name, _, below = rest.partition("/")
+            entries.setdefault(name, {"name": name, "id": None if below else key})
+        page = list(entries.values())[offset:offset + limit]
+        return httpx.Response(200, json=page)
+
+
+class RecordingQueue(QueueBackend):
+    """Accepts every job and only records it."""
+
+    def __init__(self) -> None:
+        self.submitted: list[str] = []
+
+    async def submit(
+        self,
+        file_ids: list[str],
+        user_id: str | None = None,
+        priority: int = PRIORITY_NORMAL,
+    ) -> list[str]:
+        self.submitted.extend(file_ids)
+        return list(file_ids)
+
+
+def install_queue(backend: QueueBackend | None) -> QueueBackend | None:
+    """Make ``backend`` the shared queue backend; returns the previous one."""
+    previous, tasks_module._backend = tasks_module._backend, backend
+    return previous
+
+
+def install_fake_embeddings(latency: float = 0.0) -> EmbeddingService:
+    """Shared embedding service on the fake provider (no on-disk cache)."""
+    settings = get_settings()
+    service = EmbeddingService(
+        provider=FakeEmbeddingProvider(
+            dimensions=settings.embedding_dimensions, latency=latency
+        ),
+        max_batch_size=settings.embedding_batch_size,
+        max_wait=settings.embedding_batch_wait_ms / 1000,
+    )
+    embeddings_module._service = service
+    return service
+
+
+def install_fake_reranker(latency: float = 0.0) -> RerankerClient:
+    settings = get_settings()
+    client = RerankerClient(
+        FakeRerankProvider(latency=latency),
+        max_candidates=settings.rerank_max_candidates,
+        min_candidates=settings.rerank_min_candidates,
+        score_gap=settings.rerank_score_gap,
+        memo_ttl=settings.rerank_memo_ttl,
+        max_wait=settings.rerank_batch_wait_ms / 1000,
+    )
+    rerank_module._client = client
+    return client
@@ -0,0 +1,390 @@
+"""
+Benchmark scenarios.
+
+Each scenario is an async function ``(bench) -> dict`` registered in
+``SCENARIOS``; the dict is what ends up in the JSON report. Timings are
+in milliseconds unless a key says otherwise. Requests go through the
+real FastAPI app (in-process, via ``httpx.ASGITransport``) so routing,
+validation, auth and serialization are part of every number.
+"""
+
+import asyncio
+import time
+import tracemalloc
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import httpx
+import jwt
+import numpy as np
+
+from app.core.config import get_settings
+from app.core.supabase import get_http_client
+from app.services.archive import RemoteFile, stream_zip
+from app.services.embeddings import get_embedding_service
+from app.services.search import (
+    SearchHits,
+    get_query_cache,
+    get_reranker_client,
+    reciprocal_rank_fusion,
+)
+from app.services.tasks import enqueue_pdf_jobs, get_queue_backend
+from benchmarks.corpus import SyntheticDocument, generate_corpus
+from benchmarks.environment import JWT_SECRET
+from benchmarks.fakes import FakeSupabase, RecordingQueue, install_queue
+
+STAGES = (
+    "metadata", "download", "diff", "extract", "chunk", "embed", "store", "finalize"
+)
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """p50/p99/mean/max of ``samples`` (seconds), in milliseconds."""
+    values = np.asarray(samples) * 1000
+    return {
+        "n": len(samples),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def mint_token(user_id: str) -> str:
+    return jwt.encode(
+        {"sub": user_id, "aud": "authenticated", "exp": int(time.time()) + 3600},
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+@dataclass
+class Bench:
+    """Shared state of one run: fakes, corpus, app client."""
+
+    supabase: FakeSupabase
+    client: httpx.AsyncClient
+    seed: int
+    quick: bool
+    user_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    corpus: list[SyntheticDocument] = field(default_factory=list)
+    file_ids: list[str] = field(default_factory=list)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {mint_token(self.user_id)}"}
+
+    def add_files(self, documents: list[SyntheticDocument], status: str) -> list[str]:
+        """Rows and stored bytes for ``documents``, as if uploaded by the user."""
+        bucket = get_settings().supabase_storage_bucket
+        ids = []
+        for document in documents:
+            file_id = str(uuid.uuid4())
+            path = f"{self.user_id}/{file_id}.pdf"
+            self.supabase.tables["files"].append({
+                "id": file_id,
+                "user_id": self.user_id,
+                "original_name": document.name,
+                "storage_path": path,
+                "file_size": document.size,
+                "status": status,
+            })
+            self.supabase.put_object(bucket, path, document.pdf)
+            ids.append(file_id)
+        return ids
+
+    async def ensure_ingested(self) -> dict:
+        """Ingest the corpus once; later callers reuse it."""
+        if self.file_ids:
+            return {}
+        documents = 6 if self.quick else 30
+        self.corpus = await asyncio.to_thread(generate_corpus, documents, self.seed)
+        self.file_ids = self.add_files(self.corpus, "uploaded")
+
+        # Enqueue the way confirm-upload does, on the local scheduler
+        backend = get_queue_backend()
+        start = time.perf_counter()
+        await enqueue_pdf_jobs(self.file_ids, self.user_id)
+        await backend.join()
+        return {"seconds": time.perf_counter() - start}
+
+
+# ── Scenarios ────────────────────────────────────────────────────────────────
+
+
+async def ingest(bench: Bench) -> dict:
+    """Throughput of the ingestion pipeline over the synthetic corpus."""
+    if bench.file_ids:
+        raise RuntimeError("ingest must run before any scenario that ingests")
+    bench.supabase.reset_counts()
+    run = await bench.ensure_ingested()
+    seconds = run["seconds"]
+
+    rows = {row["id"]: row for row in bench.supabase.tables["files"]}
+    processed = [rows[i] for i in bench.file_ids if rows[i]["status"] == "processed"]
+    stats = [row["ingest_stats"] for row in processed]
+    pages = sum(s["pages"] for s in stats)
+    stage_totals = {
+        stage: round(sum(s["stages"].get(stage, 0.0) for s in stats), 4)
+        for stage in STAGES
+    }
+    per_document = [s["seconds"] for s in stats]
+    uploads = [s["vector_store"] for s in stats if "vector_store" in s]
+
+    return {
+        "documents": len(bench.file_ids),
+        "processed": len(processed),
+        "failed": len(bench.file_ids) - len(processed),
+        "pages": pages,
+        "chunks": sum(s["chunks"] for s in stats),
+        "bytes": sum(s["bytes"] for s in stats),
+        "wall_seconds": round(seconds, 3),
+        "docs_per_min": round(len(processed) / seconds * 60, 2),
+        "pages_per_sec": round(pages / seconds, 2),
+        "document_latency": percentiles(per_document) if per_document else {},
+        # Summed over documents; stages of concurrent documents overlap
+        "stage_seconds": stage_totals,
+        "supabase_round_trips": bench.supabase.round_trips(),
+        "embedding": get_embedding_service().metrics.snapshot(),
+        # Per-job upsert throughput into the (in-memory) vector store
+        "vector_store": {
+            "vectors": sum(u["vectors"] for u in uploads),
+            "batches": sum(u["batches"] for u in uploads),
+            "vectors_per_sec_p50": round(
+                float(np.median([u["vectors_per_sec"] for u in uploads])), 1
+            ) if uploads else 0.0,
+        },
+    }
+
+
+async def search(bench: Bench) -> dict:
+    """``/search`` latency: cold, served from the query cache, and reranked."""
+    await bench.ensure_ingested()
+    queries = [p for document in bench.corpus for p in document.phrases[:3]]
+    rounds = 1 if bench.quick else 3
+    cache = get_query_cache()
+
+    async def measure(query: str, rerank: bool) -> float:
+        start = time.perf_counter()
+        response = await bench.client.post(
+            "/search",
+            json={"query": query, "top_k": 10, "rerank": rerank},
+            headers=bench.headers,
+        )
+        elapsed = time.perf_counter() - start
+        response.raise_for_status()
+        return elapsed
+
+    cold, cached, reranked = [], [], []
+    for _ in range(rounds):
+        cache.clear()
+        for query in queries:
+            cold.append(await measure(query, rerank=False))
+        for query in queries:
+            cached.append(await measure(query, rerank=False))
+        cache.clear()
+        for query in queries:
+            reranked.append(await measure(query, rerank=True))
+
+    reranker = get_reranker_client()
+    return {
+        "queries": len(queries),
+        "cold": percentiles(cold),
+        "cached": percentiles(cached),
+        "reranked": percentiles(reranked),
+        "rerank_provider_calls": reranker.provider.calls if reranker else 0,
+    }
+
+
+async def upload_fanout(bench: Bench) -> dict:
+    """initiate-upload / confirm-upload latency and round trips by batch size."""
+    previous = install_queue(RecordingQueue())
+    sizes = (1, 10, 100) if bench.quick else (1, 10, 100, 500)
+    repeats = 2 if bench.quick else 5
+    results = {}
+
+    for size in sizes:
+        body = {"files": [{"name": f"doc-{i}.pdf", "size": 1024} for i in range(size)]}
+        initiate, confirm, trips = [], [], []
+        for _ in range(repeats):
+            bench.supabase.reset_counts()
+            start = time.perf_counter()
+            response = await bench.client.post(
+                "/files/initiate-upload", json=body, headers=bench.headers
+            )
+            initiate.append(time.perf_counter() - start)
+            response.raise_for_status()
+            trips.append(bench.supabase.round_trips())
+
+            file_ids = [u["file_id"] for u in response.json()["uploads"]]
+            start = time.perf_counter()
+            response = await bench.client.post(
+                "/files/confirm-upload", json={"file_ids": file_ids}, headers=bench.headers
+            )
+            confirm.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+        results[str(size)] = {
+            "initiate": percentiles(initiate),
+            "confirm": percentiles(confirm),
+            "initiate_round_trips": max(trips),
+        }
+
+    # Later scenarios get the real local scheduler back
+    install_queue(previous)
+    return results
+
+
+async def bulk_download(bench: Bench) -> dict:
+    """ZIP throughput through the route, plus time to first byte and peak memory."""
+    documents = 8 if bench.quick else 40
+    corpus = await asyncio.to_thread(
+        generate_corpus, documents, bench.seed + 1, (4, 12, 40)
+    )
+    file_ids = bench.add_files(corpus, "processed")
+    total_bytes = sum(d.size for d in corpus)
+
+    bench.supabase.reset_counts()
+    start = time.perf_counter()
+    response = await bench.client.post(
+        "/files/bulk-download", json={"file_ids": file_ids}, headers=bench.headers
+    )
+    seconds = time.perf_counter() - start
+    response.raise_for_status()
+    round_trips = bench.supabase.round_trips()
+
+    # The in-process transport buffers responses, so first-byte latency and
+    # memory are measured on the archive stream the route returns
+    settings = get_settings()
+    files = [
+        RemoteFile(
+            name=document.name,
+            url=f"{settings.supabase_url}/storage/v1/object/"
+                f"{settings.supabase_storage_bucket}/{bench.user_id}/{file_id}.pdf",
+        )
+        for document, file_id in zip(corpus, file_ids)
+    ]
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte = None
+    streamed = 0
+    async for data in stream_zip(get_http_client(), files):
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        streamed += len(data)
+    stream_seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "files": len(file_ids),
+        "input_mb": round(total_bytes / 2**20, 2),
+        "zip_mb": round(len(response.content) / 2**20, 2),
+        "route_seconds": round(seconds, 3),
+        "route_mb_per_sec": round(total_bytes / 2**20 / seconds, 2),
+        "supabase_round_trips": round_trips,
+        "stream_first_byte_ms": round((first_byte or 0) * 1000, 3),
+        "stream_seconds": round(stream_seconds, 3),
+        "stream_peak_memory_mb": round(peak / 2**20, 2),
+        "stream_mb": round(streamed / 2**20, 2),
+    }
+
+
+async def fusion(bench: Bench) -> dict:
+    """
+    ``reciprocal_rank_fusion`` latency at 1k candidates from each of 4
+    retrievers, drawn with overlap from 2k chunk ids; budget is 1 ms.
+    """
+    rng = np.random.default_rng(bench.seed)
+    pool = np.array([str(uuid.UUID(int=int(i))) for i in rng.integers(0, 2**63, 2000)])
+    candidates, retrievers = 1000, 4
+    rounds = 200 if bench.quick else 2000
+
+    def hits() -> dict[str, SearchHits]:
+        return {
+            f"retriever_{r}": SearchHits(
+                ids=rng.choice(pool, candidates, replace=False).astype(object),
+                scores=np.sort(rng.random(candidates, dtype=np.float32))[::-1],
+            )
+            for r in range(retrievers)
+        }
+
+    inputs = [hits() for _ in range(16)]
+    for results in inputs:
+        reciprocal_rank_fusion(results, top_k=50)   # warm-up
+
+    samples = []
+    for i in range(rounds):
+        results = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        reciprocal_rank_fusion(results, top_k=50)
+        samples.append(time.perf_counter() - start)
+
+    latency = percentiles(samples)
+    return {
+        "candidates": candidates,
+        "retrievers": retrievers,
+        "top_k": 50,
+        "latency": latency,
+        "within_budget": latency["p99_ms"] < 1.0,
+    }
+
+
+async def load(bench: Bench) -> dict:
+    """
+    Requests/sec of ``GET /files/{id}/signed-url`` by concurrency. Each
+    request makes two round trips to the stand-in Supabase, which answers
+    after the simulated latency; a route that blocked the event loop
+    would stay at its concurrency-1 rate however many clients there are.
+    """
+    corpus = await asyncio.to_thread(generate_corpus, 4, bench.seed + 2, (1,))
+    file_ids = bench.add_files(corpus, "processed")
+    levels = (1, 8, 32) if bench.quick else (1, 4, 16, 64, 128)
+    requests = 96 if bench.quick else 512
+
+    async def run(concurrency: int) -> tuple[float, list[float]]:
+        remaining = iter(range(requests))
+        latencies: list[float] = []
+
+        async def client() -> None:
+            for i in remaining:
+                start = time.perf_counter()
+                response = await bench.client.get(
+                    f"/files/{file_ids[i % len(file_ids)]}/signed-url",
+                    headers=bench.headers,
+                )
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - start, latencies
+
+    await run(levels[-1])   # warm-up: pool connections, JWT verification
+    results = {}
+    for concurrency in levels:
+        seconds, latencies = await run(concurrency)
+        results[str(concurrency)] = {
+            "requests_per_sec": round(requests / seconds, 1),
+            "latency": percentiles(latencies),
+        }
+
+    base = results[str(levels[0])]["requests_per_sec"]
+    top = results[str(levels[-1])]["requests_per_sec"]
+    return {
+        "route": "GET /files/{id}/signed-url",
+        "requests": requests,
+        "concurrency": results,
+        "scaling": round(top / base, 2) if base else 0.0,
+    }
+
+
+SCENARIOS: dict[str, Callable[[Bench], Awaitable[dict]]] = {
+    "ingest": ingest,
+    "search": search,
+    "upload_fanout": upload_fanout,
+    "bulk_download": bulk_download,
+    "fusion": fusion,
+    "load": load,
+}
@@ -1,10 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.files import router as files_router
+from app.routes.search import router as search_router
 from app.routes.users import router as users_router
 from app.routes.worker import router as worker_router
+from app.core.metrics import render_metrics
+from app.core.supabase import close_async_supabase
+from app.services.account_deletion import close_account_deletion_jobs
+from app.services.tasks import close_queue_backend
+from app.services.pdf.parallel import shutdown_extraction_pool
+from app.services.search.indexing import start_dense_compactor, stop_dense_compactor
+from app.services.search.vector_store import close_vector_store_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_dense_compactor()
+    yield
+    await close_queue_backend()
+    await close_account_deletion_jobs()
+    stop_dense_compactor()
+    shutdown_extraction_pool()
+    await close_vector_store_client()
+    await close_async_supabase()
 
-app = FastAPI(title="Document Searcher API")
+
+app = FastAPI(title="Document Searcher API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +40,7 @@ app.add_middleware(
 
 # Client-facing routes
 app.include_router(files_router)
+app.include_router(search_router)
 app.include_router(users_router)
 
 # Worker routes (called by Google Cloud Tasks)
@@ -25,3 +50,9 @@ app.include_router(worker_router)
 @app.get("/")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Process metrics in Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,12 @@
+"""
+Tests run offline, against the same fakes as the benchmarks: settings
+point every external service at a stand-in and keep all on-disk state in
+a scratch directory. They must be in place before ``app`` is imported.
+"""
+
+import tempfile
+from pathlib import Path
+
+from benchmarks.environment import configure
+
+configure(Path(tempfile.mkdtemp(prefix="backend-tests-")))
@@ -0,0 +1,32 @@
+from app.core.config import get_settings
+from app.services.pdf import checkpoint
+from app.services.pdf.chunker import Chunk
+
+
+def _resumable(monkeypatch, tmp_path, **update) -> bool:
+    settings = get_settings().model_copy(
+        update={"ingest_cache_dir": str(tmp_path), **update}
+    )
+    monkeypatch.setattr(checkpoint, "get_settings", lambda: settings)
+    monkeypatch.setattr(checkpoint, "_store", None)
+    return checkpoint.get_checkpoint_store().open("file", "ab" * 32).resumable
+
+
+def test_checkpoint_is_keyed_by_embedding_settings(monkeypatch, tmp_path):
+    settings = get_settings().model_copy(update={"ingest_cache_dir": str(tmp_path)})
+    monkeypatch.setattr(checkpoint, "get_settings", lambda: settings)
+    monkeypatch.setattr(checkpoint, "_store", None)
+    saved = checkpoint.get_checkpoint_store().open("file", "ab" * 32)
+    dimensions = settings.embedding_dimensions
+    saved.append_chunks([
+        Chunk(
+            text="text", page_num=1, chunk_index=0, bbox=(0, 0, 1, 1),
+            embedding=[0.5] * dimensions,
+        )
+    ])
+    saved.close()
+
+    assert _resumable(monkeypatch, tmp_path)
+    assert not _resumable(monkeypatch, tmp_path, embedding_dimensions=dimensions * 2)
+    assert not _resumable(monkeypatch, tmp_path, embedding_provider="other")
+    assert not _resumable(monkeypatch, tmp_path, embedding_model="other-model")
@@ -0,0 +1,16 @@
+from app.services.pdf.chunker import Chunk
+from app.services.pdf.dedup import ChunkRegistry
+
+
+def test_registry_is_keyed_by_chunk_settings(tmp_path):
+    digest = "cd" * 32
+    registry = ChunkRegistry(tmp_path, "model-384", chunk_tokens=400, chunk_overlap=40)
+    writer = registry.writer(digest)
+    writer.append([Chunk(text="text", page_num=1, chunk_index=0, bbox=(0, 0, 1, 1))])
+    writer.commit(pages=1)
+
+    assert registry.contains(digest)
+    assert ChunkRegistry(tmp_path, "model-384", 400, 40).contains(digest)
+    assert not ChunkRegistry(tmp_path, "model-384", 200, 40).contains(digest)
+    assert not ChunkRegistry(tmp_path, "model-384", 400, 0).contains(digest)
+    assert not ChunkRegistry(tmp_path, "model-1536", 400, 40).contains(digest)
@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.services.pdf.chunker import Chunk
+from app.services.search.dense import DenseIndex
+from app.services.search.types import make_chunk_id
+
+
+def _chunks(texts: list[str], start: int = 0) -> list[Chunk]:
+    rng = np.random.default_rng(start)
+    return [
+        Chunk(
+            text=text, page_num=1, chunk_index=start + i, bbox=(0.0, 0.0, 1.0, 1.0),
+            embedding=rng.random(8).tolist(),
+        )
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_metadata_follows_the_newest_live_row(tmp_path):
+    index = DenseIndex(tmp_path)
+    index.add_chunks("user", "a", _chunks(["a0", "a1", "a2"]))
+    index.add_chunks("user", "b", _chunks(["b0"]))
+    index.flush("user")
+    index.add_chunks("user", "a", _chunks(["a1 v2"], start=1))
+    index.flush("user")
+    index.delete_chunks("user", [make_chunk_id("a", 2)])
+    index.delete_file("user", "b")
+
+    ids = [make_chunk_id("a", i) for i in range(3)] + [make_chunk_id("b", 0), "missing"]
+    metadata = index.get_metadata("user", ids)
+    assert {chunk_id: row["text"] for chunk_id, row in metadata.items()} == {
+        ids[0]: "a0",
+        ids[1]: "a1 v2",
+    }
+
+    # Compaction rewrites the rows; lookups follow
+    index.compact("user")
+    assert index.get_metadata("user", ids).keys() == metadata.keys()
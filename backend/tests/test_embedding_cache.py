@@ -0,0 +1,23 @@
+import asyncio
+
+import numpy as np
+
+from app.services.embeddings import EmbeddingCache, EmbeddingService, FakeEmbeddingProvider
+
+
+def test_cache_is_keyed_by_dimensions(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3")
+
+    async def embed(dimensions: int) -> tuple[list[list[float]], EmbeddingService]:
+        service = EmbeddingService(FakeEmbeddingProvider(dimensions=dimensions), cache=cache)
+        return await service.embed(["same text"]), service
+
+    small, _ = asyncio.run(embed(8))
+    large, service = asyncio.run(embed(16))
+    again, repeat = asyncio.run(embed(16))
+
+    assert len(small[0]) == 8 and len(large[0]) == 16
+    assert service.metrics.cache_hits == 0
+    assert repeat.metrics.cache_hits == 1
+    np.testing.assert_allclose(again, large, rtol=1e-6)   # stored as float32
+    cache.close()
@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.services.pdf.extractor import iter_pages, open_pdf
+from app.services.pdf.highlight import HighlightService, TextIndex
+from benchmarks.corpus import generate_document
+
+
+def test_spooled_index_matches_loaded_index(tmp_path):
+    document = generate_document(seed=1, index=0, pages=5, layout="report", density="normal")
+    service = HighlightService(tmp_path)
+
+    builder = service.builder()
+    doc = open_pdf(document.pdf)
+    try:
+        builder.add_pages(iter_pages(doc))
+    finally:
+        doc.close()
+    built = builder.build()
+    service.save("ab" * 32, builder)
+    builder.close()
+
+    # Saving doesn't load the index, and leaves no spool behind
+    assert not service._loaded
+    assert not any((tmp_path / "v1" / "spool").iterdir())
+
+    saved = service.get_index("ab" * 32)
+    assert saved.text == built.text
+    for name in TextIndex.__slots__[1:]:
+        np.testing.assert_array_equal(getattr(saved, name), getattr(built, name))
+
+    phrase = document.phrases[0]
+    rects = saved.find(phrase)
+    assert rects and rects == built.find(phrase)
@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.pdf.chunker import Chunk
+from app.services.search import get_dense_index, get_sparse_index
+from app.services.search.indexing import FileIndexWriter, flush_indexes
+from app.services.search.vector_store import get_vector_store_client
+
+
+def _chunks(words: list[str], start: int = 0) -> list[Chunk]:
+    rng = np.random.default_rng(start)
+    dimensions = get_settings().embedding_dimensions
+    return [
+        Chunk(
+            text=f"{word} text",
+            page_num=1,
+            chunk_index=start + i,
+            bbox=(0.0, 0.0, 10.0, 10.0),
+            embedding=rng.random(dimensions).tolist(),
+        )
+        for i, word in enumerate(words)
+    ]
+
+
+def test_abort_rolls_back_to_the_flushed_version():
+    user_id, file_id = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        first = FileIndexWriter(user_id, file_id, title="v1", loop=loop)
+        await asyncio.to_thread(first, _chunks(["alpha", "bravo"]))
+        await first.finish()
+        await asyncio.to_thread(flush_indexes, user_id)
+
+        # Overwrites chunk 1 and adds chunk 2, then fails
+        second = FileIndexWriter(user_id, file_id, title="v2", loop=loop)
+        await asyncio.to_thread(second, _chunks(["charlie", "delta"], start=1))
+        await second.abort()
+        await asyncio.to_thread(flush_indexes, user_id)
+
+    asyncio.run(run())
+
+    sparse = get_sparse_index()
+    assert len(sparse.search(user_id, "bravo")) == 1
+    assert len(sparse.search(user_id, "charlie delta")) == 0
+
+    dense = get_dense_index().file_chunks(user_id, file_id)
+    assert [row["text"] for row in dense] == ["alpha text", "bravo text"]
+
+    store = get_vector_store_client().store
+    texts = sorted(
+        point.payload["text"] for point in store.points.values()
+        if point.payload["file_id"] == file_id
+    )
+    assert texts == ["alpha text", "bravo text"]
+
+
+def test_abort_leaves_out_rows_another_file_flushed_meanwhile():
+    user_id = str(uuid.uuid4())
+    first_id, second_id = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        first = FileIndexWriter(user_id, first_id, title="a", loop=loop)
+        second = FileIndexWriter(user_id, second_id, title="b", loop=loop)
+        await asyncio.to_thread(first, _chunks(["echo"]))
+        await asyncio.to_thread(second, _chunks(["foxtrot", "golf"]))
+
+        # The first file finishes while the second is still being ingested
+        await first.finish()
+        await asyncio.to_thread(flush_indexes, user_id, first_id)
+        await second.abort()
+        await asyncio.to_thread(flush_indexes, user_id)
+
+    asyncio.run(run())
+
+    sparse = get_sparse_index()
+    assert len(sparse.search(user_id, "echo")) == 1
+    assert len(sparse.search(user_id, "foxtrot golf")) == 0
+
+    dense = get_dense_index()
+    assert [row["text"] for row in dense.file_chunks(user_id, first_id)] == ["echo text"]
+    assert dense.file_chunks(user_id, second_id) == []
+
+    store = get_vector_store_client().store
+    assert not any(
+        point.payload["file_id"] == second_id for point in store.points.values()
+    )
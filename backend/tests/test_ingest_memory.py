@@ -0,0 +1,41 @@
+import hashlib
+import tracemalloc
+
+from app.core.config import get_settings
+from app.services.pdf.processor import run_ingest_pipeline
+from benchmarks.corpus import generate_document
+
+PAGES = 12
+
+
+def _peak_bytes(pdf: bytes, settings) -> int:
+    def embed(texts: list[str]) -> list[list[float]]:
+        return [[0.0] * 8 for _ in texts]
+
+    digest = hashlib.sha256(pdf).hexdigest()
+    tracemalloc.start()
+    try:
+        stats = run_ingest_pipeline(pdf, digest, settings, embed=embed)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert stats.chunks > 0
+    return peak
+
+
+def test_peak_memory_is_flat_in_page_count():
+    # Inline extraction (the process pool's memory isn't traced), and
+    # batches small enough that the short document spans several
+    settings = get_settings().model_copy(update={
+        "parallel_extraction_min_pages": 10**6,
+        "ingest_page_batch_size": 4,
+        "ingest_chunk_batch_size": 16,
+    })
+    small = generate_document(seed=3, index=0, pages=PAGES, layout="single", density="dense")
+    large = generate_document(seed=3, index=1, pages=10 * PAGES, layout="single", density="dense")
+
+    _peak_bytes(small.pdf, settings)   # warm imports and caches
+    small_peak = _peak_bytes(small.pdf, settings)
+    large_peak = _peak_bytes(large.pdf, settings)
+
+    assert large_peak < 1.5 * small_peak, (small_peak, large_peak)
@@ -0,0 +1,81 @@
+import asyncio
+from collections import Counter
+
+from app.services.scheduler import JobScheduler
+
+
+def test_submit_is_deduplicated_against_a_waiting_retry():
+    calls: Counter[str] = Counter()
+
+    async def handler(key: str) -> None:
+        calls[key] += 1
+        if calls[key] == 1:
+            raise RuntimeError("transient")
+
+    async def run() -> JobScheduler:
+        scheduler = JobScheduler(handler, concurrency=1, retry_delay=0.05)
+        assert await scheduler.submit("a")
+        while not scheduler.stats.retrying:
+            await asyncio.sleep(0.001)
+        # Submitted again while the retry waits: absorbed by the retry
+        assert not await scheduler.submit("a")
+        await asyncio.wait_for(scheduler.join(), timeout=5)
+        await asyncio.sleep(0.1)   # let the retry timer fire
+        await scheduler.aclose()
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert calls["a"] == 2
+    assert scheduler.stats.succeeded == 1
+
+
+def test_failed_job_submitted_again_is_not_also_retried():
+    calls = 0
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def handler(key: str) -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            started.set()
+            await release.wait()
+            raise RuntimeError("transient")
+
+    async def run() -> JobScheduler:
+        scheduler = JobScheduler(handler, concurrency=1, retry_delay=0.01)
+        await scheduler.submit("a")
+        await started.wait()
+        # Queued again while running; the failure must not add a retry
+        assert await scheduler.submit("a")
+        release.set()
+        await asyncio.wait_for(scheduler.join(), timeout=5)
+        await asyncio.sleep(0.05)
+        await scheduler.aclose()
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert calls == 2
+    assert scheduler.stats.retries == 0
+
+
+def test_permanent_errors_are_not_retried():
+    class Permanent(Exception):
+        retryable = False
+
+    calls = 0
+
+    async def handler(key: str) -> None:
+        nonlocal calls
+        calls += 1
+        raise Permanent()
+
+    async def run() -> JobScheduler:
+        scheduler = JobScheduler(handler, retry_delay=0.01)
+        await scheduler.submit("a")
+        await asyncio.wait_for(scheduler.join(), timeout=5)
+        await scheduler.aclose()
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert calls == 1 and scheduler.stats.failed == 1
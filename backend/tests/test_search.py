@@ -0,0 +1,46 @@
+import asyncio
+import uuid
+
+from app.services.search import hybrid
+from app.services.search.indexing import FileIndexWriter, flush_indexes
+from app.services.search.rerank import (
+    FakeRerankProvider,
+    RerankerClient,
+    RerankProviderError,
+)
+from tests.test_indexing import _chunks
+
+
+class FlakyRerankProvider(FakeRerankProvider):
+    failing = True
+
+    async def rerank(self, query: str, documents: list[str]) -> list[float]:
+        if self.failing:
+            self.calls += 1
+            raise RerankProviderError("Rerank request failed: 503")
+        return await super().rerank(query, documents)
+
+
+def test_rerank_failure_falls_back_to_the_fused_order(monkeypatch):
+    user_id, file_id = str(uuid.uuid4()), str(uuid.uuid4())
+    provider = FlakyRerankProvider()
+    reranker = RerankerClient(provider, min_candidates=12, score_gap=0)
+    monkeypatch.setattr(hybrid, "get_reranker_client", lambda: reranker)
+
+    async def run():
+        writer = FileIndexWriter(user_id, file_id)
+        await asyncio.to_thread(writer, _chunks([f"word{i} shared" for i in range(12)]))
+        await asyncio.to_thread(flush_indexes, user_id, file_id)
+
+        failed = await hybrid.search_documents(user_id, "shared", top_k=3)
+        provider.failing = False
+        recovered = await hybrid.search_documents(user_id, "shared", top_k=3)
+        return failed, recovered
+
+    failed, recovered = asyncio.run(run())
+
+    assert failed.reranked is None
+    assert len(failed.final) == 3
+    # The fallback isn't cached as a reranked result
+    assert recovered.reranked is not None and not recovered.cached
+    assert provider.calls == 2
@@ -0,0 +1,24 @@
+import asyncio
+import uuid
+
+from app.core.config import get_settings
+from app.services.tasks import enqueue_pdf_jobs
+from benchmarks.fakes import FakeSupabase, RecordingQueue, install_queue
+
+
+def test_enqueue_updates_status_in_bounded_batches():
+    supabase = FakeSupabase()
+    supabase.install()
+    previous = install_queue(RecordingQueue())
+    batch_size = get_settings().db_in_filter_batch_size
+    file_ids = [str(uuid.uuid4()) for _ in range(2 * batch_size + 1)]
+    supabase.tables["files"].extend({"id": i, "status": "uploaded"} for i in file_ids)
+
+    try:
+        accepted = asyncio.run(enqueue_pdf_jobs(file_ids))
+    finally:
+        install_queue(previous)
+
+    assert accepted == file_ids
+    assert supabase.requests["rest PATCH"] == 3
+    assert {row["status"] for row in supabase.tables["files"]} == {"queued"}
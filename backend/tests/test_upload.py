@@ -0,0 +1,61 @@
+import asyncio
+import uuid
+
+import httpx
+
+from benchmarks.fakes import FakeSupabase
+from benchmarks.scenarios import mint_token
+
+
+class FailingSigner(FakeSupabase):
+    """Storage refuses to sign upload URLs."""
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if "/object/upload/sign/" in request.url.path and request.method == "POST":
+            return httpx.Response(500, json={"message": "unavailable"})
+        return await super().handle(request)
+
+
+def _post(path: str, body: dict, user_id: str) -> httpx.Response:
+    from main import app
+
+    async def run() -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                path, json=body, headers={"Authorization": f"Bearer {mint_token(user_id)}"}
+            )
+
+    return asyncio.run(run())
+
+
+def test_signing_failure_leaves_no_rows():
+    supabase = FailingSigner()
+    supabase.install()
+    user_id = str(uuid.uuid4())
+
+    response = _post(
+        "/files/initiate-upload",
+        {"files": [{"name": f"doc-{i}.pdf", "size": 1024} for i in range(3)]},
+        user_id,
+    )
+    assert response.status_code == 500
+    assert supabase.tables["files"] == []
+
+
+def test_signing_failure_leaves_replaced_file_unchanged():
+    supabase = FailingSigner()
+    supabase.install()
+    user_id, file_id = str(uuid.uuid4()), str(uuid.uuid4())
+    row = {
+        "id": file_id,
+        "user_id": user_id,
+        "storage_path": f"{user_id}/{file_id}.pdf",
+        "status": "processed",
+        "version": 1,
+    }
+    supabase.tables["files"].append(dict(row))
+
+    response = _post(f"/files/{file_id}/replace", {"size": 2048}, user_id)
+    assert response.status_code == 500
+    assert supabase.tables["files"] == [row]
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.services.search.vector_store import (
+    InMemoryVectorStore,
+    VectorPoint,
+    VectorStoreClient,
+    VectorStoreError,
+)
+
+
+def _points(count: int) -> list[VectorPoint]:
+    return [
+        VectorPoint(id=f"p{i}", vector=[0.0] * 4, payload={"user_id": "u", "file_id": "f"})
+        for i in range(count)
+    ]
+
+
+def _client(store: InMemoryVectorStore, **kwargs) -> VectorStoreClient:
+    return VectorStoreClient(
+        store, max_batch_points=2, max_in_flight=2, retry_delay=0.001, **kwargs
+    )
+
+
+def test_upsert_retries_transient_failures():
+    async def run():
+        store = InMemoryVectorStore(failures=2)
+        client = _client(store)
+        session = client.session("test")
+        await session.upsert(_points(5))
+        stats = await session.finish()
+        return store, client, stats
+
+    store, client, stats = asyncio.run(run())
+    assert len(store.points) == 5
+    assert stats.vectors == 5 and stats.batches == 3 and stats.retries == 2
+    assert client._slots._value == 2
+
+
+def test_failed_upload_raises_and_frees_slots():
+    async def run():
+        store = InMemoryVectorStore(failures=100)
+        client = _client(store, max_attempts=2)
+        session = client.session("test")
+        await session.upsert(_points(4))
+        with pytest.raises(VectorStoreError):
+            await session.finish()
+        return client
+
+    client = asyncio.run(run())
+    assert client._slots._value == 2
+
+
+def test_abort_frees_slots_of_unstarted_batches():
+    async def run():
+        store = InMemoryVectorStore(latency=10.0)
+        client = _client(store)
+        session = client.session("test")
+        # Both slots taken; the tasks are cancelled before they ever run
+        await session.upsert(_points(4))
+        await session.abort()
+        assert client._slots._value == 2
+
+        # The shared client is still usable by the next job
+        store.latency = 0.0
+        session = client.session("next")
+        await session.upsert(_points(6))
+        await asyncio.wait_for(session.finish(), timeout=5)
+        return store, client
+
+    store, client = asyncio.run(run())
+    assert len(store.points) == 6
+    assert client._slots._value == 2
@@ -0,0 +1,68 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from app.core.config import get_settings
+from app.services.pdf import processor
+from benchmarks.fakes import FakeSupabase, install_fake_embeddings
+
+
+@pytest.fixture
+def supabase() -> FakeSupabase:
+    fake = FakeSupabase()
+    fake.install()
+    install_fake_embeddings()
+    return fake
+
+
+def _add_file(supabase: FakeSupabase, data: bytes | None) -> str:
+    file_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    path = f"{user_id}/{file_id}.pdf"
+    supabase.tables["files"].append({
+        "id": file_id,
+        "user_id": user_id,
+        "original_name": "a.pdf",
+        "storage_path": path,
+        "status": "queued",
+    })
+    if data is not None:
+        supabase.put_object(get_settings().supabase_storage_bucket, path, data)
+    return file_id
+
+
+def _post(file_id: str) -> httpx.Response:
+    from main import app
+
+    async def run() -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/worker/process-pdf", json={"file_id": file_id})
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("data", [None, b"not a pdf"], ids=["missing-object", "unparseable"])
+def test_permanent_failures_are_not_retried(supabase, data):
+    file_id = _add_file(supabase, data)
+    response = _post(file_id)
+    assert response.status_code == 200
+    assert response.json()["success"] is False
+    row = next(row for row in supabase.tables["files"] if row["id"] == file_id)
+    assert row["status"] == "failed"
+
+
+def test_missing_row_is_not_retried(supabase):
+    response = _post(str(uuid.uuid4()))
+    assert response.status_code == 200
+    assert response.json()["success"] is False
+
+
+def test_transient_failures_are_retried(supabase, monkeypatch):
+    async def unreachable(*args, **kwargs):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(processor, "download_pdf", unreachable)
+    response = _post(_add_file(supabase, b"%PDF-1.7"))
+    assert response.status_code == 500
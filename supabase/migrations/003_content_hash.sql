@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Migration 003 — Content hash on files
+--
+-- The ingestion worker records the SHA-256 of each processed PDF so that
+-- identical uploads (across accounts or via global files) can reuse the
+-- chunks and embeddings of the first copy instead of being re-embedded.
+-- ============================================================================
+
+
+do $$ begin
+  if not exists (
+    select 1 from information_schema.columns
+    where table_schema='public' and table_name='files' and column_name='content_hash'
+  ) then
+    alter table public.files add column content_hash text;
+  end if;
+end $$;
+
+create index if not exists idx_files_content_hash on public.files(content_hash);
@@ -0,0 +1,18 @@
+-- ============================================================================
+-- Migration 004 — Ingestion stats on files
+--
+-- The ingestion worker records how long each stage took (metadata,
+-- download, extract, chunk, embed, store, finalize) and how much it
+-- processed (bytes, pages, chunks, embeddings) for every document, so
+-- capacity planning can work from real numbers.
+-- ============================================================================
+
+
+do $$ begin
+  if not exists (
+    select 1 from information_schema.columns
+    where table_schema='public' and table_name='files' and column_name='ingest_stats'
+  ) then
+    alter table public.files add column ingest_stats jsonb;
+  end if;
+end $$;
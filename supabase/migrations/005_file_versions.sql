@@ -0,0 +1,18 @@
+-- ============================================================================
+-- Migration 005 — File versions
+--
+-- A file can be replaced by a revised version in place (same id, same
+-- storage path). Each replacement bumps `version`; the ingestion worker
+-- diffs the new version's chunks against the indexed ones, so only what
+-- changed is embedded and indexed again.
+-- ============================================================================
+
+
+do $$ begin
+  if not exists (
+    select 1 from information_schema.columns
+    where table_schema='public' and table_name='files' and column_name='version'
+  ) then
+    alter table public.files add column version integer not null default 1;
+  end if;
+end $$;